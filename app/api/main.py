@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.routes import upsource, gitlab, github
+from app.api.routes import upsource, gitlab, github, metrics, status
 
 api_router = APIRouter()
 api_router.include_router(upsource.router, prefix="/webhooks", tags=["webhooks"])
 api_router.include_router(gitlab.router, prefix="/webhooks", tags=["webhooks"])
-api_router.include_router(github.router, prefix="/webhooks", tags=["webhooks"])
\ No newline at end of file
+api_router.include_router(github.router, prefix="/webhooks", tags=["webhooks"])
+api_router.include_router(status.router, prefix="/status", tags=["status"])
+api_router.include_router(metrics.router, tags=["metrics"])
@@ -0,0 +1,68 @@
+import logging
+import random
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.logger import get_logger
+
+class BodyCapture:
+    """
+    스트리밍되는 body에서 최대 `limit` 바이트만 복사해 둡니다.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.buffer = bytearray()
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        remaining = self.limit - len(self.buffer)
+        if remaining > 0:
+            self.buffer += chunk[:remaining]
+
+    def text(self) -> str:
+        text = self.buffer.decode("utf-8", errors="replace")
+        if self.size > len(self.buffer):
+            text += f"... (총 {self.size} bytes 중 {len(self.buffer)} bytes)"
+        return text
+
+class HttpLoggingMiddleware:
+    """
+    요청/응답 body를 DEBUG 레벨로 기록하는 ASGI 미들웨어.
+    body는 흘러가는 그대로 전달하면서 앞부분 `max_body_bytes`만 복사하고,
+    DEBUG 로그가 비활성화되어 있거나 샘플링에서 제외되면 아무것도 복사하지 않습니다.
+    """
+    log = get_logger("review-bot")
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int = 4096, sample_rate: float = 1.0):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http"
+                or not self.log.isEnabledFor(logging.DEBUG)
+                or random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        request_body = BodyCapture(self.max_body_bytes)
+        response_body = BodyCapture(self.max_body_bytes)
+        status_code = None
+
+        async def receive_with_capture() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.feed(message.get("body", b""))
+            return message
+
+        async def send_with_capture(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.feed(message.get("body", b""))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self.log.debug(f"{scope['method']} {scope['path']} request body: {request_body.text()}")
+                self.log.debug(f"{scope['method']} {scope['path']} response body({status_code}): {response_body.text()}")
+
+        await self.app(scope, receive_with_capture, send_with_capture)
@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from app.core import metrics
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    content, media_type = metrics.render()
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from app.core.cache import review_cache
+from app.core.dispatcher import notification_dispatcher
+from app.core.job_queue import review_queue
+from app.core.key_pool import openai_keys
+from app.core.scheduler import review_scheduler
+
+router = APIRouter()
+
+@router.get("/queue")
+async def queue_status():
+    return await review_queue.stats()
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: int):
+    status = await review_queue.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"작업 {job_id}을 찾을 수 없습니다.")
+    return status
+
+@router.get("/cache")
+async def cache_status():
+    return await review_cache.stats()
+
+@router.get("/notifications")
+async def notification_status():
+    return notification_dispatcher.status()
+
+@router.get("/openai")
+async def openai_status():
+    return openai_keys.stats()
+
+@router.get("/scheduler")
+async def scheduler_status():
+    return review_scheduler.status()
@@ -0,0 +1,50 @@
+import traceback
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from app.core import events, metrics
+from app.core.delivery import delivery_key, review_head, review_key
+from app.core.job_queue import review_queue
+from app.core.model import REVIEW_EVENT_TYPES, get_event_type, get_repo_name
+from app.logger import get_logger
+
+log = get_logger('review-bot')
+
+async def accept_webhook(source: str, request: Request):
+    """
+    webhook 이벤트를 디코딩해 리뷰 작업 큐에 등록하고 `202 Accepted`로 응답합니다.
+    backlog가 한도를 넘으면 새 리뷰는 받지 않고 `Retry-After`와 함께 429/503으로 응답합니다.
+    """
+    with metrics.webhook(source):
+        try:
+            event = events.decode(source, await request.body())
+            event_type = get_event_type(source, event)
+            repo = get_repo_name(source, event)
+
+            # backlog가 한도를 넘으면 새 리뷰는 받지 않고 Retry-After 이후 재전송을 요청
+            if event_type in REVIEW_EVENT_TYPES and (rejection := await review_queue.admit(repo)) is not None:
+                metrics.record_rejected(source, rejection.status_code)
+                log.warning(f"리뷰 작업을 거절합니다: {rejection.reason} (Retry-After: {rejection.retry_after}초)")
+                return JSONResponse(status_code=rejection.status_code,
+                                    headers={"Retry-After": str(rejection.retry_after)},
+                                    content={"status": "rejected", "message": rejection.reason})
+
+            # 알림은 대체/재시도되는 리뷰 작업과 분리해 별도 작업으로 한 번만 보냅니다.
+            payload = events.to_payload(event)
+            key = delivery_key(source, request.headers, event)
+            delivery = await review_queue.enqueue_once(source, payload, delivery_key=f"{key}:notification",
+                                                       repo=repo, kind="notification")
+            if event_type in REVIEW_EVENT_TYPES:
+                delivery = await review_queue.enqueue_once(source, payload, delivery_key=key,
+                                                           review_key=review_key(source, event), repo=repo,
+                                                           head=review_head(source, event))
+            return JSONResponse(status_code=202, content={
+                "status": "duplicate" if delivery.duplicate else "accepted",
+                "job_id": delivery.job_id,
+                "job_status": delivery.status,
+            })
+
+        except Exception as e:
+            metrics.record_error(source, "webhook")
+            log.error(f"오류 발생: {e}")
+            traceback.print_exc()
+            return {"status": "error", "message": str(e)}
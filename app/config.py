@@ -9,33 +9,145 @@ class Settings(BaseSettings):
         extra="ignore",
     )
     PROJECT_NAME: str = "code-review-bot"
+
+    # http logging (review-bot 로거가 DEBUG일 때만 동작)
+    HTTP_LOG_MAX_BODY_BYTES: int = 4096
+    HTTP_LOG_SAMPLE_RATE: float = 1.0
     
     # code review tool
     CODE_REVIEW_TOOL: Literal["upsource", "github", "gitlab"]
     UPSOURCE_BASE_URL: Optional[str] = None
     UPSOURCE_USERNAME: Optional[str] = None
     UPSOURCE_PASSWORD: Optional[str] = None
+    UPSOURCE_CONNECT_TIMEOUT: float = 10.0
+    UPSOURCE_READ_TIMEOUT: float = 10.0
+    UPSOURCE_FETCH_CONCURRENCY: int = 8
+    UPSOURCE_CONTENT_CACHE_BYTES: int = 64 * 1024 * 1024
+    UPSOURCE_REVIEW_DETAILS_TTL: float = 30.0
+    UPSOURCE_DIFF_CONTEXT_LINES: int = 3
+    UPSOURCE_FULL_CONTENT_MAX_LINES: int = 80
 
     GITLAB_BASE_URL: Optional[str] = None
     GITLAB_ACCESS_TOKEN: Optional[str] = None
+    GITLAB_CONNECT_TIMEOUT: float = 10.0
+    GITLAB_READ_TIMEOUT: float = 30.0
 
     GITHUB_BASE_URL: Optional[str] = None
     GITHUB_ACCESS_TOKEN: Optional[str] = None
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_TIMEOUT: int = 10
+    GITHUB_MEMBERS_TTL: float = 3600.0
+    GITHUB_REVIEWERS_FROM_PAYLOAD: bool = True
 
     # openai
     OPENAI_API_KEYS: str
     OPENAI_MODEL: str
+    OPENAI_BASE_URL: Optional[str] = None
+    OPENAI_RESPONSE_FORMAT: Literal["json_schema", "json_object"] = "json_schema"
+    OPENAI_MAX_ATTEMPTS: int = 4
+    # 연결 실패, 타임아웃, 5xx 응답을 다시 요청하기 전 대기 시간(초, 지수 백오프)
+    OPENAI_RETRY_DELAY: float = 1.0
+    OPENAI_MAX_RETRY_DELAY: float = 30.0
+    OPENAI_KEY_RPM: int = 500
+    OPENAI_KEY_TPM: int = 30000
+    OPENAI_KEY_COOLDOWN: float = 20.0
     REVIEW_FILES_RAW: str
+    REVIEW_CONCURRENCY: int = 4
+    # 모든 리뷰를 합친 동시 모델 호출 수와 저장소별 동시 모델 호출 수
+    REVIEW_MODEL_CONCURRENCY: int = 8
+    REVIEW_REPO_CONCURRENCY: int = 4
+    # 저장소별 가중치 (예: "org/api=2,org/docs=0.5", 지정하지 않은 저장소는 1)
+    REVIEW_REPO_WEIGHTS: str = ""
+    REVIEW_TOKEN_BUDGET: int = 6000
+    REVIEW_STREAMING: bool = True
+    REVIEW_STREAM_EDIT_INTERVAL: float = 2.0
+    REVIEW_PACK_MAX_FILES: int = 8
+
+    # review diff filter (쉼표로 구분한 glob, `/`가 없으면 모든 디렉터리의 파일명에 매치)
+    REVIEW_INCLUDE_GLOBS: str = ""
+    REVIEW_EXCLUDE_GLOBS: str = ("package-lock.json,yarn.lock,pnpm-lock.yaml,poetry.lock,Pipfile.lock,Cargo.lock,"
+                                 "go.sum,composer.lock,Gemfile.lock,*.min.js,*.min.css,*.map,*_pb2.py,*_pb2_grpc.py,"
+                                 "*.pb.go,*.generated.*,**/vendor/**,**/node_modules/**,**/dist/**")
+    REVIEW_MAX_FILE_BYTES: int = 200 * 1024
+    REVIEW_MAX_FILE_LINES: int = 5000
+    REVIEW_SKIP_GENERATED: bool = True
+    REVIEW_DIFF_CONTEXT_LINES: int = 2
+
+    # review queue
+    REVIEW_QUEUE_PATH: str = "./data/review-queue.db"
+    REVIEW_WORKERS: int = 2
+    REVIEW_WORKER_SHUTDOWN_TIMEOUT: float = 10.0
+    REVIEW_QUEUE_POLL_INTERVAL: float = 1.0
+    REVIEW_QUEUE_MAX_ATTEMPTS: int = 3
+    REVIEW_QUEUE_RETRY_DELAY: float = 5.0
+    REVIEW_DEBOUNCE_SECONDS: float = 10.0
+    REVIEW_STATE_PATH: str = "./data/review-state.db"
+    REVIEW_QUEUE_RETENTION_SECONDS: int = 86400
+    # 대기 중인 작업이 한도를 넘으면 webhook을 거절 (전체: 503, 저장소별: 429)
+    REVIEW_BACKLOG_LIMIT: int = 200
+    REVIEW_REPO_BACKLOG_LIMIT: int = 50
+
+    # review cache
+    REVIEW_CACHE_ENABLED: bool = True
+    REVIEW_CACHE_PATH: str = "./data/review-cache.db"
+    REVIEW_CACHE_MEMORY_ITEMS: int = 512
+    REVIEW_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    REVIEW_CACHE_MAX_AGE: float = 7 * 86400
 
     # webhook
     WEBHOOK: Literal["google-chat", "slack", "discord"]
     WEBHOOK_URI: str
+    WEBHOOK_CONNECT_TIMEOUT: float = 5.0
+    WEBHOOK_READ_TIMEOUT: float = 10.0
+    WEBHOOK_DEDUP_TTL: float = 7 * 86400
+    NOTIFICATION_QUEUE_SIZE: int = 1000
+    NOTIFICATION_WORKERS: int = 2
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_RETRY_DELAY: float = 1.0
+    NOTIFICATION_MAX_RETRY_DELAY: float = 60.0
+    NOTIFICATION_SHUTDOWN_TIMEOUT: float = 10.0
+    # 0보다 크면 채널별로 이 시간(초) 동안 알림을 모아 한 번에 발송
+    NOTIFICATION_DIGEST_WINDOW: float = 0.0
+    NOTIFICATION_DIGEST_MAX_EVENTS: int = 20
+    NOTIFICATION_DIGEST_URGENT_TYPES: str = "CREATED_REVIEW"
+
+    # http client pool
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+    HTTP_WARMUP: bool = True
 
     @computed_field
     @property
     def REVIEW_FILES(self) -> list[str]:
         return [x.strip() for x in self.REVIEW_FILES_RAW.split(",") if x.strip()]
+
+    @computed_field
+    @property
+    def REVIEW_INCLUDE_PATTERNS(self) -> list[str]:
+        return [x.strip() for x in self.REVIEW_INCLUDE_GLOBS.split(",") if x.strip()]
+
+    @computed_field
+    @property
+    def REVIEW_EXCLUDE_PATTERNS(self) -> list[str]:
+        return [x.strip() for x in self.REVIEW_EXCLUDE_GLOBS.split(",") if x.strip()]
     
+    @computed_field
+    @property
+    def REVIEW_REPO_WEIGHT_MAP(self) -> dict[str, float]:
+        weights = {}
+        for pair in self.REVIEW_REPO_WEIGHTS.split(","):
+            repo, _, weight = pair.strip().rpartition("=")
+            if repo.strip():
+                weights[repo.strip()] = float(weight)
+        return weights
+
+    @computed_field
+    @property
+    def NOTIFICATION_DIGEST_URGENT_EVENTS(self) -> list[str]:
+        return [x.strip() for x in self.NOTIFICATION_DIGEST_URGENT_TYPES.split(",") if x.strip()]
+
     @model_validator(mode="after")
     def validate_fields_by_code_review_tools(cls, values):
         if values.CODE_REVIEW_TOOL == "upsource":
@@ -1,53 +1,65 @@
 from typing import Optional
-from app.core.gitlab import Gitlab
-from app.core.github import Github
+from app.config import settings
+from app.core.events import Event
+from app.core.http import http_clients
 from app.core.model import WebhookMessage
-from app.core.notification import Discord, GoogleChat, Slack
+from app.core.registry import Registry
 from app.core.service import CodeReviewTool, Webhook
-from app.core.upsource import Upsource
+
+# 설정(CODE_REVIEW_TOOL, WEBHOOK)에서 고른 backend만 처음 사용할 때 import 합니다.
+code_review_tools = Registry[CodeReviewTool]("code review tool", {
+    'upsource': 'app.core.upsource:Upsource',
+    'gitlab': 'app.core.gitlab:Gitlab',
+    'github': 'app.core.github:Github',
+})
+notifiers = Registry[Webhook]("webhook", {
+    'google-chat': 'app.core.notification:GoogleChat',
+    'slack': 'app.core.notification:Slack',
+    'discord': 'app.core.notification:Discord',
+})
 
 def get_notification(webhook: str, uri: str, message_format: WebhookMessage) -> Webhook:
-        if webhook == 'google-chat':
-            return GoogleChat(uri=uri,
-                              message_format=message_format)
-        elif webhook == 'slack':
-            return Slack(uri=uri,
-                         message_format=message_format)
-        elif webhook == 'discord':
-            return Discord(uri=uri,
-                           message_format=message_format)
-        else:
-            raise Exception(f"{webhook}는 지원되지 않습니다.")
+        notifier = notifiers.get(webhook)
+        return notifier(uri=uri,
+                        message_format=message_format,
+                        client=http_clients.get("webhook"))
+
 
-     
 def get_code_review_tool(code_review_tool: str,
-                         event: dict,
+                         event: Event,
                          base_url: Optional[str] = None,
                          private_token: Optional[str] = None,
                          username: Optional[str] = None,
                          password: Optional[str] = None,
                          ) -> CodeReviewTool:
+        tool = code_review_tools.get(code_review_tool)
         if code_review_tool == 'upsource':
-            return Upsource(base_url=base_url,
-                            username=username,
-                            password=password,
-                            connect_timeout=10.0,
-                            read_timeout=10.0,
-                            project_id=event["data"]["base"]["reviewId"],
-                            review_id=event["projectId"],
-                            revisions=event["data"].get("revisions", ""))
+            return tool(base_url=base_url,
+                        username=username,
+                        password=password,
+                        client=http_clients.get("upsource"),
+                        project_id=event.project_id,
+                        review_id=event.data.base.review_id,
+                        revisions=event.data.revisions or [])
         elif code_review_tool == 'gitlab':
-            return Gitlab(base_url=base_url,
-                          private_token=private_token,
-                          project_id=event['project']['id'],
-                          merge_request_iid=event['object_attributes']['iid'])
+            return tool(base_url=base_url,
+                        private_token=private_token,
+                        client=http_clients.get("gitlab"),
+                        project_id=event.project.id,
+                        merge_request_iid=event.object_attributes.iid,
+                        head_sha=last_commit.id if (last_commit := event.object_attributes.last_commit) else None)
         elif code_review_tool == 'github':
-            return Github(private_token=private_token,
-                          repo_name=event["repository"]["full_name"],
-                          actor=event["sender"]["login"],
-                          action=event["action"],
-                          pr_number=event.get('pull_request', {}).get('number', None),
-                          organization_name=event.get('organization', {}).get('login', None))
+            pull_request = event.pull_request
+            return tool(private_token=private_token,
+                        repo_name=event.repository.full_name,
+                        actor=event.sender.login,
+                        action=event.action,
+                        pr_number=pull_request.number if pull_request else None,
+                        organization_name=event.organization.login if event.organization else None,
+                        head_sha=pull_request.head.sha if pull_request else None,
+                        requested_reviewers=([{"login": reviewer.login} for reviewer in pull_request.requested_reviewers]
+                                             if pull_request and pull_request.requested_reviewers is not None else None),
+                        client=http_clients.get("github"),
+                        timeout=settings.GITHUB_TIMEOUT)
         else:
             raise Exception(f"{code_review_tool}는 지원되지 않습니다.")
-     
\ No newline at end of file
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+from app.config import settings
+from app.core.storage import SQLiteStore
+from app.logger import get_logger
+
+# 영속 캐시가 용량을 넘으면 바로 다시 넘지 않도록 이 비율까지 비웁니다.
+EVICT_TARGET_RATIO = 0.9
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class LRUCache(Generic[K, V]):
+    """
+    항목 수 기준으로 가장 오래 사용되지 않은 항목부터 제거하는 메모리 캐시.
+    """
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def set(self, key: K, value: V) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class SizedLRUCache(Generic[K, V]):
+    """
+    `sizeof`로 계산한 전체 크기가 `max_bytes`를 넘지 않도록 오래된 항목부터 제거하는 메모리 캐시.
+    내용이 바뀌지 않는 값(예: 리비전별 파일 내용)을 담는 용도입니다.
+    """
+    def __init__(self, max_bytes: int, sizeof: Callable[[V], int]):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._items: OrderedDict[K, tuple[V, int]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key][0]
+
+    def set(self, key: K, value: V) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        if key in self._items:
+            self.size -= self._items.pop(key)[1]
+        self._items[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.size -= evicted
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class TTLCache(Generic[K, V]):
+    """
+    `ttl`초 동안만 값을 유지하는 메모리 캐시.
+    """
+    def __init__(self, ttl: float, max_items: int = 1024):
+        self.ttl = ttl
+        self._items = LRUCache[K, tuple[float, V]](max_items)
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._items.set(key, (time.monotonic() + self.ttl, value))
+
+class ReviewCache(SQLiteStore):
+    """
+    리뷰 결과를 내용 해시로 저장하는 2단계 캐시.
+    메모리 LRU를 먼저 조회하고, 없으면 SQLite 영속 캐시를 조회합니다.
+    영속 캐시는 `max_age`가 지난 항목과 `max_bytes`를 넘는 오래된 항목을 제거합니다.
+    전체 크기는 열 때 한 번 계산하고 저장/삭제할 때마다 갱신하므로, 용량을 넘었을 때만 오래된 항목을 찾습니다.
+    """
+    log = get_logger("openai")
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS reviews (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS reviews_accessed_idx ON reviews (accessed_at)",
+        "CREATE INDEX IF NOT EXISTS reviews_created_idx ON reviews (created_at)",
+    ]
+
+    def __init__(self, path: str, memory_items: int, max_bytes: int, max_age: float):
+        super().__init__(path)
+        self.memory = LRUCache[str, str](memory_items)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # 영속 캐시에 저장된 값의 전체 크기(bytes)
+        self.size = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, prompt_version: str, file_path: str, content: str) -> str:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{model}\0{prompt_version}\0{file_path}\0{content_hash}".encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits["memory"] += 1
+            return value
+
+        if self.is_open:
+            now = time.time()
+            row = await self.fetchone(
+                "UPDATE reviews SET accessed_at = ? WHERE key = ? AND created_at >= ? RETURNING value",
+                (now, key, now - self.max_age),
+            )
+            if row is not None:
+                self.hits["disk"] += 1
+                self.memory.set(key, row[0])
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if not self.is_open:
+            return
+
+        await asyncio.to_thread(self._set, key, value)
+
+    def _on_open(self) -> None:
+        self.size = self._fetchone("SELECT COALESCE(SUM(size), 0) FROM reviews")[0]
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._transaction() as conn:
+            replaced = conn.execute("SELECT size FROM reviews WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO reviews (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self.size += size - (replaced[0] if replaced else 0)
+        self._evict()
+
+    def _evict(self) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            expired = conn.execute("DELETE FROM reviews WHERE created_at < ? RETURNING size",
+                                   (now - self.max_age,)).fetchall()
+            self.size -= sum(size for size, in expired)
+            if self.size <= self.max_bytes:
+                return
+
+            # 가장 오래 사용되지 않은 항목부터 목표 용량까지 제거
+            evicted = conn.execute(
+                """
+                DELETE FROM reviews WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, size, SUM(size) OVER (ORDER BY accessed_at, key) AS freed FROM reviews
+                    ) WHERE freed - size < ?
+                )
+                RETURNING size
+                """,
+                (self.size - int(self.max_bytes * EVICT_TARGET_RATIO),),
+            ).fetchall()
+            self.size -= sum(size for size, in evicted)
+
+    async def stats(self) -> Dict[str, Any]:
+        row = await self.fetchone("SELECT COUNT(*) FROM reviews") if self.is_open else (0,)
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": round((lookups - self.misses) / lookups, 3) if lookups else None,
+            "memory_items": len(self.memory),
+            "disk_items": row[0],
+            "disk_bytes": self.size if self.is_open else 0,
+        }
+
+review_cache = ReviewCache(path=settings.REVIEW_CACHE_PATH,
+                           memory_items=settings.REVIEW_CACHE_MEMORY_ITEMS,
+                           max_bytes=settings.REVIEW_CACHE_MAX_BYTES,
+                           max_age=settings.REVIEW_CACHE_MAX_AGE)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+from typing import Any, Mapping, Optional
+from app.core.events import Event
+
+# 재전송 시에도 값이 유지되는 delivery ID 헤더
+DELIVERY_HEADERS = {
+    "github": ("X-GitHub-Delivery",),
+    "gitlab": ("X-Gitlab-Event-UUID", "Idempotency-Key"),
+    "upsource": (),
+}
+
+def _event_identity(source: str, event: Event) -> list[Any]:
+    if source == "github":
+        pull_request = event.pull_request
+        return [
+            event.repository.full_name,
+            pull_request.number if pull_request else None,
+            pull_request.head.sha if pull_request else None,
+            event.action,
+            event.comment.id if event.comment else None,
+        ]
+    if source == "gitlab":
+        attributes = event.object_attributes
+        return [
+            event.project.id,
+            attributes.iid,
+            attributes.last_commit.id if attributes.last_commit else None,
+            attributes.action,
+            event.event_type,
+        ]
+    if source == "upsource":
+        base = event.data.base
+        return [
+            event.project_id,
+            base.review_id,
+            event.data_type,
+            base.feed_event_id,
+            event.data.revisions,
+        ]
+    raise Exception(f"{source}는 지원되지 않습니다.")
+
+def delivery_key(source: str, headers: Mapping[str, str], event: Event) -> str:
+    """
+    webhook 중복 수신을 판별하는 키를 만듭니다.
+    delivery ID 헤더가 있으면 그 값을, 없으면 이벤트 식별 정보(저장소, PR/MR 번호, head SHA, action)의 해시를 사용합니다.
+    """
+    for header in DELIVERY_HEADERS.get(source, ()):
+        delivery_id: Optional[str] = headers.get(header)
+        if delivery_id:
+            return f"{source}:{delivery_id}"
+
+    identity = json.dumps(_event_identity(source, event), ensure_ascii=False, sort_keys=True, default=str)
+    return f"{source}:sha256:{hashlib.sha256(identity.encode('utf-8')).hexdigest()}"
+
+def review_key(source: str, event: Event) -> str:
+    """
+    같은 PR/MR(리뷰)에 대한 이벤트를 묶는 키를 만듭니다.
+    """
+    if source == "github":
+        return f"github:{event.repository.full_name}#{event.pull_request.number}"
+    if source == "gitlab":
+        return f"gitlab:{event.project.id}!{event.object_attributes.iid}"
+    if source == "upsource":
+        return f"upsource:{event.project_id}/{event.data.base.review_id}"
+    raise Exception(f"{source}는 지원되지 않습니다.")
+
+def review_head(source: str, event: Event) -> Optional[str]:
+    """
+    이벤트 시점의 리뷰 대상 head(GitHub/GitLab은 head commit, Upsource는 revision 목록)를 반환합니다. 알 수 없으면 None 입니다.
+    """
+    if source == "github":
+        return event.pull_request.head.sha if event.pull_request else None
+    if source == "gitlab":
+        last_commit = event.object_attributes.last_commit
+        return last_commit.id if last_commit else None
+    if source == "upsource":
+        return ",".join(event.data.revisions) if event.data.revisions else None
+    raise Exception(f"{source}는 지원되지 않습니다.")
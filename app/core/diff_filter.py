@@ -0,0 +1,301 @@
+import difflib
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from pathlib import PurePosixPath
+from typing import Optional
+from app.config import settings
+from app.core import metrics
+from app.core.planner import HUNK_HEADER, count_tokens, split_hunks
+from app.logger import get_logger
+
+# 파일 앞부분에 있으면 생성된 코드로 판단하는 표식
+GENERATED_MARKER = re.compile(
+    r"@generated|do not edit|code generated by|auto-?generated|generated by the protocol buffer compiler",
+    re.IGNORECASE,
+)
+GENERATED_HEAD_LINES = 20
+# 한 줄이 이보다 길면 minify된 파일로 판단합니다.
+MINIFIED_LINE_LENGTH = 1000
+WHITESPACE = re.compile(r"\s+")
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    `**`는 디렉터리 경계를 넘어, `*`/`?`는 경계 안에서만 매치합니다.
+    `/`가 없는 패턴(`*.min.js`)은 .gitignore처럼 어느 디렉터리의 파일명이든 매치합니다.
+    """
+    pattern = pattern.strip().lstrip("/")
+    prefix = "" if "/" in pattern else "(?:.*/)?"
+    regex = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            regex.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            regex.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            regex.append("[^/]")
+            index += 1
+        else:
+            regex.append(re.escape(pattern[index]))
+            index += 1
+    return prefix + "".join(regex)
+
+@lru_cache(maxsize=32)
+def compile_globs(patterns: tuple[str, ...]) -> Optional[re.Pattern]:
+    """
+    glob 목록을 하나의 정규식으로 컴파일합니다. 목록이 비어 있으면 None 입니다.
+    """
+    patterns = tuple(pattern for pattern in patterns if pattern.strip())
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{_glob_to_regex(pattern)})" for pattern in patterns))
+
+def is_generated(text: str) -> bool:
+    lines = text.splitlines()
+    head = "\n".join(lines[:GENERATED_HEAD_LINES])
+    return bool(GENERATED_MARKER.search(head)) or any(len(line) > MINIFIED_LINE_LENGTH for line in lines)
+
+def is_generated_diff(diff: str) -> bool:
+    """
+    diff만으로 생성된 코드인지 판단합니다.
+    표식은 파일 첫 줄부터 시작하는 hunk의 앞부분에서만 찾고, minify 여부는 추가된 라인의 길이로만 판단합니다.
+    """
+    for hunk in split_hunks(diff):
+        lines = hunk.splitlines()
+        match = HUNK_HEADER.match(lines[0]) if lines else None
+        if match is None:
+            continue
+        if int(match.group(1)) <= 1 or int(match.group(3)) <= 1:
+            head = [line[1:] for line in lines[1:] if not line.startswith(("-", "\\"))][:GENERATED_HEAD_LINES]
+            if GENERATED_MARKER.search("\n".join(head)):
+                return True
+        if any(line.startswith("+") and len(line) - 1 > MINIFIED_LINE_LENGTH for line in lines[1:]):
+            return True
+    return False
+
+def _same_except_spacing(removed: list[str], added: list[str]) -> bool:
+    """
+    연속으로 삭제/추가된 라인을 순서대로 짝지어 줄 안의 공백만 다른지 확인합니다. 빈 라인의 추가/삭제는 무시합니다.
+    들여쓰기는 코드의 의미를 바꿀 수 있으므로(Python 블록 등) 그대로 비교합니다.
+    """
+    removed = [line for line in removed if line.strip()]
+    added = [line for line in added if line.strip()]
+    if len(removed) != len(added):
+        return False
+    for old, new in zip(removed, added):
+        old_body, new_body = old.lstrip(), new.lstrip()
+        if old[:len(old) - len(old_body)] != new[:len(new) - len(new_body)]:
+            return False
+        if WHITESPACE.sub("", old_body) != WHITESPACE.sub("", new_body):
+            return False
+    return True
+
+def is_whitespace_only(diff: str) -> bool:
+    """
+    모든 hunk의 변경이 줄 안의 공백이나 빈 라인만 바꾼 것인지 확인합니다.
+    다른 위치로 옮긴 라인이나 들여쓰기가 바뀐 라인은 코드 변경으로 봅니다.
+    """
+    changed = False
+    for hunk in split_hunks(diff):
+        lines = hunk.splitlines()
+        if not lines or not HUNK_HEADER.match(lines[0]):
+            continue
+        removed: list[str] = []
+        added: list[str] = []
+        for line in lines[1:] + [" "]:
+            if line.startswith("\\"):
+                continue
+            if line.startswith("-") and not added:
+                removed.append(line[1:])
+            elif line.startswith("+"):
+                added.append(line[1:])
+            else:
+                if not _same_except_spacing(removed, added):
+                    return False
+                changed = changed or bool(removed or added)
+                removed = [line[1:]] if line.startswith("-") else []
+                added = []
+    return changed
+
+def trim_context(diff: str, context: int) -> str:
+    """
+    변경 라인 앞뒤로 문맥 라인을 `context`줄만 남기고, 떨어진 부분은 라인 번호를 다시 계산한 hunk로 나눕니다.
+    """
+    trimmed: list[str] = []
+    for hunk in split_hunks(diff):
+        lines = hunk.splitlines()
+        match = HUNK_HEADER.match(lines[0]) if lines else None
+        if match is None:
+            trimmed.append(hunk)
+            continue
+
+        old_line, new_line, suffix = int(match.group(1)), int(match.group(3)), match.group(5)
+        # 라인 수가 0인 쪽의 시작 번호는 바로 앞 라인을 가리킵니다.
+        if match.group(2) == "0":
+            old_line += 1
+        if match.group(4) == "0":
+            new_line += 1
+        body: list[tuple[str, int, int]] = []
+        for line in lines[1:]:
+            body.append((line, old_line, new_line))
+            if line.startswith("-"):
+                old_line += 1
+            elif line.startswith("+"):
+                new_line += 1
+            elif not line.startswith("\\"):
+                old_line += 1
+                new_line += 1
+
+        keep = [False] * len(body)
+        for index, (line, _, _) in enumerate(body):
+            if line.startswith(("+", "-")):
+                for kept in range(max(0, index - context), min(len(body), index + context + 1)):
+                    keep[kept] = True
+            elif line.startswith("\\") and index and keep[index - 1]:
+                keep[index] = True
+
+        group: list[tuple[str, int, int]] = []
+        for index, entry in enumerate(body + [("", 0, 0)]):
+            if index < len(body) and keep[index]:
+                group.append(entry)
+                continue
+            if not group:
+                continue
+            old_count = sum(1 for line, _, _ in group if not line.startswith(("+", "\\")))
+            new_count = sum(1 for line, _, _ in group if not line.startswith(("-", "\\")))
+            old_start = group[0][1] - (0 if old_count else 1)
+            new_start = group[0][2] - (0 if new_count else 1)
+            trimmed.append("\n".join([f"@@ -{old_start},{old_count} +{new_start},{new_count} @@{suffix}",
+                                      *(line for line, _, _ in group)]))
+            group = []
+    return "\n".join(trimmed)
+
+def unified_diff(old_text: str, new_text: str, context: int) -> str:
+    """
+    변경 전/후 파일 내용으로 unified diff의 hunk들을 만듭니다. (파일명 헤더 `---`/`+++`는 제외)
+    """
+    lines = difflib.unified_diff(old_text.splitlines(), new_text.splitlines(), n=max(0, context), lineterm="")
+    return "\n".join(islice(lines, 2, None))
+
+@dataclass
+class DiffFilter:
+    """
+    모델에 보내기 전에 리뷰할 필요가 없는 변경을 걸러내고 diff를 줄이는 단계.
+    하나의 리뷰(PR/MR)마다 만들어 사용하며, 건너뛴 파일과 줄인 토큰 수를 모아 `report()`로 기록합니다.
+    """
+    review_files: list[str]
+    include: Optional[re.Pattern]
+    exclude: Optional[re.Pattern]
+    max_bytes: int
+    max_lines: int
+    skip_generated: bool
+    context_lines: int
+    skipped: dict[str, list[str]] = field(default_factory=dict)
+    reviewed: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    log = get_logger("review-bot")
+
+    @classmethod
+    def from_settings(cls) -> 'DiffFilter':
+        return cls(review_files=settings.REVIEW_FILES,
+                   include=compile_globs(tuple(settings.REVIEW_INCLUDE_PATTERNS)),
+                   exclude=compile_globs(tuple(settings.REVIEW_EXCLUDE_PATTERNS)),
+                   max_bytes=settings.REVIEW_MAX_FILE_BYTES,
+                   max_lines=settings.REVIEW_MAX_FILE_LINES,
+                   skip_generated=settings.REVIEW_SKIP_GENERATED,
+                   context_lines=settings.REVIEW_DIFF_CONTEXT_LINES)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def _skip(self, path: str, reason: str, tokens: int = 0) -> None:
+        self.skipped.setdefault(reason, []).append(path)
+        self.tokens_before += tokens
+        self.log.info(f"{path} 파일은 리뷰하지 않습니다: {reason}")
+
+    def accepts_path(self, path: str) -> bool:
+        """
+        경로만으로 판단할 수 있는 조건(확장자, include/exclude glob)을 확인합니다.
+        """
+        if PurePosixPath(path).suffix.lstrip(".") not in self.review_files:
+            self._skip(path, "extension")
+            return False
+        if (self.include is not None and not self.include.fullmatch(path)) \
+                or (self.exclude is not None and self.exclude.fullmatch(path)):
+            self._skip(path, "excluded")
+            return False
+        return True
+
+    def _exceeds_limits(self, text: str) -> bool:
+        return len(text.encode("utf-8")) > self.max_bytes or text.count("\n") + 1 > self.max_lines
+
+    def filter_diff(self, path: str, diff: Optional[str], renamed: bool = False) -> Optional[str]:
+        """
+        리뷰할 diff를 반환합니다. 리뷰하지 않을 변경이면 None 입니다.
+        `renamed`는 이름만 바뀐 파일을 구분하기 위한 SCM의 rename 여부입니다.
+        """
+        if not self.accepts_path(path):
+            return None
+        if not diff or not diff.strip():
+            self._skip(path, "rename_only" if renamed else "empty")
+            return None
+
+        if self._exceeds_limits(diff):
+            # 큰 diff를 토큰화하지 않도록 근사치로 기록합니다.
+            self._skip(path, "too_large", len(diff) // 4)
+            return None
+        tokens = count_tokens(diff)
+        if self.skip_generated and is_generated_diff(diff):
+            self._skip(path, "generated", tokens)
+            return None
+        if is_whitespace_only(diff):
+            self._skip(path, "whitespace_only", tokens)
+            return None
+
+        if self.context_lines >= 0:
+            diff = trim_context(diff, self.context_lines)
+        self.reviewed += 1
+        self.tokens_before += tokens
+        self.tokens_after += count_tokens(diff)
+        return diff
+
+    def filter_contents(self, path: str, old_path: Optional[str], old_text: Optional[str], new_text: str) -> bool:
+        """
+        변경 전/후 파일 내용으로 리뷰 여부를 판단합니다. (diff가 없는 Upsource용)
+        """
+        if self._exceeds_limits(new_text):
+            self._skip(path, "too_large", (len(new_text) + len(old_text or "")) // 4)
+            return False
+        tokens = count_tokens(new_text) + (count_tokens(old_text) if old_text else 0)
+        if self.skip_generated and is_generated(new_text):
+            self._skip(path, "generated", tokens)
+            return False
+        if old_text is not None:
+            if old_text == new_text:
+                self._skip(path, "rename_only" if old_path and old_path != path else "empty", tokens)
+                return False
+            # 전체 비교로 먼저 걸러 공백만 다를 수 있는 파일만 라인 단위로 다시 확인합니다.
+            if WHITESPACE.sub("", old_text) == WHITESPACE.sub("", new_text) \
+                    and is_whitespace_only(unified_diff(old_text, new_text, 0)):
+                self._skip(path, "whitespace_only", tokens)
+                return False
+        self.reviewed += 1
+        self.tokens_before += tokens
+        self.tokens_after += tokens
+        return True
+
+    def report(self) -> None:
+        skipped = {reason: len(paths) for reason, paths in self.skipped.items()}
+        self.log.info(f"diff 필터: {self.reviewed}개 파일 리뷰, 건너뜀 {skipped or '없음'}, "
+                      f"토큰 {self.tokens_before} -> {self.tokens_after} ({self.tokens_saved} 절약)")
+        metrics.record_tokens_saved("filter", self.tokens_saved)
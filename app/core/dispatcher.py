@@ -0,0 +1,271 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+import httpx
+from app.config import settings
+from app.core.model import EventType, WebhookMessage
+from app.core.service import Webhook
+from app.logger import get_logger
+
+@dataclass
+class ChannelStats:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    dropped: int = 0
+    digested: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "digested": self.digested,
+            "latency_avg": round(self.latency_total / self.sent, 3) if self.sent else None,
+            "latency_max": round(self.latency_max, 3),
+        }
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+@dataclass
+class Digest:
+    webhooks: list[Webhook] = field(default_factory=list)
+    # `send()`로 들어온 알림의 발송 결과를 기다리는 future (message_format id별)
+    waiters: Dict[int, asyncio.Future] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.monotonic)
+    timer: Optional[asyncio.Task] = None
+
+class NotificationDispatcher:
+    """
+    알림 발송 전용 큐와 워커 풀.
+    리뷰 처리 흐름은 `submit()`으로 알림을 넣기만 하고, 워커가 재시도(지수 백오프, 429의 Retry-After 준수)하며 발송합니다.
+    `send()`는 알림이 실제로 발송될 때(digest면 묶음이 발송될 때)까지 기다리므로 영속 알림 작업을 그때 완료할 수 있습니다.
+    발송 중인 작업은 모두 추적되어 종료 시 남은 알림을 보낸 뒤 정리합니다.
+    `digest_window`가 0보다 크면 채널별로 그 시간(또는 `digest_max_events`건)만큼 알림을 모아 한 번에 보내며,
+    `urgent_events`에 속한 이벤트는 모으지 않고 바로 보냅니다.
+    """
+    log = get_logger("notification")
+
+    def __init__(self,
+                 queue_size: int,
+                 workers: int,
+                 max_attempts: int,
+                 base_delay: float,
+                 max_delay: float,
+                 digest_window: float = 0.0,
+                 digest_max_events: int = 20,
+                 urgent_events: tuple[str, ...] = ()):
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.digest_window = digest_window
+        self.digest_max_events = max(1, digest_max_events)
+        self.urgent_events = set()
+        for name in urgent_events:
+            if name in EventType.__members__:
+                self.urgent_events.add(EventType[name])
+            else:
+                self.log.warning(f"{name}은 알 수 없는 이벤트 유형입니다. (NOTIFICATION_DIGEST_URGENT_TYPES)")
+        self.stats: Dict[str, ChannelStats] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._inflight: set[asyncio.Task] = set()
+        self._digests: Dict[tuple[str, str], Digest] = {}
+        self._waiters: set[asyncio.Future] = set()
+
+    def _channel_stats(self, webhook: Webhook) -> ChannelStats:
+        return self.stats.setdefault(type(webhook).__name__, ChannelStats())
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._run(), name=f"notification-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._queue is None:
+            return
+        for key in list(self._digests):
+            self._flush(key)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            self.log.warning(f"발송하지 못한 알림 {self._queue.qsize() + len(self._inflight)}건이 남아 있습니다.")
+        for task in [*self._workers, *self._inflight]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._inflight, return_exceptions=True)
+        self._resolve(list(self._waiters), "알림 발송기가 종료되어 알림을 발송하지 못했습니다.")
+        self._workers = []
+        self._queue = None
+
+    async def submit(self, webhook: Webhook, waiter: Optional[asyncio.Future] = None) -> bool:
+        if self._queue is None:
+            raise Exception("알림 발송기가 시작되지 않았습니다.")
+        if waiter is not None:
+            self._waiters.add(waiter)
+            waiter.add_done_callback(self._waiters.discard)
+        if self.digest_window > 0 and webhook.message_format.event_type not in self.urgent_events:
+            self._buffer(webhook, waiter)
+            return True
+        return self._put(webhook, time.monotonic(), waiters=[waiter] if waiter else [])
+
+    async def send(self, webhook: Webhook) -> None:
+        """
+        알림을 넣고 발송될 때까지 기다립니다. 버려지거나 재시도 끝에 발송하지 못하면 예외가 발생합니다.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        await self.submit(webhook, waiter)
+        await waiter
+
+    def _resolve(self, waiters: list[asyncio.Future], error: Optional[str] = None) -> None:
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(Exception(error))
+
+    def _put(self,
+             webhook: Webhook,
+             submitted_at: float,
+             messages: Optional[list[WebhookMessage]] = None,
+             waiters: Optional[list[asyncio.Future]] = None) -> bool:
+        try:
+            self._queue.put_nowait((webhook, submitted_at, messages, waiters or []))
+            return True
+        except asyncio.QueueFull:
+            self._channel_stats(webhook).dropped += len(messages) if messages else 1
+            self.log.error(f"알림 큐가 가득 차 알림을 버립니다: {type(webhook).__name__}")
+            self._resolve(waiters or [], "알림 큐가 가득 차 알림을 버렸습니다.")
+            return False
+
+    def _buffer(self, webhook: Webhook, waiter: Optional[asyncio.Future] = None) -> None:
+        key = (type(webhook).__name__, webhook.uri)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = Digest()
+            digest.timer = asyncio.create_task(self._flush_later(key, digest), name=f"notification-digest-{key[0]}")
+        digest.webhooks.append(webhook)
+        if waiter is not None:
+            digest.waiters[id(webhook.message_format)] = waiter
+        if len(digest.webhooks) >= self.digest_max_events:
+            self._flush(key)
+
+    async def _flush_later(self, key: tuple[str, str], digest: Digest) -> None:
+        await asyncio.sleep(self.digest_window)
+        if self._digests.get(key) is digest:
+            self._flush(key)
+
+    def _flush(self, key: tuple[str, str]) -> None:
+        """
+        채널에 모아 둔 알림을 발송 큐에 넣습니다. 한 건뿐이면 평소처럼 보냅니다.
+        """
+        digest = self._digests.pop(key, None)
+        if digest is None:
+            return
+        if digest.timer is not None and digest.timer is not asyncio.current_task():
+            digest.timer.cancel()
+
+        webhook = digest.webhooks[0]
+        if len(digest.webhooks) == 1:
+            self._put(webhook, digest.started_at, waiters=list(digest.waiters.values()))
+            return
+        webhooks = {id(item.message_format): item for item in digest.webhooks}
+        for messages in webhook.split_digest([item.message_format for item in digest.webhooks]):
+            waiters = [digest.waiters[id(message)] for message in messages if id(message) in digest.waiters]
+            if len(messages) == 1:
+                self._put(webhooks[id(messages[0])], digest.started_at, waiters=waiters)
+            else:
+                self._put(webhook, digest.started_at, messages, waiters)
+
+    async def _run(self) -> None:
+        while True:
+            webhook, submitted_at, messages, waiters = await self._queue.get()
+            task = asyncio.create_task(self._deliver(webhook, submitted_at, messages))
+            self._inflight.add(task)
+            try:
+                delivered = await asyncio.shield(task)
+                self._resolve(waiters, None if delivered else "알림을 발송하지 못했습니다.")
+            except Exception as e:
+                self._resolve(waiters, f"알림을 발송하지 못했습니다: {e}")
+            finally:
+                self._inflight.discard(task)
+                self._queue.task_done()
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _deliver(self, webhook: Webhook, submitted_at: float, messages: Optional[list[WebhookMessage]] = None) -> bool:
+        stats = self._channel_stats(webhook)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                if messages:
+                    await webhook.send_digest(messages)
+                    stats.digested += len(messages)
+                else:
+                    await webhook.send_message()
+                latency = time.monotonic() - submitted_at
+                stats.sent += 1
+                stats.latency_total += latency
+                stats.latency_max = max(stats.latency_max, latency)
+                return True
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status != 429 and status < 500:
+                    self.log.error(f"알림 발송 실패({status}): {e.response.text}")
+                    break
+                delay = _retry_after(e.response) if status == 429 else None
+                error = f"{status}"
+            except httpx.TransportError as e:
+                delay = None
+                error = str(e) or type(e).__name__
+            except Exception as e:
+                self.log.error(f"알림 발송 실패: {e}")
+                break
+
+            if attempt == self.max_attempts:
+                self.log.error(f"알림 발송을 {attempt}회 시도했지만 실패했습니다: {error}")
+                break
+            delay = min(delay if delay is not None else self._backoff(attempt), self.max_delay)
+            stats.retried += 1
+            self.log.warning(f"알림 발송 실패({error}), {delay:.1f}초 후 다시 시도합니다. ({attempt}/{self.max_attempts})")
+            await asyncio.sleep(delay)
+
+        stats.failed += 1
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._inflight),
+            "buffered": sum(len(digest.webhooks) for digest in self._digests.values()),
+            "channels": {channel: stats.as_dict() for channel, stats in self.stats.items()},
+        }
+
+notification_dispatcher = NotificationDispatcher(queue_size=settings.NOTIFICATION_QUEUE_SIZE,
+                                                 workers=settings.NOTIFICATION_WORKERS,
+                                                 max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+                                                 base_delay=settings.NOTIFICATION_RETRY_DELAY,
+                                                 max_delay=settings.NOTIFICATION_MAX_RETRY_DELAY,
+                                                 digest_window=settings.NOTIFICATION_DIGEST_WINDOW,
+                                                 digest_max_events=settings.NOTIFICATION_DIGEST_MAX_EVENTS,
+                                                 urgent_events=tuple(settings.NOTIFICATION_DIGEST_URGENT_EVENTS))
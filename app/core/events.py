@@ -0,0 +1,132 @@
+"""
+webhook 이벤트 모델.
+사용하는 필드만 정의해 두고 요청 본문(bytes)에서 바로 디코딩하므로,
+GitLab MR 이벤트의 changes/commits처럼 쓰지 않는 큰 필드는 파이썬 객체로 만들지 않습니다.
+큐에는 `to_payload()`로 사용하는 필드만 저장하고, 워커에서 `convert()`로 다시 모델로 바꿉니다.
+"""
+from typing import Any, Optional, Union
+import msgspec
+
+class _Event(msgspec.Struct, omit_defaults=True):
+    pass
+
+# GitHub
+class GithubUser(_Event):
+    login: str = ""
+
+class GithubRepository(_Event):
+    full_name: str
+    name: str
+    html_url: Optional[str] = None
+
+class GithubRef(_Event):
+    sha: Optional[str] = None
+
+class GithubPullRequest(_Event):
+    number: int
+    id: Optional[int] = None
+    html_url: Optional[str] = None
+    head: GithubRef = msgspec.field(default_factory=GithubRef)
+    requested_reviewers: Optional[list[GithubUser]] = None
+
+class GithubComment(_Event):
+    id: Optional[int] = None
+    body: Optional[str] = None
+    html_url: Optional[str] = None
+
+class GithubEvent(_Event):
+    repository: GithubRepository
+    sender: GithubUser
+    action: str = ""
+    organization: Optional[GithubUser] = None
+    pull_request: Optional[GithubPullRequest] = None
+    comment: Optional[GithubComment] = None
+    # push 이전 head (synchronize 이벤트)
+    before: Optional[str] = None
+
+# GitLab
+class GitlabUser(_Event):
+    name: str = ""
+
+class GitlabProject(_Event):
+    id: Union[int, str]
+    name: str = ""
+    path_with_namespace: Optional[str] = None
+
+class GitlabCommit(_Event):
+    id: Optional[str] = None
+    message: Optional[str] = None
+
+class GitlabAttributes(_Event):
+    iid: Optional[int] = None
+    action: Optional[str] = None
+    source_branch: Optional[str] = None
+    target_branch: Optional[str] = None
+    url: Optional[str] = None
+    oldrev: Optional[str] = None
+    last_commit: Optional[GitlabCommit] = None
+
+class GitlabEvent(_Event):
+    event_type: str
+    project: GitlabProject
+    user: GitlabUser = msgspec.field(default_factory=GitlabUser)
+    reviewers: list[GitlabUser] = msgspec.field(default_factory=list)
+    object_attributes: GitlabAttributes = msgspec.field(default_factory=GitlabAttributes)
+    commit: Optional[GitlabCommit] = None
+
+# Upsource
+class UpsourceUser(_Event, rename="camel"):
+    user_name: str = ""
+
+class UpsourceBase(_Event, rename="camel"):
+    review_id: str
+    actor: UpsourceUser = msgspec.field(default_factory=UpsourceUser)
+    user_ids: list[UpsourceUser] = msgspec.field(default_factory=list)
+    feed_event_id: Optional[str] = None
+
+class UpsourceData(_Event, rename="camel"):
+    base: UpsourceBase
+    revisions: Optional[list[str]] = None
+    old_state: Optional[Any] = None
+    new_state: Optional[Any] = None
+    comment_text: Optional[str] = None
+
+class UpsourceEvent(_Event, rename="camel"):
+    project_id: str
+    data_type: str
+    data: UpsourceData
+
+Event = Union[GithubEvent, GitlabEvent, UpsourceEvent]
+
+EVENT_TYPES: dict[str, type] = {
+    "github": GithubEvent,
+    "gitlab": GitlabEvent,
+    "upsource": UpsourceEvent,
+}
+
+# strict=False: 숫자가 문자열로 오는 등 payload 타입이 조금 달라도 받아들입니다.
+_decoders = {source: msgspec.json.Decoder(event_type, strict=False) for source, event_type in EVENT_TYPES.items()}
+
+def decode(source: str, body: bytes) -> Event:
+    """
+    webhook 요청 본문을 `source`의 이벤트 모델로 디코딩합니다.
+    """
+    decoder = _decoders.get(source)
+    if decoder is None:
+        raise Exception(f"{source}는 지원되지 않습니다.")
+    try:
+        return decoder.decode(body)
+    except msgspec.DecodeError as e:
+        raise Exception(f"{source} 이벤트를 해석할 수 없습니다: {e}") from e
+
+def convert(source: str, payload: dict) -> Event:
+    """
+    큐에 저장한 payload(dict)를 이벤트 모델로 바꿉니다.
+    """
+    return msgspec.convert(payload, EVENT_TYPES[source], strict=False)
+
+def to_payload(event: Event) -> dict:
+    """
+    큐에 저장할 수 있도록 이벤트 모델을 dict로 바꿉니다. (값이 없는 필드는 생략)
+    """
+    return msgspec.to_builtins(event)
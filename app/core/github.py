@@ -1,15 +1,103 @@
-import json
-import re
+from functools import cached_property
 from github import Github as PyGithub
 from github import Auth as PyGithubAuth
+from github import GithubException
+from github.Commit import Commit
 from github.PullRequest import PullRequest
+from github.Repository import Repository
+import asyncio
+import time
+import httpx
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.core import metrics
+from app.core.planner import commentable_lines
+from app.core.review import ReviewComment
 from app.core.service import CodeReviewTool
 from app.logger import get_logger
 
+@dataclass
+class _MemberPage:
+    etag: Optional[str]
+    members: List[Dict[str, Any]]
+    next_url: Optional[str]
+
+@dataclass
+class _OrganizationMembers:
+    fetched_at: float = 0.0
+    members: List[Dict[str, Any]] = field(default_factory=list)
+    pages: Dict[str, _MemberPage] = field(default_factory=dict)
+
+class OrganizationMemberCache:
+    """
+    조직별 멤버 목록을 `ttl`초 동안 캐시합니다.
+    만료된 목록은 그대로 반환하면서 백그라운드에서 갱신하고,
+    갱신 시 페이지별 ETag로 조건부 요청(If-None-Match)을 보내 변경이 없으면 304로 끝냅니다.
+    """
+    log = get_logger("code-review-tool")
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, _OrganizationMembers] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    async def get(self, client: httpx.AsyncClient, token: str, organization: str) -> List[Dict[str, Any]]:
+        entry = self._entries.get(organization)
+        if entry is None:
+            return await self._refresh(client, token, organization)
+
+        if time.monotonic() - entry.fetched_at > self.ttl and organization not in self._refreshing:
+            task = asyncio.create_task(self._refresh(client, token, organization))
+            self._refreshing[organization] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(organization, None))
+        return entry.members
+
+    async def _refresh(self, client: httpx.AsyncClient, token: str, organization: str) -> List[Dict[str, Any]]:
+        entry = self._entries.get(organization) or _OrganizationMembers()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        }
+        url = f"{settings.GITHUB_API_URL.rstrip('/')}/orgs/{organization}/members?per_page=100"
+        pages: Dict[str, _MemberPage] = {}
+        unchanged = 0
+
+        try:
+            while url:
+                cached = entry.pages.get(url)
+                request_headers = dict(headers)
+                if cached and cached.etag:
+                    request_headers["If-None-Match"] = cached.etag
+
+                response = await client.get(url, headers=request_headers)
+                if response.status_code == 304 and cached:
+                    page = cached
+                    unchanged += 1
+                else:
+                    response.raise_for_status()
+                    page = _MemberPage(
+                        etag=response.headers.get("ETag"),
+                        members=[{"member_name": member["login"], "member_email": None} for member in response.json()],
+                        next_url=response.links.get("next", {}).get("url"),
+                    )
+                pages[url] = page
+                url = page.next_url
+        except httpx.HTTPError as e:
+            self.log.error(f"{organization} 조직 멤버 조회 실패: {e}")
+            return entry.members
+
+        entry.pages = pages
+        entry.members = [member for page in pages.values() for member in page.members]
+        entry.fetched_at = time.monotonic()
+        self._entries[organization] = entry
+        self.log.info(f"{organization} 조직 멤버 {len(entry.members)}명을 갱신했습니다. (변경 없는 페이지 {unchanged}/{len(pages)})")
+        return entry.members
 
 class Github(CodeReviewTool):
+    backend = "github"
     log = get_logger("code-review-tool")
+    organization_members = OrganizationMemberCache(ttl=settings.GITHUB_MEMBERS_TTL)
 
     def __init__(self,
                  private_token: str,
@@ -17,79 +105,133 @@ class Github(CodeReviewTool):
                  actor: str,
                  action: str,
                  pr_number: Optional[str] = None,
-                 organization_name: Optional[str] = None):
-        super().__init__()
+                 organization_name: Optional[str] = None,
+                 head_sha: Optional[str] = None,
+                 requested_reviewers: Optional[List[Dict[str, Any]]] = None,
+                 client: Optional[httpx.AsyncClient] = None,
+                 timeout: int = 10):
+        super().__init__(client=client)
         self.private_token = private_token
         self.repo_name = repo_name
         self.actor = actor
         self.action = action
-        self.github = PyGithub(auth=PyGithubAuth.Token(private_token))
+        self.github = PyGithub(base_url=settings.GITHUB_API_URL, auth=PyGithubAuth.Token(private_token), timeout=timeout)
         self.pr_number = pr_number
         self.organization_name = organization_name
+        self._head_sha = head_sha
+        self.requested_reviewers = requested_reviewers
+        # get_file_changes()로 조회한 파일별 코멘트 가능 라인
+        self._diff_lines: Optional[Dict[str, set[int]]] = None
+
+    @cached_property
+    def repo(self) -> Repository:
+        return self.github.get_repo(self.repo_name)
+
+    @cached_property
+    def pull(self) -> PullRequest:
+        return self.repo.get_pull(self.pr_number)
+
+    # PyGithub는 동기 HTTP 클라이언트이므로 아래 조회와 API 호출은 `asyncio.to_thread`로 실행합니다.
+    @cached_property
+    def head_commit(self) -> Commit:
+        return self.repo.get_commit(self._head_sha)
+
+    async def get_head_sha(self) -> str:
+        # webhook payload에 head sha가 없을 때만 PR을 조회합니다.
+        if self._head_sha is None:
+            self._head_sha = await asyncio.to_thread(lambda: self.pull.head.sha)
+        return self._head_sha
 
+    @metrics.instrumented("details")
     async def get_review_details(self) -> List[Dict[str, Any]]:
+        # PR 이벤트는 payload의 리뷰 요청 대상자를 사용해 API 호출을 하지 않습니다.
+        if settings.GITHUB_REVIEWERS_FROM_PAYLOAD and self.requested_reviewers is not None:
+            return [
+                {
+                    "member_name": reviewer.get("login", ""),
+                    "member_email": None
+                }
+                for reviewer in self.requested_reviewers
+            ]
+
         if self.organization_name is None:
             return []
-        
-        org = self.github.get_organization(self.organization_name)
-        members = org.get_members()
-        return [
-            {
-                "member_name": member.name,
-                "member_email": member.email
-            }
-            for member in members
-        ]
 
-    async def get_file_changes(self) -> List[Dict[str, Any]]:
-        repo = self.github.get_repo(self.repo_name)
-        pr: PullRequest = repo.get_pull(self.pr_number)
-        files = pr.get_files()
+        return await self.organization_members.get(self.client, self.private_token, self.organization_name)
+
+    @metrics.instrumented("changes")
+    async def get_file_changes(self, base_sha: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        PR의 변경 파일을 조회합니다.
+        `base_sha`가 head의 조상이면 그 커밋부터 head까지의 변경(compare) 중 PR에 포함된 파일만 조회하고,
+        비교할 수 없거나 조상이 아니면(rebase, force push 등) PR 전체 변경을 조회합니다.
+        """
+        def compare(head_sha: str) -> tuple[str, list]:
+            comparison = self.repo.compare(base_sha, head_sha)
+            return comparison.status, list(comparison.files)
+
+        pull_files = None
+        changed_files = None
+        if base_sha:
+            head_sha = await self.get_head_sha()
+            try:
+                status, compared_files = await asyncio.to_thread(compare, head_sha)
+                if status == "ahead":
+                    # base 브랜치를 merge한 커밋 등으로 들어온 PR 밖의 변경은 제외합니다.
+                    pull_files = await asyncio.to_thread(lambda: list(self.pull.get_files()))
+                    pull_names = {file.filename for file in pull_files}
+                    changed_files = [file for file in compared_files if file.filename in pull_names]
+                    self.log.info(f"{base_sha[:7]}...{head_sha[:7]} 사이의 변경 파일만 조회합니다.")
+                else:
+                    self.log.warning(f"{base_sha[:7]}가 head의 조상이 아니어서({status}) PR 전체 변경을 조회합니다.")
+            except GithubException as e:
+                self.log.warning(f"{base_sha[:7]}와 비교할 수 없어 PR 전체 변경을 조회합니다: {e.status}")
 
-        return [
+        if changed_files is None:
+            changed_files = pull_files or await asyncio.to_thread(lambda: list(self.pull.get_files()))
+        files = [
             {
                 "patch": file.patch,
-                "file_name": file.filename
+                "file_name": file.filename,
+                "status": file.status
             }
-            for file in files
+            for file in changed_files
         ]
+        self._diff_lines = {file["file_name"]: commentable_lines(file["patch"] or "") for file in files}
+        return files
 
+    @metrics.instrumented("comment")
     async def add_comment(self, comments: list[str]):
         comment = "\n\n".join(comments)
-        repo = self.github.get_repo(self.repo_name)
-        pr: PullRequest = repo.get_pull(self.pr_number)
-        pr.create_issue_comment(comment)
+        await asyncio.to_thread(lambda: self.pull.create_issue_comment(comment))
 
-    async def add_review_comment(self, comments: list[str]):
-        repo = self.github.get_repo(self.repo_name)
-        pr: PullRequest = repo.get_pull(self.pr_number)
+    @metrics.instrumented("review_comment")
+    async def add_review_comment(self, comments: list[ReviewComment]):
+        """
+        모든 인라인 코멘트를 하나의 PR 리뷰로 등록합니다.
+        diff 밖의 라인을 가리키는 코멘트는 하나의 일반 코멘트로 모아 등록합니다.
+        """
+        review_comments = []
         failed_comments = []
 
         for comment in comments:
-            comment = comment.removeprefix("```json").removesuffix("```")
-            comment = re.sub(r'\\`', '`', comment)
-            comment = re.sub(r'\\"', '`', comment)
-            comment = re.sub(r'``', '`', comment)
-            try:
-                comment_detail = json.loads(comment)
-                if isinstance(comment_detail, list):
-                    for detail in comment_detail:
-                        pr.create_review_comment(body=detail['body'],
-                                            path=detail['path'],
-                                            line=detail['start_line'],
-                                            commit=pr.get_commits().reversed[0])
-                else:
-                    pr.create_review_comment(body=comment_detail['body'],
-                                        path=comment_detail['path'],
-                                        line=comment_detail['start_line'],
-                                        commit=pr.get_commits().reversed[0])
-            except:
-                failed_comments.append(comment)
+            if self._diff_lines is not None and comment.line not in self._diff_lines.get(comment.path, ()):
+                failed_comments.append(f"`{comment.path}` {comment.line}: {comment.body}")
                 continue
-        
+            review_comments.append({"path": comment.path, "line": comment.line, "side": "RIGHT", "body": comment.body})
+
+        if review_comments:
+            await self.get_head_sha()
+            try:
+                await asyncio.to_thread(lambda: self.pull.create_review(commit=self.head_commit, event="COMMENT",
+                                                                        comments=review_comments))
+                self.log.info(f"리뷰 코멘트 {len(review_comments)}건을 등록했습니다.")
+            except GithubException as e:
+                self.log.error(f"리뷰 등록 실패: {e.status} - {e.data}")
+                failed_comments.extend(f"`{c['path']}` {c['line']}: {c['body']}" for c in review_comments)
+
         if failed_comments:
             await self.add_comment(failed_comments)
 
-
     async def get_code(self, file: Dict[str, str]) -> dict:
         pass
\ No newline at end of file
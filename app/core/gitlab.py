@@ -1,23 +1,103 @@
-import gitlab
-from typing import Any, Dict
+import httpx
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+from app.core import metrics
 from app.core.service import CodeReviewTool
 
 class Gitlab(CodeReviewTool):
+    """
+    GitLab REST API(v4)를 공유 비동기 클라이언트로 호출하는 어댑터.
+    생성 시에는 API를 호출하지 않고, 이벤트에 포함된 project id와 MR iid로 필요한 요청만 보냅니다.
+    """
+    backend = "gitlab"
+
     def __init__(self, base_url: str,
                  private_token: str,
+                 client: httpx.AsyncClient,
                  project_id: str,
-                 merge_request_iid: int):
-        super().__init__(base_url)
+                 merge_request_iid: int,
+                 head_sha: Optional[str] = None):
+        super().__init__(base_url, client=client)
         self.private_token = private_token
-        self.gl = gitlab.Gitlab(url=self.base_url, private_token=self.private_token)
         self.project_id = project_id
         self.merge_request_iid = merge_request_iid
-        self.project = self.gl.projects.get(self.project_id)
-        self.mr = self.project.mergerequests.get(self.merge_request_iid)
+        self.head_sha = head_sha
+
+    def _build_url(self, path: str) -> str:
+        return f"{self.base_url.rstrip('/')}/api/v4/{path}"
+
+    @property
+    def _project_path(self) -> str:
+        return f"projects/{quote(str(self.project_id), safe='')}"
+
+    @property
+    def _merge_request_path(self) -> str:
+        return f"{self._project_path}/merge_requests/{self.merge_request_iid}"
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        response = await self.client.request(
+            method,
+            self._build_url(path),
+            headers={"PRIVATE-TOKEN": self.private_token},
+            **kwargs,
+        )
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            self.log.error(f"HTTP 오류 발생: {e.response.status_code} - {e.response.text}")
+            raise
+        return response.json()
+
+    @metrics.instrumented("details")
+    async def get_review_details(self) -> Dict[str, Any]:
+        self.log.info("GitLab MR 상세 정보를 조회합니다.")
+        return await self._request("GET", self._merge_request_path)
 
-    async def get_file_changes(self) -> Dict[str, Any]:
-        return self.mr.changes()
+    @metrics.instrumented("changes")
+    async def get_file_changes(self, base_sha: Optional[str] = None) -> Dict[str, Any]:
+        """
+        MR의 변경 파일을 조회합니다.
+        `base_sha`가 head의 조상이면 그 커밋부터 head까지의 변경(compare) 중 MR에 포함된 파일만 `changes` 형식으로 돌려주고,
+        비교할 수 없거나 조상이 아니면(rebase, force push 등) MR 전체 변경을 조회합니다.
+        """
+        self.log.info("MR의 변경 파일 목록을 조회합니다.")
+        changes = await self._request("GET", f"{self._merge_request_path}/changes")
+        if not (base_sha and self.head_sha):
+            return changes
+
+        try:
+            # compare는 두 커밋의 merge base부터 비교하므로 조상 관계를 먼저 확인합니다.
+            merge_base = await self._request("GET", f"{self._project_path}/repository/merge_base",
+                                             params=[("refs[]", base_sha), ("refs[]", self.head_sha)])
+            if merge_base.get("id") != base_sha:
+                self.log.warning(f"{base_sha[:8]}가 head의 조상이 아니어서 MR 전체 변경을 리뷰합니다.")
+                return changes
+            compare = await self._request("GET", f"{self._project_path}/repository/compare",
+                                          params={"from": base_sha, "to": self.head_sha})
+        except httpx.HTTPStatusError:
+            self.log.warning(f"{base_sha[:8]}와 비교할 수 없어 MR 전체 변경을 리뷰합니다.")
+            return changes
+
+        # target 브랜치를 merge한 커밋 등으로 들어온 MR 밖의 변경은 제외합니다.
+        paths = {change.get("new_path") for change in changes.get("changes", [])}
+        self.log.info(f"{base_sha[:8]}...{self.head_sha[:8]} 사이의 변경 파일만 리뷰합니다.")
+        return {"changes": [diff for diff in compare.get("diffs", []) if diff.get("new_path") in paths]}
+
+    async def get_code(self, file: Dict[str, str]) -> None:
+        return None
 
     async def add_comment(self, comments: list[str]) -> None:
-        comment = "\n\n".join(comments)
-        self.mr.notes.create({'body': comment})
\ No newline at end of file
+        await self.create_comment("\n\n".join(comments))
+
+    @metrics.instrumented("comment")
+    async def create_comment(self, comment: str) -> int:
+        self.log.info("AI 리뷰 코멘트를 GitLab에 등록합니다.")
+        note = await self._request("POST", f"{self._merge_request_path}/notes", json={"body": comment})
+        return note["id"]
+
+    @metrics.instrumented("comment_update")
+    async def update_comment(self, comment_id: int, comment: str) -> None:
+        await self._request("PUT", f"{self._merge_request_path}/notes/{comment_id}", json={"body": comment})
+
+    async def add_review_comment(self, comments: list[str]) -> None:
+        await self.add_comment(comments)
@@ -1,13 +1,35 @@
+import asyncio
+import random
+from typing import Callable, Optional
 from app.logger import get_logger
 from app.config import settings
-from openai import OpenAI
+from app.core import metrics
+from app.core.cache import review_cache
+from app.core.key_pool import KeyLease, openai_keys
+from app.core.planner import ReviewRequest, count_tokens
+from app.core.review import REVIEW_COMMENTS_SCHEMA, ReviewComment, StructuredReviewParser
+
+# 프롬프트 문구를 변경하면 버전을 올려 이전 캐시를 무효화합니다.
+PROMPT_VERSIONS = {
+    "files": "1",
+    "diff": "1",
+    "structured": "2",
+    "diff_batch": "1",
+    "structured_batch": "2",
+}
+
+STRUCTURED_RESPONSE_FORMAT = '{"comments": [{"path": "파일 경로", "line": 10, "body": "리뷰 내용"}]}'
 
 class GPT():
+    backend = "openai"
     log = get_logger("openai")
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEYS)
 
-    async def generate_code_review_by_files(self, old_file_name: str, old_file_code: str, new_file_name: str, new_file_code: str):
-        self.log.info("리뷰 중...")
+    async def generate_code_review_by_files(self,
+                                            old_file_name: str,
+                                            old_file_code: str,
+                                            new_file_name: str,
+                                            new_file_code: str,
+                                            on_delta: Optional[Callable[[str], None]] = None) -> str:
         prompt = "아래 코드를 한국어로 코드리뷰해줘."
         if old_file_name is None:
             prompt += f"""
@@ -34,17 +56,13 @@ class GPT():
             ```
             """
         
-        response = self.openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {'role': 'user', 'content': prompt}
-            ]
-        )
-        self.log.debug(f"prompt {response.usage.prompt_tokens} tokens, completion {response.usage.completion_tokens} tokens: 총 {response.usage.total_tokens} tokens 사용")
-        return response.choices[0].message.content
-
-    async def generate_code_review_by_diff(self, file_name: str, diff: str):
-        self.log.info("리뷰 중...")
+        content = f"{old_file_name}\0{old_file_code}\0{new_file_code}"
+        return await self._review("files", new_file_name, content, prompt, on_delta=on_delta)
+
+    async def generate_code_review_by_diff(self,
+                                           file_name: str,
+                                           diff: str,
+                                           on_delta: Optional[Callable[[str], None]] = None) -> str:
         prompt = f"""
             아래 코드는 특정 파일의 몇 번 라인의 코드가 어떻게 변경되었는지에 대한 내용을 다루고있어.
             해당 내용을 보고 한국어로 코드리뷰해줘.
@@ -56,21 +74,16 @@ class GPT():
             ```
             """
         
-        response = self.openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {'role': 'user', 'content': prompt}
-            ]
-        )
-        self.log.debug(f"prompt {response.usage.prompt_tokens} tokens, completion {response.usage.completion_tokens} tokens: 총 {response.usage.total_tokens} tokens 사용")
-        return response.choices[0].message.content
+        return await self._review("diff", file_name, diff, prompt, on_delta=on_delta)
     
-    async def generate_structor_output_code_review_by_diff(self, file_name: str, diff: str):
-        self.log.info("리뷰 중...")
+    async def generate_structor_output_code_review_by_diff(self,
+                                                           file_name: str,
+                                                           diff: str,
+                                                           on_comment: Optional[Callable[[ReviewComment], None]] = None) -> list[ReviewComment]:
         prompt = f"""
             아래 코드는 특정 파일의 몇 번 라인의 코드가 어떻게 변경되었는지에 대한 내용을 다루고있어.
             내용을 보고 개선할 부분을 분석해서 한국어로 코드리뷰해줘.
-            딱히 개선 포인트가 없으면 없다고해.
+            딱히 개선 포인트가 없으면 `comments`를 빈 배열로 줘.
             
             `{file_name}`
             ```
@@ -78,20 +91,204 @@ class GPT():
             ```
 
             요구사항:
-            1. json형식에 맞게 줄바꿈은 하지말고 한 줄로 응답해줘.
-            2. `path`필드에는 `코드리뷰한 파일`을 주고 `start_line`필드에는 `코드 라인`을 주고 `body`필드에는 `리뷰내용`을 줘.
-            3. `value`값에 대해서 따옴표(')를 포함한다면 따옴표를 백틱으로 대체해.
-            4. `value`값에 대해서 쌍따옴표(")를 포함하고 있다면 쌍따옴표 앞에 역슬래시 두 개만 붙여.
-            5. `value`값에 대해서 백틱을 포함하고 있다면 백틱 앞에는 역슬래시를 붙이지 마.
-            6. `value`값에 대해서 중괄호를 포함하고 있다면 중괄호 앞에 역슬래시를 하나만 붙여.
-            7. 하나의 파일에서 여러 군데 수정이 필요하면 json array 형식으로 줘. 
+            1. `path`필드에는 `코드리뷰한 파일`을 주고 `line`필드에는 변경 후 파일 기준 `코드 라인`을 주고 `body`필드에는 `리뷰내용`을 줘.
+            2. 하나의 파일에서 여러 군데 수정이 필요하면 `comments` 배열에 각각 담아줘.
+            3. 응답 형식: {STRUCTURED_RESPONSE_FORMAT}
             """
         
-        response = self.openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {'role': 'user', 'content': prompt}
-            ]
-        )
-        self.log.debug(f"prompt {response.usage.prompt_tokens} tokens, completion {response.usage.completion_tokens} tokens: 총 {response.usage.total_tokens} tokens 사용")
-        return response.choices[0].message.content
\ No newline at end of file
+        return await self._structured_review("structured", file_name, diff, prompt, on_comment)
+
+    async def generate_code_review_by_request(self,
+                                              request: ReviewRequest,
+                                              on_delta: Optional[Callable[[str], None]] = None) -> str:
+        if len(request.parts) == 1 and request.parts[0].is_whole_file:
+            part = request.parts[0]
+            return await self.generate_code_review_by_diff(file_name=part.file_name, diff=part.diff, on_delta=on_delta)
+
+        prompt = f"""
+            아래 내용은 여러 파일(혹은 한 파일의 일부)의 몇 번 라인의 코드가 어떻게 변경되었는지에 대한 내용을 다루고있어.
+            해당 내용을 보고 파일별로 한국어로 코드리뷰해줘.
+
+            요구사항:
+            1. 각 파일의 리뷰는 `### 파일명` 머리글로 시작하고, 파일명은 아래에 주어진 경로를 그대로 써줘.
+            2. 코드 라인 넘버를 명시하고 어떤 부분에 대한 리뷰인지 한국어로 리뷰해줘.
+            {self._format_parts(request)}
+            """
+
+        return await self._review("diff_batch", "\n".join(request.file_names),
+                                  "\0".join(part.diff for part in request.parts), prompt, on_delta=on_delta)
+
+    async def generate_structor_output_code_review_by_request(self,
+                                                              request: ReviewRequest,
+                                                              on_comment: Optional[Callable[[ReviewComment], None]] = None) -> list[ReviewComment]:
+        if len(request.parts) == 1 and request.parts[0].is_whole_file:
+            part = request.parts[0]
+            return await self.generate_structor_output_code_review_by_diff(file_name=part.file_name, diff=part.diff,
+                                                                           on_comment=on_comment)
+
+        prompt = f"""
+            아래 내용은 여러 파일(혹은 한 파일의 일부)의 몇 번 라인의 코드가 어떻게 변경되었는지에 대한 내용을 다루고있어.
+            내용을 보고 개선할 부분을 분석해서 한국어로 코드리뷰해줘.
+            딱히 개선 포인트가 없으면 `comments`를 빈 배열로 줘.
+            {self._format_parts(request)}
+
+            요구사항:
+            1. `path`필드에는 위에 주어진 `코드리뷰한 파일` 경로를 그대로 주고 `line`필드에는 변경 후 파일 기준 `코드 라인`을 주고 `body`필드에는 `리뷰내용`을 줘.
+            2. 모든 리뷰를 하나의 `comments` 배열에 담아줘.
+            3. 응답 형식: {STRUCTURED_RESPONSE_FORMAT}
+            """
+
+        return await self._structured_review("structured_batch", "\n".join(request.file_names),
+                                             "\0".join(part.diff for part in request.parts), prompt, on_comment)
+
+    def _format_parts(self, request: ReviewRequest) -> str:
+        blocks = []
+        for part in request.parts:
+            title = f"`{part.file_name}`" if part.is_whole_file else f"`{part.file_name}` ({part.part}/{part.parts})"
+            blocks.append(f"{title}\n```\n{part.diff}\n```")
+        return "\n\n".join(blocks)
+
+    async def _structured_review(self,
+                                 template: str,
+                                 file_name: str,
+                                 content: str,
+                                 prompt: str,
+                                 on_comment: Optional[Callable[[ReviewComment], None]] = None) -> list[ReviewComment]:
+        """
+        구조화된 리뷰를 스트리밍으로 요청하고, 코멘트가 완성될 때마다 검증해 `on_comment`로 넘깁니다.
+        """
+        parser = StructuredReviewParser()
+        comments: list[ReviewComment] = []
+
+        def on_delta(text: str) -> None:
+            for comment in parser.feed(text):
+                comments.append(comment)
+                if on_comment:
+                    on_comment(comment)
+
+        await self._review(template, file_name, content, prompt, self._response_format(), on_delta,
+                           cacheable=lambda _: parser.complete)
+        if not parser.complete:
+            self.log.warning(f"리뷰 응답이 완성되지 않았습니다. 완성된 코멘트 {parser.parsed}건만 사용합니다: {file_name}")
+        return comments
+
+    @staticmethod
+    def _response_format() -> dict:
+        if settings.OPENAI_RESPONSE_FORMAT == "json_object":
+            return {"type": "json_object"}
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "code_review", "strict": True, "schema": REVIEW_COMMENTS_SCHEMA},
+        }
+
+    async def _review(self,
+                      template: str,
+                      file_name: str,
+                      content: str,
+                      prompt: str,
+                      response_format: Optional[dict] = None,
+                      on_delta: Optional[Callable[[str], None]] = None,
+                      cacheable: Callable[[str], bool] = bool) -> str:
+        if not settings.REVIEW_CACHE_ENABLED:
+            self.log.info("리뷰 중...")
+            return await self._create_completion(prompt, response_format, on_delta)
+
+        key = review_cache.key(settings.OPENAI_MODEL, f"{template}:{PROMPT_VERSIONS[template]}", file_name, content)
+        review = await review_cache.get(key)
+        if review is not None:
+            self.log.info(f"캐시된 리뷰를 사용합니다: {file_name}")
+            if on_delta:
+                on_delta(review)
+            return review
+
+        self.log.info("리뷰 중...")
+        review = await self._create_completion(prompt, response_format, on_delta)
+        if review and cacheable(review):
+            await review_cache.set(key, review)
+        return review
+
+    @metrics.instrumented("model")
+    async def _create_completion(self,
+                                 prompt: str,
+                                 response_format: Optional[dict] = None,
+                                 on_delta: Optional[Callable[[str], None]] = None) -> str:
+        """
+        키 풀에서 여유가 가장 많은 키로 요청합니다. 429를 받으면 그 키를 쉬게 하고 다른 키로 다시 요청합니다.
+        연결 실패, 타임아웃, 5xx 응답은 지수 백오프 후 다시 요청합니다.
+        """
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+
+        options = {"response_format": response_format} if response_format else {}
+        if on_delta is not None:
+            options.update(stream=True, stream_options={"include_usage": True})
+        estimated_tokens = count_tokens(prompt)
+
+        for attempt in range(1, settings.OPENAI_MAX_ATTEMPTS + 1):
+            lease = await openai_keys.acquire(estimated_tokens)
+            try:
+                raw = await lease.key.client.chat.completions.with_raw_response.create(
+                    model=settings.OPENAI_MODEL,
+                    messages=[
+                        {'role': 'user', 'content': prompt}
+                    ],
+                    **options
+                )
+            except RateLimitError as e:
+                openai_keys.rate_limited(lease, e.response.headers)
+                if attempt == settings.OPENAI_MAX_ATTEMPTS:
+                    raise
+                continue
+            except (APIConnectionError, InternalServerError) as e:
+                # APITimeoutError는 APIConnectionError의 하위 클래스입니다.
+                openai_keys.release(lease)
+                if attempt == settings.OPENAI_MAX_ATTEMPTS:
+                    raise
+                delay = self._backoff(attempt)
+                self.log.warning(f"모델 요청 실패({type(e).__name__}), {delay:.1f}초 후 다시 요청합니다. "
+                                 f"({attempt}/{settings.OPENAI_MAX_ATTEMPTS})")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                openai_keys.release(lease)
+                raise
+
+            try:
+                if on_delta is None:
+                    response = raw.parse()
+                    self._log_usage(response.usage)
+                    openai_keys.release(lease, raw.headers, response.usage.total_tokens if response.usage else None)
+                    return response.choices[0].message.content
+                return await self._read_stream(raw.parse(), on_delta, lease, raw.headers)
+            except BaseException:
+                openai_keys.release(lease, raw.headers)
+                raise
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        delay = min(settings.OPENAI_MAX_RETRY_DELAY, settings.OPENAI_RETRY_DELAY * (2 ** (attempt - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _read_stream(self, stream, on_delta: Callable[[str], None], lease: KeyLease, headers) -> str:
+        # 스트리밍 응답은 받는 대로 `on_delta`에 넘깁니다.
+        chunks = []
+        tokens = None
+        async for chunk in stream:
+            if chunk.usage:
+                self._log_usage(chunk.usage)
+                tokens = chunk.usage.total_tokens
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if getattr(delta, "refusal", None):
+                self.log.warning(f"모델이 응답을 거부했습니다: {delta.refusal}")
+            if delta.content:
+                chunks.append(delta.content)
+                on_delta(delta.content)
+        openai_keys.release(lease, headers, tokens)
+        return "".join(chunks)
+
+    def _log_usage(self, usage) -> None:
+        if usage is None:
+            return
+        metrics.record_tokens(settings.OPENAI_MODEL, usage.prompt_tokens, usage.completion_tokens)
+        self.log.debug(f"prompt {usage.prompt_tokens} tokens, completion {usage.completion_tokens} tokens: 총 {usage.total_tokens} tokens 사용")
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Optional
+from urllib.parse import urlsplit
+import httpx
+from app.config import settings
+from app.logger import get_logger
+
+class HttpClients:
+    """
+    백엔드별로 공유하는 `httpx.AsyncClient` 모음.
+    애플리케이션 lifespan에서 `start()`로 생성/예열하고 `close()`로 정리하며,
+    요청마다 DNS/TCP/TLS 연결을 새로 맺지 않도록 커넥션 풀을 재사용합니다.
+    """
+    log = get_logger("review-bot")
+
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def _backends(self) -> dict[str, tuple[Optional[str], httpx.Timeout]]:
+        return {
+            "upsource": (settings.UPSOURCE_BASE_URL,
+                         self._timeout(settings.UPSOURCE_CONNECT_TIMEOUT, settings.UPSOURCE_READ_TIMEOUT)),
+            "github": (settings.GITHUB_API_URL if settings.CODE_REVIEW_TOOL == "github" else None,
+                       self._timeout(settings.GITHUB_TIMEOUT, settings.GITHUB_TIMEOUT)),
+            "gitlab": (settings.GITLAB_BASE_URL,
+                       self._timeout(settings.GITLAB_CONNECT_TIMEOUT, settings.GITLAB_READ_TIMEOUT)),
+            "webhook": (settings.WEBHOOK_URI,
+                        self._timeout(settings.WEBHOOK_CONNECT_TIMEOUT, settings.WEBHOOK_READ_TIMEOUT)),
+        }
+
+    @staticmethod
+    def _timeout(connect: float, read: float) -> httpx.Timeout:
+        return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+
+    @staticmethod
+    def _http2_enabled() -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            HttpClients.log.warning("h2 패키지가 없어 HTTP/1.1로 연결합니다.")
+            return False
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        backends = self._backends()
+        if name not in backends:
+            raise Exception(f"{name}는 지원되지 않습니다.")
+        _, timeout = backends[name]
+        return httpx.AsyncClient(
+            timeout=timeout,
+            http2=self._http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create(name)
+        return client
+
+    async def start(self) -> None:
+        targets = []
+        for name, (base_url, _) in self._backends().items():
+            if not base_url:
+                continue
+            client = self.get(name)
+            if settings.HTTP_WARMUP:
+                targets.append(self._warm_up(name, client, base_url))
+        await asyncio.gather(*targets)
+
+    async def _warm_up(self, name: str, client: httpx.AsyncClient, url: str) -> None:
+        # 응답 코드와 관계없이 연결(TLS 포함)을 미리 맺어 풀에 넣어둡니다.
+        parts = urlsplit(url)
+        try:
+            await client.head(f"{parts.scheme}://{parts.netloc}/")
+            self.log.info(f"{name} 연결을 예열했습니다: {parts.netloc}")
+        except httpx.HTTPError as e:
+            self.log.warning(f"{name} 연결 예열에 실패했습니다: {e}")
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+http_clients = HttpClients()
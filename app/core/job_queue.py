@@ -0,0 +1,428 @@
+import asyncio
+import json
+import math
+import time
+import traceback
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.config import settings
+from app.core import metrics
+from app.core.storage import SQLiteStore
+from app.logger import get_logger
+
+# 거절 응답의 Retry-After 상한(초)
+MAX_RETRY_AFTER = 300
+
+@dataclass
+class Job:
+    id: int
+    source: str
+    payload: dict
+    attempts: int
+    created_at: float
+    repo: Optional[str] = None
+    kind: str = "review"
+
+@dataclass
+class Delivery:
+    job_id: int
+    status: str
+    duplicate: bool
+    superseded: int = 0
+    # 같은 head를 리뷰하는 대기/처리 중인 작업에 합류했는지 여부
+    joined: bool = False
+
+@dataclass
+class Rejection:
+    status_code: int
+    retry_after: int
+    reason: str
+
+class ReviewQueue(SQLiteStore):
+    """
+    SQLite 기반의 영속 리뷰 작업 큐.
+    webhook 핸들러는 작업을 넣고 바로 응답하며, `ReviewWorkerPool`이 작업을 꺼내 처리합니다.
+    처리 중(`running`)이던 작업은 재시작 시 다시 `pending` 상태로 되돌려 이어서 처리합니다.
+    작업은 처리 중인 작업이 적은 저장소부터 꺼내며, 대기 중인 작업이 한도를 넘으면 `admit()`이 새 리뷰를 거절합니다.
+    작업 종류(`kind`)는 리뷰(`review`)와 알림(`notification`)이며, 알림 작업은 대체되지 않고 별도 워커가 처리합니다.
+    """
+    log = get_logger("review-bot")
+
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at REAL NOT NULL,
+            available_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            review_key TEXT,
+            repo TEXT,
+            kind TEXT NOT NULL DEFAULT 'review',
+            head TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, available_at)",
+        """
+        CREATE TABLE IF NOT EXISTS deliveries (
+            key TEXT PRIMARY KEY,
+            job_id INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS deliveries_created_idx ON deliveries (created_at)",
+    ]
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._available = asyncio.Event()
+        self._running: dict[int, asyncio.Task] = {}
+
+    async def open(self) -> None:
+        await super().open()
+        self.notify()
+
+    def _on_open(self) -> None:
+        columns = {row[1] for row in self._fetchall("PRAGMA table_info(jobs)")}
+        if "review_key" not in columns:
+            self._execute("ALTER TABLE jobs ADD COLUMN review_key TEXT")
+        self._execute("CREATE INDEX IF NOT EXISTS jobs_review_key_idx ON jobs (review_key, status)")
+        if "repo" not in columns:
+            self._execute("ALTER TABLE jobs ADD COLUMN repo TEXT")
+        self._execute("CREATE INDEX IF NOT EXISTS jobs_repo_idx ON jobs (repo, status)")
+        if "kind" not in columns:
+            self._execute("ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'review'")
+        if "head" not in columns:
+            self._execute("ALTER TABLE jobs ADD COLUMN head TEXT")
+        resumed = self._execute(
+            "UPDATE jobs SET status = 'pending', started_at = NULL WHERE status = 'running'"
+        ).rowcount
+        if resumed:
+            self.log.warning(f"완료되지 않은 작업 {resumed}건을 다시 처리합니다.")
+
+    async def enqueue_once(self,
+                           source: str,
+                           payload: dict,
+                           delivery_key: str,
+                           review_key: Optional[str] = None,
+                           repo: Optional[str] = None,
+                           kind: str = "review",
+                           head: Optional[str] = None) -> Delivery:
+        """
+        같은 `delivery_key`로 이미 등록된 작업이 있으면 새 작업을 만들지 않고 기존 작업을 돌려줍니다.
+        대기/처리 중인 작업이면 그 작업에 합류하고, 최종 실패한 작업만 다시 등록합니다.
+
+        `review_key`(PR/MR 단위)가 주어지면 `REVIEW_DEBOUNCE_SECONDS` 동안 기다렸다가 처리합니다.
+        같은 리뷰의 대기/처리 중인 작업이 같은 `head`(또는 새 이벤트의 head를 알 수 없음)이면 그 작업에 합류하고,
+        head가 바뀌었을 때만 이전 작업을 대기 중이면 건너뛰고(`superseded`) 처리 중이면 취소합니다.
+        """
+        delivery, cancelled = await asyncio.to_thread(self._enqueue_once, source, payload, delivery_key,
+                                                      review_key, repo, kind, head)
+        if delivery.joined:
+            self.log.info(f"{review_key}의 같은 head를 리뷰하는 작업에 합류합니다. "
+                          f"(job_id: {delivery.job_id}, status: {delivery.status})")
+            return delivery
+        if delivery.duplicate:
+            self.log.info(f"중복 수신된 {source} 이벤트입니다. (job_id: {delivery.job_id}, status: {delivery.status})")
+            return delivery
+
+        for job_id in cancelled:
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+        if delivery.superseded:
+            self.log.info(f"{review_key}의 이전 작업 {delivery.superseded}건을 새 작업으로 대체합니다. "
+                          f"(처리 중 취소: {len(cancelled)}건)")
+        self.notify()
+        self.log.info(f"{source} {'알림' if kind == 'notification' else '리뷰'} 작업을 큐에 등록했습니다. "
+                      f"(job_id: {delivery.job_id})")
+        return delivery
+
+    def _enqueue_once(self,
+                      source: str,
+                      payload: dict,
+                      delivery_key: str,
+                      review_key: Optional[str],
+                      repo: Optional[str],
+                      kind: str,
+                      head: Optional[str]) -> tuple[Delivery, list[int]]:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM deliveries WHERE created_at < ?",
+                         (now - settings.WEBHOOK_DEDUP_TTL,))
+            row = conn.execute(
+                "SELECT d.job_id, j.status FROM deliveries d LEFT JOIN jobs j ON j.id = d.job_id WHERE d.key = ?",
+                (delivery_key,),
+            ).fetchone()
+            # 보존 기간이 지나 삭제된 작업은 완료된 작업입니다.
+            if row is not None and row[1] != "failed":
+                return Delivery(job_id=row[0], status=row[1] or "done", duplicate=True), []
+
+            superseded, cancelled = 0, []
+            available_at = now
+            if review_key is not None:
+                active = conn.execute(
+                    "SELECT id, status, head FROM jobs WHERE review_key = ? AND status IN ('pending', 'running') "
+                    "ORDER BY id DESC",
+                    (review_key,),
+                ).fetchall()
+                # approve/label 같은 이벤트나 재전송처럼 head가 그대로면 진행 중인 리뷰를 취소하지 않습니다.
+                same = [row for row in active if head is None or row[2] == head]
+                if same:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO deliveries (key, job_id, created_at) VALUES (?, ?, ?)",
+                        (delivery_key, same[0][0], now),
+                    )
+                    return Delivery(job_id=same[0][0], status=same[0][1], duplicate=True, joined=True), []
+
+                rows = conn.execute(
+                    """
+                    UPDATE jobs SET status = 'superseded', finished_at = ?
+                    WHERE review_key = ? AND status IN ('pending', 'running')
+                    RETURNING id, started_at
+                    """,
+                    (now, review_key),
+                ).fetchall()
+                superseded = len(rows)
+                cancelled = [job_id for job_id, started_at in rows if started_at is not None]
+                available_at = now + settings.REVIEW_DEBOUNCE_SECONDS
+
+            job_id = conn.execute(
+                "INSERT INTO jobs (source, payload, created_at, available_at, review_key, repo, kind, head) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, json.dumps(payload, ensure_ascii=False), now, available_at, review_key, repo, kind, head),
+            ).lastrowid
+            conn.execute(
+                "INSERT OR REPLACE INTO deliveries (key, job_id, created_at) VALUES (?, ?, ?)",
+                (delivery_key, job_id, now),
+            )
+        return Delivery(job_id=job_id, status="pending", duplicate=False, superseded=superseded), cancelled
+
+    async def admit(self, repo: Optional[str]) -> Optional[Rejection]:
+        """
+        대기 중인 작업이 `REVIEW_BACKLOG_LIMIT`(전체, 503) 또는 `REVIEW_REPO_BACKLOG_LIMIT`(저장소별, 429)를 넘으면
+        최근 작업 처리 시간으로 계산한 Retry-After와 함께 거절 사유를 반환합니다.
+        """
+        return await asyncio.to_thread(self._admit, repo)
+
+    def _admit(self, repo: Optional[str]) -> Optional[Rejection]:
+        now = time.time()
+        pending, repo_pending = self._fetchone(
+            "SELECT COUNT(*), COALESCE(SUM(repo IS ?), 0) FROM jobs WHERE status = 'pending' AND kind = 'review'",
+            (repo,),
+        )
+        if pending < settings.REVIEW_BACKLOG_LIMIT and repo_pending < settings.REVIEW_REPO_BACKLOG_LIMIT:
+            return None
+
+        duration = self._fetchone(
+            "SELECT AVG(finished_at - started_at) FROM jobs WHERE status = 'done' AND kind = 'review' AND finished_at > ?",
+            (now - 3600,),
+        )[0] or settings.REVIEW_QUEUE_POLL_INTERVAL
+        if pending >= settings.REVIEW_BACKLOG_LIMIT:
+            status_code, backlog = 503, pending - settings.REVIEW_BACKLOG_LIMIT + 1
+            reason = f"대기 중인 리뷰 작업이 {pending}건으로 한도({settings.REVIEW_BACKLOG_LIMIT}) 이상입니다."
+        else:
+            status_code, backlog = 429, repo_pending - settings.REVIEW_REPO_BACKLOG_LIMIT + 1
+            reason = f"{repo}의 대기 중인 리뷰 작업이 {repo_pending}건으로 한도({settings.REVIEW_REPO_BACKLOG_LIMIT}) 이상입니다."
+        # 한도 아래로 내려갈 때까지 걸릴 것으로 예상되는 시간
+        retry_after = math.ceil(backlog * duration / max(1, settings.REVIEW_WORKERS))
+        return Rejection(status_code=status_code, retry_after=min(max(retry_after, 1), MAX_RETRY_AFTER), reason=reason)
+
+    async def get_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = await self.fetchone(
+            "SELECT source, kind, status, attempts, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if row is None:
+            return None
+        source, kind, status, attempts, error, created_at, started_at, finished_at = row
+        return {
+            "job_id": job_id,
+            "source": source,
+            "kind": kind,
+            "status": status,
+            "attempts": attempts,
+            "error": error,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+
+    async def claim(self, kind: str = "review") -> Optional[Job]:
+        return await asyncio.to_thread(self._claim, kind)
+
+    def _claim(self, kind: str) -> Optional[Job]:
+        now = time.time()
+        # 처리 중인 작업이 적은 저장소의 작업부터 꺼내 한 저장소가 워커를 모두 차지하지 않게 합니다.
+        row = self._fetchone(
+            """
+            UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM jobs AS pending WHERE status = 'pending' AND kind = ? AND available_at <= ?
+                ORDER BY (SELECT COUNT(*) FROM jobs AS running
+                          WHERE running.repo IS pending.repo AND running.kind = pending.kind
+                            AND running.status = 'running'),
+                         available_at, id
+                LIMIT 1
+            )
+            RETURNING id, source, payload, attempts, created_at, repo, kind
+            """,
+            (now, kind, now),
+        )
+        if row is None:
+            return None
+        return Job(id=row[0], source=row[1], payload=json.loads(row[2]), attempts=row[3], created_at=row[4],
+                   repo=row[5], kind=row[6])
+
+    async def complete(self, job: Job) -> None:
+        now = time.time()
+        await self.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ?, error = NULL WHERE id = ? AND status = 'running'",
+            (now, job.id),
+        )
+        await self.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'superseded') AND finished_at < ?",
+            (now - settings.REVIEW_QUEUE_RETENTION_SECONDS,),
+        )
+
+    async def fail(self, job: Job, error: str) -> None:
+        now = time.time()
+        if job.attempts < settings.REVIEW_QUEUE_MAX_ATTEMPTS:
+            delay = settings.REVIEW_QUEUE_RETRY_DELAY * (2 ** (job.attempts - 1))
+            await self.execute(
+                "UPDATE jobs SET status = 'pending', error = ?, started_at = NULL, available_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (error, now + delay, job.id),
+            )
+            self.log.warning(f"작업 {job.id} 실패({job.attempts}회), {delay:.0f}초 후 재시도합니다: {error}")
+        else:
+            await self.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+                (error, now, job.id),
+            )
+            self.log.error(f"작업 {job.id}이 {job.attempts}회 실패하여 중단합니다: {error}")
+
+    async def run(self, job: Job, handler: Callable[[dict], Awaitable[None]]) -> bool:
+        """
+        작업을 추적 가능한 task로 실행합니다.
+        새 작업으로 대체되어 취소되면 False를, 정상 완료되면 True를 반환합니다.
+        """
+        task = asyncio.create_task(handler(job.payload), name=f"review-job-{job.id}")
+        self._running[job.id] = task
+        try:
+            await asyncio.wait([task])
+        finally:
+            self._running.pop(job.id, None)
+            if not task.done():
+                task.cancel()
+        if task.cancelled():
+            return False
+        task.result()
+        return True
+
+    def notify(self) -> None:
+        self._available.set()
+
+    async def wait_available(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._available.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._available.clear()
+
+    async def stats(self) -> Dict[str, Any]:
+        rows = await self.fetchall("SELECT status, COUNT(*), MIN(created_at) FROM jobs GROUP BY status")
+        repo_rows = await self.fetchall(
+            "SELECT repo, status, COUNT(*), MIN(created_at) FROM jobs "
+            "WHERE status IN ('pending', 'running') AND kind = 'review' GROUP BY repo, status"
+        )
+        now = time.time()
+        counts = {status: count for status, count, _ in rows}
+        oldest = {status: created_at for status, _, created_at in rows}
+        repos: Dict[str, Dict[str, Any]] = {}
+        for repo, status, count, created_at in repo_rows:
+            entry = repos.setdefault(repo or "unknown", {"pending": 0, "running": 0, "oldest_pending_age": None})
+            entry[status] = count
+            if status == "pending":
+                entry["oldest_pending_age"] = round(now - created_at, 3)
+        return {
+            "depth": counts.get("pending", 0) + counts.get("running", 0),
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "failed": counts.get("failed", 0),
+            "superseded": counts.get("superseded", 0),
+            "oldest_pending_age": round(now - oldest["pending"], 3) if "pending" in oldest else None,
+            "oldest_running_age": round(now - oldest["running"], 3) if "running" in oldest else None,
+            "repos": repos,
+        }
+
+class ReviewWorkerPool:
+    """
+    `ReviewQueue`에서 `kind` 종류의 작업을 꺼내 `source`별 처리 함수로 실행하는 비동기 워커 풀.
+    """
+    log = get_logger("review-bot")
+
+    def __init__(self,
+                 queue: ReviewQueue,
+                 handlers: Dict[str, Callable[[dict], Awaitable[None]]],
+                 size: int,
+                 kind: str = "review"):
+        self.queue = queue
+        self.handlers = handlers
+        self.size = size
+        self.kind = kind
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._run(i), name=f"{self.kind}-worker-{i}") for i in range(self.size)]
+        self.log.info(f"{self.kind} 워커 {self.size}개를 시작합니다.")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        self.queue.notify()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while not self._stopping:
+            job = await self.queue.claim(self.kind)
+            if job is None:
+                await self.queue.wait_available(timeout=settings.REVIEW_QUEUE_POLL_INTERVAL)
+                continue
+
+            handler = self.handlers.get(job.source)
+            if handler is None:
+                await self.queue.fail(job, f"{job.source}는 지원되지 않습니다.")
+                continue
+
+            waited = time.time() - job.created_at
+            if job.kind == "review":
+                metrics.record_queue_wait(job.repo, waited)
+            self.log.info(f"[{self.kind}-worker-{index}] 작업 {job.id} 처리 시작 (대기 {waited:.1f}초)")
+            try:
+                with metrics.review(job.source) if job.kind == "review" else nullcontext():
+                    finished = await self.queue.run(job, handler)
+            except Exception as e:
+                self.log.error(f"[{self.kind}-worker-{index}] 작업 {job.id} 처리 중 오류 발생: {e}")
+                traceback.print_exc()
+                await self.queue.fail(job, str(e))
+            else:
+                if finished:
+                    await self.queue.complete(job)
+                else:
+                    self.log.info(f"[{self.kind}-worker-{index}] 작업 {job.id}이 새 작업으로 대체되어 취소되었습니다.")
+
+review_queue = ReviewQueue(settings.REVIEW_QUEUE_PATH)
@@ -0,0 +1,211 @@
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
+from app.config import settings
+from app.logger import get_logger
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+WINDOW_SECONDS = 60.0
+RESET_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    `x-ratelimit-reset-*` 헤더(예: `1s`, `6m0s`, `20ms`)를 초 단위로 바꿉니다.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+    if not parts:
+        return None
+    return sum(float(amount) * RESET_UNITS[unit] for amount, unit in parts)
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+class ApiKey:
+    """
+    API 키 하나의 클라이언트와 사용량.
+    최근 `WINDOW_SECONDS` 동안의 요청/토큰 수와 응답 헤더의 rate limit 정보를 함께 기록합니다.
+    """
+    def __init__(self, key: str, client: Optional['AsyncOpenAI'] = None):
+        self.key = key
+        # 처음 요청할 때 `ApiKeyPool.connect()`에서 만듭니다.
+        self.client = client
+        # [요청 시각, 토큰 수] (토큰 수는 응답을 받으면 실제 사용량으로 바뀝니다)
+        self.window: deque[list[float]] = deque()
+        self.limit_requests: Optional[int] = None
+        self.limit_tokens: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.remaining_until = 0.0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.rate_limited = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.key[:3]}...{self.key[-4:]}"
+
+    def _trim(self, now: float) -> None:
+        while self.window and self.window[0][0] <= now - WINDOW_SECONDS:
+            self.window.popleft()
+
+    def usage(self, now: float) -> tuple[int, int]:
+        self._trim(now)
+        return len(self.window), int(sum(tokens for _, tokens in self.window))
+
+    def headroom(self, now: float) -> float:
+        """
+        남은 요청/토큰 한도의 비율(0~1) 중 작은 값. 응답 헤더의 남은 한도가 유효하면 함께 반영합니다.
+        """
+        requests, tokens = self.usage(now)
+        limit_requests = self.limit_requests or settings.OPENAI_KEY_RPM
+        limit_tokens = self.limit_tokens or settings.OPENAI_KEY_TPM
+        request_headroom = 1 - requests / limit_requests
+        token_headroom = 1 - tokens / limit_tokens
+        if now < self.remaining_until:
+            if self.remaining_requests is not None:
+                request_headroom = min(request_headroom, self.remaining_requests / limit_requests)
+            if self.remaining_tokens is not None:
+                token_headroom = min(token_headroom, self.remaining_tokens / limit_tokens)
+        return min(request_headroom, token_headroom)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        requests, tokens = self.usage(now)
+        return {
+            "key": self.name,
+            "requests_per_minute": requests,
+            "tokens_per_minute": tokens,
+            "limit_requests": self.limit_requests,
+            "limit_tokens": self.limit_tokens,
+            "remaining_requests": self.remaining_requests if now < self.remaining_until else None,
+            "remaining_tokens": self.remaining_tokens if now < self.remaining_until else None,
+            "utilization": round(1 - self.headroom(now), 3),
+            "in_flight": self.in_flight,
+            "cooldown": round(max(0.0, self.cooldown_until - now), 3),
+            "total_requests": self.total_requests,
+            "total_tokens": self.total_tokens,
+            "rate_limited": self.rate_limited,
+        }
+
+@dataclass
+class KeyLease:
+    key: ApiKey
+    # key.window에 기록된 이번 요청의 [요청 시각, 토큰 수]
+    usage: list[float]
+
+class ApiKeyPool:
+    """
+    `OPENAI_API_KEYS`(쉼표로 구분)의 키들로 요청을 나누는 키 풀.
+    요청마다 남은 한도(headroom)가 가장 큰 키를 고르고, 429를 받은 키는 reset 시간 동안 쉬게 합니다.
+    """
+    log = get_logger("openai")
+
+    def __init__(self, keys: list[str]):
+        if not keys:
+            raise Exception("OPENAI_API_KEYS가 설정되지 않았습니다.")
+        self.keys = [ApiKey(key) for key in keys]
+        self._connected = False
+
+    def connect(self) -> None:
+        """
+        키별 클라이언트를 만듭니다. openai 패키지는 import 비용이 커서 첫 요청 때 불러옵니다.
+        """
+        if self._connected:
+            return
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        # 모든 키가 하나의 커넥션 풀을 공유합니다.
+        http_client = DefaultAsyncHttpxClient()
+        for key in self.keys:
+            if key.client is None:
+                key.client = AsyncOpenAI(api_key=key.key, base_url=settings.OPENAI_BASE_URL,
+                                         http_client=http_client, max_retries=0)
+        self._connected = True
+
+    @staticmethod
+    def parse(value: str) -> list[str]:
+        return list(dict.fromkeys(key.strip() for key in re.split(r"[,\s]+", value) if key.strip()))
+
+    async def acquire(self, estimated_tokens: int) -> KeyLease:
+        """
+        사용할 키를 고릅니다. 모든 키가 쉬는 중이면 가장 먼저 풀리는 키를 기다립니다.
+        """
+        self.connect()
+        while True:
+            now = time.monotonic()
+            available = [key for key in self.keys if key.cooldown_until <= now]
+            if available:
+                key = max(available, key=lambda key: (key.headroom(now), -key.in_flight))
+                usage = [now, estimated_tokens]
+                key.window.append(usage)
+                key.in_flight += 1
+                key.total_requests += 1
+                return KeyLease(key=key, usage=usage)
+
+            wait = min(key.cooldown_until for key in self.keys) - now
+            self.log.warning(f"모든 OpenAI API 키가 rate limit 상태입니다. {wait:.1f}초 후 다시 시도합니다.")
+            await asyncio.sleep(wait)
+
+    def release(self, lease: KeyLease, headers: Optional[Mapping[str, str]] = None, tokens: Optional[int] = None) -> None:
+        """
+        응답을 받은 뒤 헤더의 rate limit 정보와 실제 토큰 사용량을 기록합니다.
+        """
+        key = lease.key
+        key.in_flight = max(0, key.in_flight - 1)
+        if tokens is not None:
+            key.total_tokens += tokens
+            lease.usage[1] = tokens
+        if headers:
+            self._update_limits(key, headers)
+
+    def rate_limited(self, lease: KeyLease, headers: Mapping[str, str]) -> float:
+        """
+        429를 받은 키를 reset 시간(`retry-after` 또는 `x-ratelimit-reset-*`) 동안 제외합니다.
+        """
+        key = lease.key
+        key.in_flight = max(0, key.in_flight - 1)
+        key.rate_limited += 1
+        # 거절된 요청은 토큰을 사용하지 않습니다.
+        lease.usage[1] = 0
+        self._update_limits(key, headers)
+        delay = (parse_reset(headers.get("retry-after"))
+                 or max(parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                        parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+                 or settings.OPENAI_KEY_COOLDOWN)
+        key.cooldown_until = time.monotonic() + delay
+        self.log.warning(f"OpenAI API 키 {key.name}가 rate limit에 걸려 {delay:.1f}초 동안 제외합니다.")
+        return delay
+
+    def _update_limits(self, key: ApiKey, headers: Mapping[str, str]) -> None:
+        key.limit_requests = _int_header(headers, "x-ratelimit-limit-requests") or key.limit_requests
+        key.limit_tokens = _int_header(headers, "x-ratelimit-limit-tokens") or key.limit_tokens
+        remaining_requests = _int_header(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _int_header(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests is None and remaining_tokens is None:
+            return
+        key.remaining_requests = remaining_requests
+        key.remaining_tokens = remaining_tokens
+        reset = max(parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                    parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+        key.remaining_until = time.monotonic() + (reset or WINDOW_SECONDS)
+
+    def stats(self) -> list[Dict[str, Any]]:
+        now = time.monotonic()
+        return [key.stats(now) for key in self.keys]
+
+openai_keys = ApiKeyPool(ApiKeyPool.parse(settings.OPENAI_API_KEYS))
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from typing import Any, Callable, Optional
+from app.core.service import CodeReviewTool
+from app.logger import get_logger
+
+class LiveComment:
+    """
+    스트리밍으로 받는 리뷰를 하나의 코멘트로 먼저 등록하고, 같은 코멘트를 수정해가며 채웁니다.
+    코멘트 수정은 `interval`초에 한 번으로 제한하며, `finish()`에서 최종 리뷰로 교체합니다.
+    `enabled`가 False이면 스트리밍 없이 `finish()`에서 한 번만 등록합니다.
+    `finish()` 전에 중단되면(새 커밋으로 대체, 종료, 오류) 작성 중이던 코멘트를 중단 안내로 마무리합니다.
+    """
+    log = get_logger("review-bot")
+
+    def __init__(self, tool: CodeReviewTool, interval: float, enabled: bool = True, started_at: Optional[float] = None):
+        self.tool = tool
+        self.interval = interval
+        self.enabled = enabled
+        self.started_at = started_at or time.monotonic()
+        self.sections: dict[int, str] = {}
+        self._comment_id: Any = None
+        self._posted: Optional[str] = None
+        self._last_push = float("-inf")
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'LiveComment':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if exc_type is not None:
+            if issubclass(exc_type, asyncio.CancelledError):
+                note = "_리뷰가 새 커밋으로 대체되었거나 서버가 종료되어 중단되었습니다._"
+            else:
+                note = "_리뷰 중 오류가 발생해 중단되었습니다. 다시 시도하면 새 코멘트로 등록됩니다._"
+            try:
+                await asyncio.shield(self._abort(note))
+            except Exception as e:
+                self.log.warning(f"중단된 리뷰 코멘트를 정리하지 못했습니다: {e}")
+
+    def on_delta(self, index: int) -> Optional[Callable[[str], None]]:
+        """
+        `index`번째 리뷰의 응답 조각을 받는 콜백을 반환합니다. 스트리밍을 사용하지 않으면 None 입니다.
+        """
+        if not self.enabled:
+            return None
+
+        def append(text: str) -> None:
+            self.sections[index] = self.sections.get(index, "") + text
+            self._dirty = True
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._flush_loop())
+
+        return append
+
+    def render(self, partial: bool) -> str:
+        text = "\n\n".join(self.sections[index].strip() for index in sorted(self.sections) if self.sections[index].strip())
+        return f"{text}\n\n_리뷰 작성 중..._" if partial and text else text
+
+    async def finish(self, comment: str) -> None:
+        """
+        최종 리뷰로 코멘트를 교체합니다. 최종 리뷰가 비어 있으면 그동안 받은 내용을 그대로 남깁니다.
+        """
+        self._dirty = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        comment = comment or self.render(partial=False)
+        if comment:
+            await asyncio.shield(self._push(comment))
+
+    async def _flush_loop(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(max(0.0, self._last_push + self.interval - time.monotonic()))
+            self._dirty = False
+            try:
+                # 취소되더라도 진행 중인 등록/수정은 끝까지 마쳐 코멘트가 중복 등록되지 않게 합니다.
+                await asyncio.shield(self._push(self.render(partial=True)))
+            except Exception as e:
+                self.log.warning(f"작성 중인 리뷰 코멘트를 갱신하지 못했습니다: {e}")
+
+    async def _abort(self, note: str) -> None:
+        async with self._lock:
+            if self._comment_id is None:
+                return
+            text = self.render(partial=False)
+            await self.tool.update_comment(self._comment_id, f"{text}\n\n{note}" if text else note)
+            self._posted = None
+
+    async def _push(self, comment: str) -> None:
+        async with self._lock:
+            if comment == self._posted:
+                return
+            if self._comment_id is None:
+                self._comment_id = await self.tool.create_comment(comment)
+                self.log.info(f"첫 리뷰 코멘트를 {time.monotonic() - self.started_at:.1f}초 만에 등록했습니다.")
+            else:
+                await self.tool.update_comment(self._comment_id, comment)
+            self._posted = comment
+            self._last_push = time.monotonic()
@@ -0,0 +1,119 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, Optional, TypeVar
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+WEBHOOK_LATENCY = Histogram("review_bot_webhook_seconds",
+                            "webhook 요청 처리 시간",
+                            ["source"], buckets=LATENCY_BUCKETS)
+STAGE_LATENCY = Histogram("review_bot_stage_seconds",
+                          "리뷰 단계별 처리 시간",
+                          ["backend", "stage"], buckets=LATENCY_BUCKETS)
+REVIEW_LATENCY = Histogram("review_bot_review_seconds",
+                           "리뷰 작업 전체 처리 시간",
+                           ["source"], buckets=LATENCY_BUCKETS)
+TOKENS = Counter("review_bot_tokens",
+                 "모델 호출에 사용한 토큰 수",
+                 ["model", "repo", "kind"])
+TOKENS_SAVED = Counter("review_bot_tokens_saved",
+                       "모델 호출 전에 줄인 토큰 수",
+                       ["repo", "stage"])
+REVIEWS_IN_FLIGHT = Gauge("review_bot_reviews_in_flight",
+                          "처리 중인 리뷰 작업 수",
+                          ["source"])
+QUEUE_WAIT = Histogram("review_bot_queue_wait_seconds",
+                       "리뷰 작업이 큐에서 워커에 배정되기까지 기다린 시간",
+                       ["repo"], buckets=LATENCY_BUCKETS)
+SCHEDULE_WAIT = Histogram("review_bot_schedule_wait_seconds",
+                          "리뷰 요청이 모델 호출 슬롯을 배정받기까지 기다린 시간",
+                          ["repo"], buckets=LATENCY_BUCKETS)
+WEBHOOKS_REJECTED = Counter("review_bot_webhooks_rejected",
+                            "backlog가 한도를 넘어 거절한 webhook 수",
+                            ["source", "status"])
+ERRORS = Counter("review_bot_errors",
+                 "백엔드별 오류 수",
+                 ["backend", "stage"])
+
+# 현재 처리 중인 리뷰의 저장소 (토큰 사용량 집계에 사용)
+current_repo: ContextVar[str] = ContextVar("current_repo", default="unknown")
+
+def bind_repo(repo: Optional[str]) -> None:
+    """
+    현재 task(와 이후 생성되는 하위 task)에서 기록하는 지표의 저장소를 지정합니다.
+    """
+    current_repo.set(str(repo or "unknown"))
+
+@contextmanager
+def stage(backend: str, name: str) -> Iterator[None]:
+    """
+    `backend`의 `name` 단계 처리 시간을 기록하고, 예외가 발생하면 오류 수를 올립니다.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(backend=backend, stage=name).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(backend=backend, stage=name).observe(time.perf_counter() - started)
+
+def instrumented(name: str) -> Callable[[F], F]:
+    """
+    어댑터의 비동기 메서드를 `stage()`로 감쌉니다. backend 이름은 인스턴스의 `backend` 속성을 사용합니다.
+    """
+    def decorator(method: F) -> F:
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            with stage(getattr(self, "backend", type(self).__name__.lower()), name):
+                return await method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def webhook(source: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        WEBHOOK_LATENCY.labels(source=source).observe(time.perf_counter() - started)
+
+@contextmanager
+def review(source: str) -> Iterator[None]:
+    gauge = REVIEWS_IN_FLIGHT.labels(source=source)
+    gauge.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        gauge.dec()
+        REVIEW_LATENCY.labels(source=source).observe(time.perf_counter() - started)
+
+def record_tokens(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    repo = current_repo.get()
+    TOKENS.labels(model=model, repo=repo, kind="prompt").inc(prompt_tokens)
+    TOKENS.labels(model=model, repo=repo, kind="completion").inc(completion_tokens)
+
+def record_tokens_saved(stage: str, tokens: int) -> None:
+    if tokens > 0:
+        TOKENS_SAVED.labels(repo=current_repo.get(), stage=stage).inc(tokens)
+
+def record_queue_wait(repo: Optional[str], seconds: float) -> None:
+    QUEUE_WAIT.labels(repo=str(repo or "unknown")).observe(seconds)
+
+def record_schedule_wait(repo: str, seconds: float) -> None:
+    SCHEDULE_WAIT.labels(repo=repo).observe(seconds)
+
+def record_rejected(source: str, status: int) -> None:
+    WEBHOOKS_REJECTED.labels(source=source, status=str(status)).inc()
+
+def record_error(backend: str, name: str) -> None:
+    ERRORS.labels(backend=backend, stage=name).inc()
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,9 +1,12 @@
+from dataclasses import dataclass
 from enum import Enum, auto
 from typing import Any, Dict, List, Optional
 from app.config import settings
+from app.core.events import Event, GithubEvent, GitlabEvent, UpsourceEvent
 
 class EventType(Enum):
     CREATED_REVIEW = auto()
+    UPDATED_REVIEW = auto()
     CHANGED_REVIEW_STATE = auto()
     CHANGED_REVIEWER_STATE = auto()
     CREATED_COMMENT = auto()
@@ -18,80 +21,112 @@ class EventType(Enum):
 EVENT_TYPE_MAPPING = {
     'ReviewCreatedFeedEventBean': EventType.CREATED_REVIEW,
     'merge_request': EventType.CREATED_REVIEW,
+    'merge_request_update': EventType.UPDATED_REVIEW,
+    'RevisionAddedToReviewFeedEventBean': EventType.UPDATED_REVIEW,
     'ReviewStateChangedFeedEventBean': EventType.CHANGED_REVIEW_STATE,
     'ParticipantStateChangedFeedEventBean': EventType.CHANGED_REVIEWER_STATE,
     'DiscussionFeedEventBean': EventType.CREATED_COMMENT,
     'pr': EventType.CREATED_REVIEW,
+    'pr_update': EventType.UPDATED_REVIEW,
     'comment': EventType.CREATED_COMMENT,
 }
 
-class WebhookMessage():
-    def __init__(self,
-                 title: str,
-                 project_name: str,
-                 event_type: EventType,
-                 actor_name: str,
-                 reviewers: list[str],
-                 review_id: str,
-                 old_state: Optional[str] = None,
-                 new_state: Optional[str] = None,
-                 comment: Optional[str] = None,
-                 url: Optional[str] = None,
-                 ):
-        self.title = title
-        self.project_name = project_name
-        self.event_type = event_type
-        self.actor_name = actor_name
-        self.reviewers = reviewers
-        self.review_id = review_id
-        self.old_state = old_state
-        self.new_state = new_state
-        self.comment = comment
-        self.url = url
+# 코드 리뷰를 수행하는 이벤트
+REVIEW_EVENT_TYPES = (EventType.CREATED_REVIEW, EventType.UPDATED_REVIEW)
 
-    async def from_upsource(upsource_event: dict, title: str) -> 'WebhookMessage' :
+def get_github_event_type(github_event: GithubEvent) -> str:
+    if github_event.action in ('opened', 'reopened') and github_event.pull_request:
+        return 'pr'
+    elif github_event.action == 'synchronize' and github_event.pull_request:
+        return 'pr_update'
+    elif github_event.action in ('created', 'submitted') and github_event.comment:
+        return 'comment'
+    return 'none'
+
+def get_gitlab_event_type(gitlab_event: GitlabEvent) -> str:
+    attributes = gitlab_event.object_attributes
+    # 새 커밋이 push된 MR update 이벤트에만 oldrev가 포함됩니다.
+    if gitlab_event.event_type == 'merge_request' and attributes.action == 'update' and attributes.oldrev:
+        return 'merge_request_update'
+    return gitlab_event.event_type
+
+def get_event_type(source: str, event: Event) -> 'EventType':
+    if source == 'github':
+        return EventType.get_type(get_github_event_type(event))
+    if source == 'gitlab':
+        return EventType.get_type(get_gitlab_event_type(event))
+    if source == 'upsource':
+        return EventType.get_type(event.data_type)
+    raise Exception(f"{source}는 지원되지 않습니다.")
+
+def get_repo_name(source: str, event: Event) -> str:
+    if source == 'github':
+        return event.repository.full_name
+    if source == 'gitlab':
+        return event.project.path_with_namespace or str(event.project.id)
+    if source == 'upsource':
+        return event.project_id
+    raise Exception(f"{source}는 지원되지 않습니다.")
+
+@dataclass(slots=True)
+class WebhookMessage:
+    title: str
+    project_name: str
+    event_type: EventType
+    actor_name: str
+    reviewers: str
+    review_id: str
+    old_state: Optional[str] = None
+    new_state: Optional[str] = None
+    comment: Optional[str] = None
+    url: Optional[str] = None
+
+    @staticmethod
+    async def from_upsource(upsource_event: UpsourceEvent, title: str) -> 'WebhookMessage' :
+        base = upsource_event.data.base
         return WebhookMessage(title = title,
-                              project_name=upsource_event['projectId'],
-                              event_type = EventType.get_type(upsource_event['dataType']),
-                              actor_name = upsource_event['data']['base']['actor']['userName'],
-                              reviewers = ', '.join(user.get('userName', '') for user in upsource_event['data']['base'].get('userIds', [])),
-                              review_id = upsource_event['data']['base']['reviewId'],
-                              old_state = upsource_event['data'].get('oldState', None),
-                              new_state = upsource_event['data'].get('newState', None),
-                              comment = upsource_event['data'].get('commentText', None),
-                              url = f"{settings.UPSOURCE_BASE_URL}/{upsource_event['projectId']}/review/{upsource_event['data']['base']['reviewId']}")
-    
-    async def from_gitlab(gitlab_event: dict) -> 'WebhookMessage' :
+                              project_name=upsource_event.project_id,
+                              event_type = EventType.get_type(upsource_event.data_type),
+                              actor_name = base.actor.user_name,
+                              reviewers = ', '.join(user.user_name for user in base.user_ids),
+                              review_id = base.review_id,
+                              old_state = upsource_event.data.old_state,
+                              new_state = upsource_event.data.new_state,
+                              comment = upsource_event.data.comment_text,
+                              url = f"{settings.UPSOURCE_BASE_URL}/{upsource_event.project_id}/review/{base.review_id}")
+
+    @staticmethod
+    async def from_gitlab(gitlab_event: GitlabEvent) -> 'WebhookMessage' :
+        attributes = gitlab_event.object_attributes
         # TODO: MR 외 title
-        return WebhookMessage(title=f"{gitlab_event['object_attributes']['source_branch']} into {gitlab_event['object_attributes']['target_branch']}",
-                              project_name=gitlab_event['project']['name'],
-                              event_type = EventType.get_type(gitlab_event['event_type']),
+        return WebhookMessage(title=f"{attributes.source_branch} into {attributes.target_branch}",
+                              project_name=gitlab_event.project.name,
+                              event_type = EventType.get_type(get_gitlab_event_type(gitlab_event)),
                               # TODO: gitlab_event['user']['username']??
-                              actor_name = gitlab_event['user']['name'],
+                              actor_name = gitlab_event.user.name,
                               # TODO: gitlab_event['reviewers']['username']??
-                              reviewers = ', '.join(user.get('name', '') for user in gitlab_event.get('reviewers',[])),
-                              review_id = gitlab_event['object_attributes']['iid'],
-                              new_state = gitlab_event['object_attributes'].get('action', None),
-                              comment = gitlab_event.get('commit', {}).get('message', None),
-                              url=gitlab_event.get('object_attributes', {}).get('url', settings.GITLAB_BASE_URL))
-    
-    async def from_github(github_event: dict, review_details: List[Dict[str, Any]]) -> 'WebhookMessage' :
-        if (github_event['action'] == 'opened' or github_event['action'] == 'reopened') and github_event['pull_request']:
-            event_type = 'pr'
-            url = github_event['pull_request']['html_url']
-        elif (github_event['action'] == 'created' or github_event['action'] == 'submitted') and github_event.get('comment', None):
-            event_type = 'comment'
-            url = github_event['comment']['html_url']
+                              reviewers = ', '.join(user.name for user in gitlab_event.reviewers),
+                              review_id = attributes.iid,
+                              new_state = attributes.action,
+                              comment = gitlab_event.commit.message if gitlab_event.commit else None,
+                              url=attributes.url or settings.GITLAB_BASE_URL)
+
+    @staticmethod
+    async def from_github(github_event: GithubEvent, review_details: List[Dict[str, Any]]) -> 'WebhookMessage' :
+        event_type = get_github_event_type(github_event)
+        if event_type in ('pr', 'pr_update'):
+            url = github_event.pull_request.html_url
+        elif event_type == 'comment':
+            url = github_event.comment.html_url
         else:
-            event_type = 'none'
-            url = github_event['repository']['html_url']
+            url = github_event.repository.html_url
 
-        return WebhookMessage(title=f"{github_event['repository']['full_name']}",
-                              project_name=github_event['repository']['name'],
+        return WebhookMessage(title=f"{github_event.repository.full_name}",
+                              project_name=github_event.repository.name,
                               event_type = EventType.get_type(event_type),
-                              actor_name = github_event['sender']['login'],
+                              actor_name = github_event.sender.login,
                               reviewers = ', '.join(review_detail.get('member_name', '') for review_detail in review_details),
-                              review_id = github_event.get('pull_request', {}).get('id', "#0"),
-                              new_state = github_event.get('action', None),
-                              comment = github_event.get('comment', {}).get('body', None),
-                              url=url)
\ No newline at end of file
+                              review_id = github_event.pull_request.id if github_event.pull_request else "#0",
+                              new_state = github_event.action,
+                              comment = github_event.comment.body if github_event.comment else None,
+                              url=url)
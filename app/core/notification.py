@@ -1,60 +1,114 @@
-from discord_webhook.webhook import DiscordWebhook
-import slack_webhook
-import httpx
+from typing import Any, Dict
+from app.core import metrics
+from app.core.model import WebhookMessage
 from app.core.service import Webhook
 
+# Discord 메시지 하나에 넣을 수 있는 embed 수와 field 값의 최대 길이
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_FIELD_LENGTH = 1024
+
 class GoogleChat(Webhook):
+    backend = "google-chat"
+
+    @metrics.instrumented("notification")
     async def send_message(self):
         self.log.info(f"google chat 알림 발송 중...{self.uri}")
-        message = self._get_message(self.message_format)
+        await self._post(self._get_message(self.message_format), self.message_format.review_id)
+
+    @metrics.instrumented("notification")
+    async def send_digest(self, messages: list[WebhookMessage]):
+        self.log.info(f"google chat 알림 {len(messages)}건 묶음 발송 중...{self.uri}")
+        await self._post(self._get_digest_message(messages), messages[-1].review_id)
+
+    def split_digest(self, messages: list[WebhookMessage]) -> list[list[WebhookMessage]]:
+        # 리뷰마다 thread가 다르므로 리뷰별로 따로 보냅니다.
+        return self._group_by_review(messages)
+
+    async def _post(self, message: Dict[str, Any], review_id: str):
         text = message.get("text", "")
-        attachment = message.get("attachments", [{}])[0]
-        fields = attachment.get("fields", [])
-        
         field_texts = []
-        for field in fields:
-            field_texts.append(f"{field.get("title", "")}: {field.get("value", "")}")
+        for attachment in message.get("attachments", [{}]):
+            fields = attachment.get("fields", [])
+            for field in fields:
+                field_texts.append(f"{field.get("title", "")}: {field.get("value", "")}")
 
         if field_texts:
             text += "\n" + "\n".join(field_texts)
         message = {
             "text": text,
             "thread": {
-                "threadKey": str(self.message_format.review_id)
+                "threadKey": str(review_id)
             }
         }
 
         headers = {
             "Content-Type": "application/json"
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.uri,
-                json=message,
-                headers=headers
-            )
-            response.raise_for_status()
+        response = await self.client.post(
+            self.uri,
+            json=message,
+            headers=headers
+        )
+        response.raise_for_status()
 
 class Slack(Webhook):
+    backend = "slack"
+
+    @metrics.instrumented("notification")
     async def send_message(self):
         self.log.info(f"slack 알림 발송 중...{self.uri}")
         message = self._get_message(self.message_format)
-        slack = slack_webhook.Slack(url=self.uri)
-        slack.post(text=message['text'], attachments=message['attachments'])
+        response = await self.client.post(
+            self.uri,
+            json={"text": message['text'], "attachments": message['attachments']}
+        )
+        response.raise_for_status()
+
+    @metrics.instrumented("notification")
+    async def send_digest(self, messages: list[WebhookMessage]):
+        self.log.info(f"slack 알림 {len(messages)}건 묶음 발송 중...{self.uri}")
+        message = self._get_digest_message(messages)
+        response = await self.client.post(
+            self.uri,
+            json={"text": message['text'], "attachments": message['attachments']}
+        )
+        response.raise_for_status()
 
 class Discord(Webhook):
+    backend = "discord"
+
+    @metrics.instrumented("notification")
     async def send_message(self):
         self.log.info(f"discord 알림 발송 중...{self.uri}")
-        message = self._get_message(self.message_format)
+        await self._post(self._get_message(self.message_format))
+
+    @metrics.instrumented("notification")
+    async def send_digest(self, messages: list[WebhookMessage]):
+        self.log.info(f"discord 알림 {len(messages)}건 묶음 발송 중...{self.uri}")
+        await self._post(self._get_digest_message(messages))
+
+    def split_digest(self, messages: list[WebhookMessage]) -> list[list[WebhookMessage]]:
+        # 메시지 하나에 embed(리뷰)를 DISCORD_MAX_EMBEDS개까지 넣을 수 있습니다.
+        groups = self._group_by_review(messages)
+        return [[message for group in groups[i:i + DISCORD_MAX_EMBEDS] for message in group]
+                for i in range(0, len(groups), DISCORD_MAX_EMBEDS)]
+
+    async def _post(self, message: Dict[str, Any]):
         text = message.get("text", "")
-        attachment = message.get("attachments", [{}])[0]
-        fields = attachment.get("fields", [])
-        embeds = [
-            {
-                "fields": [{"name": field.get("title", ""), "value": field.get("value", ""), "inline": True} for field in fields],
+        embeds = []
+        for attachment in message.get("attachments", [{}]):
+            embed = {
+                "fields": [{"name": field.get("title", ""),
+                            "value": str(field.get("value", ""))[:DISCORD_MAX_FIELD_LENGTH],
+                            "inline": True} for field in attachment.get("fields", [])],
                 "color": 1127128
             }
-        ]
+            if "title" in attachment:
+                embed["title"] = attachment["title"]
+            embeds.append(embed)
 
-        discord = DiscordWebhook(url=self.uri, content=text, embeds=embeds)
-        discord.execute()
\ No newline at end of file
+        response = await self.client.post(
+            self.uri,
+            json={"content": text, "embeds": embeds}
+        )
+        response.raise_for_status()
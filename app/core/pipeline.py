@@ -0,0 +1,284 @@
+import asyncio
+import json
+import time
+from typing import Optional
+from app.core import adapter, events, metrics
+from app.core.dispatcher import notification_dispatcher
+from app.core.gpt import GPT
+from app.core.live_comment import LiveComment
+from app.core.delivery import review_key
+from app.core.diff_filter import DiffFilter, unified_diff
+from app.core.model import REVIEW_EVENT_TYPES, WebhookMessage, get_event_type, get_repo_name
+from app.core.planner import ReviewRequest, count_tokens, merge_reviews, plan_reviews
+from app.core.review import ReviewComment, review_concurrently
+from app.core.review_state import review_state
+from app.logger import get_logger
+from app.config import settings
+
+log = get_logger('review-bot')
+
+async def notify_github(payload: dict) -> None:
+    event = events.convert('github', payload)
+    metrics.bind_repo(get_repo_name('github', event))
+    github = adapter.get_code_review_tool(code_review_tool=settings.CODE_REVIEW_TOOL,
+                                          private_token=settings.GITHUB_ACCESS_TOKEN,
+                                          event=event)
+
+    review_details = await github.get_review_details()
+    message_format = await WebhookMessage.from_github(event, review_details)
+    webhook = adapter.get_notification(webhook=settings.WEBHOOK,
+                                       uri=settings.WEBHOOK_URI,
+                                       message_format=message_format)
+
+    await notification_dispatcher.send(webhook)
+
+async def review_github(payload: dict) -> None:
+    started_at = time.monotonic()
+    event = events.convert('github', payload)
+    metrics.bind_repo(get_repo_name('github', event))
+    if get_event_type('github', event) not in REVIEW_EVENT_TYPES:
+        return
+    github = adapter.get_code_review_tool(code_review_tool=settings.CODE_REVIEW_TOOL,
+                                          private_token=settings.GITHUB_ACCESS_TOKEN,
+                                          event=event)
+
+    # 마지막으로 리뷰한 커밋 이후의 변경만 리뷰
+    key = review_key('github', event)
+    head_sha = await github.get_head_sha()
+    base_sha = await last_reviewed_head(key, event.before)
+    if base_sha == head_sha:
+        log.info(f"이미 리뷰한 커밋입니다: {head_sha}")
+        return
+
+    # 각 변경된 파일에 대한 코드 가져오기
+    changes = await github.get_file_changes(base_sha=base_sha)
+
+    # 리뷰할 필요가 없는 변경을 걸러내고 diff 문맥을 줄임
+    diff_filter = DiffFilter.from_settings()
+    targets = []
+    for file in changes:
+        diff = diff_filter.filter_diff(file['file_name'], file['patch'], renamed=file.get('status') == 'renamed')
+        if diff is not None:
+            targets.append((file['file_name'], diff))
+    diff_filter.report()
+
+    # openai 코드 리뷰 요청
+    requests = plan_reviews(targets)
+    gpt = GPT()
+    review_comments: list[ReviewComment] = []
+
+    async def review(request: ReviewRequest) -> list[ReviewComment]:
+        # 응답을 끝까지 기다리지 않고 코멘트가 완성될 때마다 실제 파일 경로로 맞춰 모읍니다.
+        return await gpt.generate_structor_output_code_review_by_request(
+            request, on_comment=lambda comment: review_comments.append(request.remap_comment(comment))
+        )
+
+    await review_concurrently(requests, review, costs=[request.tokens for request in requests])
+
+    if review_comments:
+        await github.add_review_comment(review_comments)
+        log.info(f"리뷰 코멘트를 {time.monotonic() - started_at:.1f}초 만에 등록했습니다.")
+    else:
+        log.warning("생성된 리뷰 코멘트가 없습니다.")
+    await review_state.set(key, head_sha)
+
+async def notify_gitlab(payload: dict) -> None:
+    event = events.convert('gitlab', payload)
+    metrics.bind_repo(get_repo_name('gitlab', event))
+    message_format = await WebhookMessage.from_gitlab(event)
+    webhook = adapter.get_notification(webhook=settings.WEBHOOK,
+                                       uri=settings.WEBHOOK_URI,
+                                       message_format=message_format)
+    await notification_dispatcher.send(webhook)
+
+async def review_gitlab(payload: dict) -> None:
+    started_at = time.monotonic()
+    event = events.convert('gitlab', payload)
+    metrics.bind_repo(get_repo_name('gitlab', event))
+    if get_event_type('gitlab', event) not in REVIEW_EVENT_TYPES:
+        return
+    gitlab = adapter.get_code_review_tool(code_review_tool=settings.CODE_REVIEW_TOOL,
+                                          base_url=settings.GITLAB_BASE_URL,
+                                          private_token=settings.GITLAB_ACCESS_TOKEN,
+                                          event=event)
+
+    # 마지막으로 리뷰한 커밋 이후의 변경만 리뷰
+    key = review_key('gitlab', event)
+    head_sha = gitlab.head_sha
+    base_sha = await last_reviewed_head(key, event.object_attributes.oldrev)
+    if head_sha and base_sha == head_sha:
+        log.info(f"이미 리뷰한 커밋입니다: {head_sha}")
+        return
+
+    changes = await gitlab.get_file_changes(base_sha=base_sha)
+
+    # 리뷰할 필요가 없는 변경을 걸러내고 diff 문맥을 줄임
+    diff_filter = DiffFilter.from_settings()
+    targets = []
+    for file in changes['changes']:
+        diff = diff_filter.filter_diff(file['new_path'], file['diff'], renamed=bool(file.get('renamed_file')))
+        if diff is not None:
+            targets.append((file['new_path'], diff))
+    diff_filter.report()
+
+    # openai 코드 리뷰 요청
+    requests = plan_reviews(targets)
+    gpt = GPT()
+    # 응답을 받는 대로 하나의 note에 작성하고 완료되면 최종 리뷰로 교체
+    async with LiveComment(gitlab,
+                           interval=settings.REVIEW_STREAM_EDIT_INTERVAL,
+                           enabled=settings.REVIEW_STREAMING,
+                           started_at=started_at) as live:
+        async def review(index: int) -> str | None:
+            return await gpt.generate_code_review_by_request(requests[index], on_delta=live.on_delta(index))
+
+        reviews = await review_concurrently(range(len(requests)), review,
+                                            costs=[request.tokens for request in requests])
+        review_comments = merge_reviews(requests, reviews)
+
+        # 코드 리뷰 내용 작성
+        if review_comments or live.sections:
+            await live.finish("\n\n".join(review_comments))
+        else:
+            log.warning("생성된 리뷰 코멘트가 없습니다.")
+    if head_sha:
+        await review_state.set(key, head_sha)
+
+async def notify_upsource(payload: dict) -> None:
+    event = events.convert('upsource', payload)
+    metrics.bind_repo(get_repo_name('upsource', event))
+    upsource = adapter.get_code_review_tool(code_review_tool=settings.CODE_REVIEW_TOOL,
+                                            base_url=settings.UPSOURCE_BASE_URL,
+                                            username=settings.UPSOURCE_USERNAME,
+                                            password=settings.UPSOURCE_PASSWORD,
+                                            event=event)
+
+    review_details = await upsource.get_review_details()
+    message_format = await WebhookMessage.from_upsource(event, review_details['result']['title'])
+    webhook = adapter.get_notification(webhook=settings.WEBHOOK,
+                                       uri=settings.WEBHOOK_URI,
+                                       message_format=message_format)
+
+    await notification_dispatcher.send(webhook)
+
+async def review_upsource(payload: dict) -> None:
+    started_at = time.monotonic()
+    event = events.convert('upsource', payload)
+    metrics.bind_repo(get_repo_name('upsource', event))
+    if get_event_type('upsource', event) not in REVIEW_EVENT_TYPES:
+        return
+    upsource = adapter.get_code_review_tool(code_review_tool=settings.CODE_REVIEW_TOOL,
+                                            base_url=settings.UPSOURCE_BASE_URL,
+                                            username=settings.UPSOURCE_USERNAME,
+                                            password=settings.UPSOURCE_PASSWORD,
+                                            event=event)
+
+    # 이미 리뷰한 revision을 제외하고 새로 추가된 revision만 리뷰
+    key = review_key('upsource', event)
+    state = await review_state.get(key)
+    reviewed = set(json.loads(state)) if state else set()
+    revisions = await upsource.get_review_revisions()
+    new_revisions = [revision for revision in revisions if revision not in reviewed]
+    if not new_revisions:
+        log.info("새로 추가된 revision이 없습니다.")
+        return
+
+    files = await upsource.get_file_changes(revisions=new_revisions if reviewed else None)
+
+    diff_filter = DiffFilter.from_settings()
+    candidates = []
+    for file in files['result']['diff']['diff']:
+        new_file = file.get('newFile')
+        if not new_file or not diff_filter.accepts_path(str(new_file.get('fileName', ''))):
+            continue
+        # 새 파일을 리뷰하면 이전 파일은 확장자와 관계없이(이름 변경 등) 함께 비교합니다.
+        old_file = file.get('oldFile') if (file.get('oldFile') or {}).get('fileName') else None
+        candidates.append((old_file, new_file))
+
+    # 리뷰에 필요한 파일 내용을 한 번에 동시 조회
+    codes = await upsource.get_codes([info for pair in candidates for info in pair])
+
+    # 리뷰할 필요가 없는 변경(생성된 코드, 공백/이름만 바뀐 파일 등)을 걸러냄
+    targets = []
+    for index, (old_file, new_file) in enumerate(candidates):
+        old_code, new_code = codes[2 * index], codes[2 * index + 1]
+        old_text = file_text(old_code) if old_code else None
+        new_text = file_text(new_code)
+        if diff_filter.filter_contents(new_file['fileName'], old_file['fileName'] if old_file else None,
+                                       old_text, new_text):
+            targets.append((old_file['fileName'] if old_file else None, old_text, new_file['fileName'], new_text))
+    diff_filter.report()
+
+    # 새 파일이나 작은 파일은 전체 내용을, 나머지는 로컬에서 계산한 diff를 리뷰
+    full_files = []
+    diffs = []
+    for old_name, old_text, new_name, new_text in targets:
+        if old_text is None or new_text.count("\n") < settings.UPSOURCE_FULL_CONTENT_MAX_LINES:
+            full_files.append((old_name, old_text, new_name, new_text))
+            continue
+        diff = await asyncio.to_thread(unified_diff, old_text, new_text, settings.UPSOURCE_DIFF_CONTEXT_LINES)
+        saved = count_tokens(old_text) + count_tokens(new_text) - count_tokens(diff)
+        log.info(f"{new_name} 파일은 전체 내용 대신 diff로 리뷰합니다. ({saved} tokens 절약)")
+        metrics.record_tokens_saved("local_diff", saved)
+        diffs.append((new_name, diff))
+    requests = plan_reviews(diffs) if diffs else []
+    gpt = GPT()
+
+    # 응답을 받는 대로 하나의 discussion에 작성하고 완료되면 최종 리뷰로 교체
+    async with LiveComment(upsource,
+                           interval=settings.REVIEW_STREAM_EDIT_INTERVAL,
+                           enabled=settings.REVIEW_STREAMING,
+                           started_at=started_at) as live:
+        async def review(index: int) -> str | None:
+            # openai 코드 리뷰 요청
+            if index < len(full_files):
+                old_name, old_text, new_name, new_text = full_files[index]
+                return await gpt.generate_code_review_by_files(old_name, old_text, new_name, new_text,
+                                                               on_delta=live.on_delta(index))
+            return await gpt.generate_code_review_by_request(requests[index - len(full_files)],
+                                                             on_delta=live.on_delta(index))
+
+        costs = [count_tokens(old_text or "") + count_tokens(new_text) for _, old_text, _, new_text in full_files]
+        costs += [request.tokens for request in requests]
+        reviews = await review_concurrently(range(len(full_files) + len(requests)), review, costs=costs)
+        review_comments = [comment for comment in reviews[:len(full_files)] if comment]
+        review_comments += merge_reviews(requests, reviews[len(full_files):])
+
+        # upsource 코드 리뷰 내용 작성
+        if review_comments or live.sections:
+            await live.finish("\n\n".join(review_comments))
+        else:
+            log.warning("생성된 리뷰 코멘트가 없습니다.")
+    await review_state.set(key, json.dumps(revisions))
+
+async def last_reviewed_head(key: str, before: Optional[str]) -> Optional[str]:
+    """
+    마지막으로 리뷰한 head를 반환합니다. 저장된 값이 없으면 None(PR/MR 전체 변경을 리뷰) 입니다.
+    push 이전 head(`before`/`oldrev`)는 저장된 head를 확인하는 데만 쓰고 비교 기준으로는 쓰지 않습니다.
+    (첫 리뷰가 대체/취소되었으면 `before`는 리뷰하지 않은 커밋입니다.)
+    """
+    head = await review_state.get(key)
+    if head is None:
+        if before:
+            log.info(f"리뷰한 기록이 없어 push 이전 head({before[:8]}) 대신 전체 변경을 리뷰합니다.")
+        return None
+    if before and before != head:
+        log.info(f"마지막으로 리뷰한 커밋({head[:8]})이 push 이전 head({before[:8]})와 달라 {head[:8]}부터의 변경을 리뷰합니다.")
+    return head
+
+def file_text(code: dict) -> str:
+    # Upsource getFileContent 응답의 파일 내용
+    return code.get('result', {}).get('text', '')
+
+PIPELINES = {
+    'github': review_github,
+    'gitlab': review_gitlab,
+    'upsource': review_upsource,
+}
+
+# 알림은 리뷰와 별도 작업으로 한 번만 보냅니다. (리뷰 재시도/대체와 무관)
+NOTIFICATIONS = {
+    'github': notify_github,
+    'gitlab': notify_gitlab,
+    'upsource': notify_upsource,
+}
@@ -0,0 +1,263 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, Optional
+from app.config import settings
+from app.core.review import ReviewComment
+from app.logger import get_logger
+
+log = get_logger("review-bot")
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(.*)$")
+
+# 파일마다 프롬프트에 추가되는 파일명/코드 블록 등의 고정 비용
+FILE_OVERHEAD_TOKENS = 20
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        log.warning(f"tiktoken 인코딩을 불러오지 못해 근사치로 토큰 수를 계산합니다: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+@dataclass
+class DiffPart:
+    file_name: str
+    diff: str
+    tokens: int
+    part: int = 1
+    parts: int = 1
+    # diff가 다루는 새 파일 기준 라인 범위 목록 (시작, 끝)
+    line_ranges: list[tuple[int, int]] = field(default_factory=list)
+
+    @property
+    def is_whole_file(self) -> bool:
+        return self.parts == 1
+
+@dataclass
+class ReviewRequest:
+    parts: list[DiffPart]
+
+    @property
+    def tokens(self) -> int:
+        return sum(part.tokens + FILE_OVERHEAD_TOKENS for part in self.parts)
+
+    @property
+    def file_names(self) -> list[str]:
+        return list(dict.fromkeys(part.file_name for part in self.parts))
+
+    def locate(self, path: str, line: Optional[int] = None) -> Optional[str]:
+        """
+        모델이 응답한 파일 경로를 요청에 포함된 실제 파일 경로로 되돌립니다.
+        경로가 정확히 일치하지 않으면 접미사가 같은 파일 중 `line`을 포함하는 파일을 찾습니다.
+        """
+        path = path.strip().strip("`").removeprefix("a/").removeprefix("b/")
+        if path in self.file_names:
+            return path
+
+        candidates = [part for part in self.parts
+                      if part.file_name.endswith(f"/{path}") or path.endswith(f"/{part.file_name}")]
+        if line is not None:
+            candidates = [part for part in candidates
+                          if any(start <= line <= end for start, end in part.line_ranges)] or candidates
+        return candidates[0].file_name if candidates else None
+
+    def remap_comment(self, comment: ReviewComment) -> ReviewComment:
+        """
+        구조화된 리뷰의 `path`를 요청에 포함된 실제 파일 경로로 맞춥니다.
+        라인 번호는 diff의 hunk 헤더를 그대로 유지하므로 원본 파일 기준입니다.
+        """
+        path = self.locate(comment.path, comment.line)
+        if path:
+            comment.path = path
+        elif len(self.file_names) == 1:
+            comment.path = self.file_names[0]
+        return comment
+
+    def remap_comments(self, comments: list[ReviewComment]) -> list[ReviewComment]:
+        return [self.remap_comment(comment) for comment in comments]
+
+    def split_review(self, review: str) -> list[tuple[str, str]]:
+        """
+        여러 파일을 묶은 리뷰 응답을 `### 파일명` 머리글 기준으로 파일별 리뷰로 나눕니다.
+        """
+        if len(self.file_names) == 1:
+            return [(self.file_names[0], review)]
+
+        sections: list[tuple[str, str]] = []
+        current, lines = self.file_names[0], []
+        for line in review.splitlines():
+            heading = re.match(r"^#{2,4}\s+(.+?)\s*$", line)
+            file_name = self.locate(heading.group(1)) if heading else None
+            if file_name:
+                if "\n".join(lines).strip():
+                    sections.append((current, "\n".join(lines).strip()))
+                current, lines = file_name, []
+            lines.append(line)
+        if "\n".join(lines).strip():
+            sections.append((current, "\n".join(lines).strip()))
+        return sections
+
+def _line_ranges(diff: str) -> list[tuple[int, int]]:
+    ranges = []
+    for line in diff.splitlines():
+        match = HUNK_HEADER.match(line)
+        if match:
+            start, count = int(match.group(3)), int(match.group(4) or 1)
+            ranges.append((start, start + max(count, 1) - 1))
+    return ranges
+
+def commentable_lines(diff: str) -> set[int]:
+    """
+    diff에서 새 파일 기준으로 코멘트를 달 수 있는 라인(추가/문맥 라인) 번호를 반환합니다.
+    """
+    lines: set[int] = set()
+    new_line = None
+    for line in diff.splitlines():
+        match = HUNK_HEADER.match(line)
+        if match:
+            new_line = int(match.group(3))
+        elif new_line is None or line.startswith("-") or line.startswith("\\"):
+            continue
+        else:
+            lines.add(new_line)
+            new_line += 1
+    return lines
+
+def split_hunks(diff: str) -> list[str]:
+    hunks: list[list[str]] = []
+    for line in diff.splitlines():
+        if HUNK_HEADER.match(line) or not hunks:
+            hunks.append([])
+        hunks[-1].append(line)
+    return ["\n".join(hunk) for hunk in hunks]
+
+def _split_hunk(hunk: str, budget: int) -> list[str]:
+    """
+    토큰 예산을 넘는 하나의 hunk를 라인 단위로 나누고, 조각마다 라인 번호를 다시 계산한 hunk 헤더를 붙입니다.
+    """
+    lines = hunk.splitlines()
+    match = HUNK_HEADER.match(lines[0]) if lines else None
+    if match is None:
+        old_line, new_line, body, suffix = 1, 1, lines, ""
+    else:
+        old_line, new_line, body, suffix = int(match.group(1)), int(match.group(3)), lines[1:], match.group(5)
+
+    pieces: list[str] = []
+    chunk: list[str] = []
+    chunk_tokens = 0
+    chunk_old, chunk_new = old_line, new_line
+    old_count = new_count = 0
+
+    def flush():
+        header = f"@@ -{chunk_old},{old_count} +{chunk_new},{new_count} @@{suffix}"
+        pieces.append("\n".join([header, *chunk]))
+
+    for line in body:
+        line_tokens = count_tokens(line) + 1
+        if chunk and chunk_tokens + line_tokens > budget:
+            flush()
+            chunk_old, chunk_new = chunk_old + old_count, chunk_new + new_count
+            chunk, chunk_tokens, old_count, new_count = [], 0, 0, 0
+        chunk.append(line)
+        chunk_tokens += line_tokens
+        if line.startswith("-"):
+            old_count += 1
+        elif line.startswith("+"):
+            new_count += 1
+        elif not line.startswith("\\"):
+            old_count += 1
+            new_count += 1
+    if chunk:
+        flush()
+    return pieces
+
+def _split_diff(file_name: str, diff: str, budget: int) -> list[DiffPart]:
+    pieces: list[str] = []
+    for hunk in split_hunks(diff):
+        if count_tokens(hunk) > budget:
+            pieces.extend(_split_hunk(hunk, budget))
+        else:
+            pieces.append(hunk)
+
+    # 같은 파일의 hunk는 예산 안에서 다시 이어 붙여 호출 수를 줄입니다.
+    grouped: list[str] = []
+    grouped_tokens = 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if grouped and grouped_tokens + piece_tokens <= budget:
+            grouped[-1] += "\n" + piece
+            grouped_tokens += piece_tokens
+        else:
+            grouped.append(piece)
+            grouped_tokens = piece_tokens
+
+    return [
+        DiffPart(file_name=file_name, diff=piece, tokens=count_tokens(piece),
+                 part=index + 1, parts=len(grouped), line_ranges=_line_ranges(piece))
+        for index, piece in enumerate(grouped)
+    ]
+
+def plan_reviews(files: Iterable[tuple[str, str]],
+                 budget: Optional[int] = None,
+                 max_files: Optional[int] = None) -> list[ReviewRequest]:
+    """
+    (파일명, diff) 목록을 모델 호출 단위로 나눕니다.
+    예산을 넘는 diff는 hunk 경계에서 나누고, 작은 diff는 파일 순서대로 하나의 요청에 묶습니다.
+    """
+    budget = budget or settings.REVIEW_TOKEN_BUDGET
+    max_files = max_files or settings.REVIEW_PACK_MAX_FILES
+    diff_budget = budget - FILE_OVERHEAD_TOKENS
+
+    parts: list[DiffPart] = []
+    for file_name, diff in files:
+        if not diff:
+            log.warning(f"{file_name} 파일은 diff가 없어 리뷰하지 않습니다.")
+            continue
+        tokens = count_tokens(diff)
+        if tokens > diff_budget:
+            split = _split_diff(file_name, diff, diff_budget)
+            log.info(f"{file_name} 파일({tokens} tokens)을 {len(split)}개로 나누어 리뷰합니다.")
+            parts.extend(split)
+        else:
+            parts.append(DiffPart(file_name=file_name, diff=diff, tokens=tokens, line_ranges=_line_ranges(diff)))
+
+    requests: list[ReviewRequest] = []
+    for part in parts:
+        current = requests[-1] if requests else None
+        if (current is not None
+                and current.parts[-1].is_whole_file and part.is_whole_file
+                and len(current.parts) < max_files
+                and current.tokens + part.tokens + FILE_OVERHEAD_TOKENS <= budget):
+            current.parts.append(part)
+        else:
+            requests.append(ReviewRequest(parts=[part]))
+
+    log.info(f"{len(parts)}개의 diff를 {len(requests)}번의 모델 호출로 리뷰합니다.")
+    return requests
+
+def merge_reviews(requests: list[ReviewRequest], reviews: list[Optional[str]]) -> list[str]:
+    """
+    요청 단위 리뷰 결과를 파일별로 모아 원래 파일 순서대로 반환합니다.
+    """
+    by_file: dict[str, list[str]] = {}
+    for request in requests:
+        for file_name in request.file_names:
+            by_file.setdefault(file_name, [])
+    for request, review in zip(requests, reviews):
+        if not review:
+            continue
+        for file_name, section in request.split_review(review):
+            by_file[file_name].append(section)
+    return ["\n\n".join(sections) for sections in by_file.values() if sections]
@@ -0,0 +1,42 @@
+import importlib
+from typing import Generic, TypeVar, Union
+
+T = TypeVar("T")
+
+class Registry(Generic[T]):
+    """
+    이름으로 backend 구현 클래스를 찾는 레지스트리.
+    `"모듈:클래스"` 경로만 등록해 두고 처음 사용할 때 import 하므로,
+    설정에서 고르지 않은 backend의 모듈과 의존성은 불러오지 않습니다.
+    """
+    def __init__(self, kind: str, entries: dict[str, str]):
+        self.kind = kind
+        self._entries = dict(entries)
+        self._loaded: dict[str, type[T]] = {}
+
+    def register(self, name: str, target: Union[str, type[T]]) -> None:
+        """
+        `target`은 `"모듈:클래스"` 경로 또는 클래스입니다. 같은 이름이 있으면 교체합니다.
+        """
+        if isinstance(target, str):
+            self._entries[name] = target
+            self._loaded.pop(name, None)
+        else:
+            self._entries[name] = f"{target.__module__}:{target.__qualname__}"
+            self._loaded[name] = target
+
+    def names(self) -> list[str]:
+        return list(self._entries)
+
+    def loaded(self) -> list[str]:
+        return list(self._loaded)
+
+    def get(self, name: str) -> type[T]:
+        backend = self._loaded.get(name)
+        if backend is None:
+            path = self._entries.get(name)
+            if path is None:
+                raise Exception(f"{name}는 지원되지 않습니다. ({self.kind}: {', '.join(self._entries)})")
+            module, _, attribute = path.partition(":")
+            backend = self._loaded[name] = getattr(importlib.import_module(module), attribute)
+        return backend
@@ -0,0 +1,146 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional, Sequence, TypeVar
+from app.config import settings
+from app.core.scheduler import review_scheduler
+from app.logger import get_logger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+log = get_logger("review-bot")
+
+async def review_concurrently(items: Iterable[T],
+                              review: Callable[[T], Awaitable[R]],
+                              concurrency: Optional[int] = None,
+                              costs: Optional[Sequence[int]] = None) -> list[Optional[R]]:
+    """
+    파일 단위 리뷰를 동시에 수행합니다.
+    동시 실행 개수는 `concurrency`(기본값 `settings.REVIEW_CONCURRENCY`)로 제한되며,
+    결과는 입력 순서를 그대로 유지합니다.
+    하나라도 실패하면 나머지 항목이 끝난 뒤 예외를 발생시켜, 리뷰한 head를 저장하지 않고 작업이 재시도되게 합니다.
+    (성공한 항목의 응답은 리뷰 캐시에 남아 재시도 때 모델을 다시 호출하지 않습니다.)
+    각 항목은 `review_scheduler`에서 모델 호출 슬롯을 배정받은 뒤 실행하며, `costs`(항목별 토큰 수)가 배정 순서의 기준입니다.
+    """
+    items = list(items)
+    costs = list(costs) if costs is not None else [1] * len(items)
+    review_size = sum(costs)
+    semaphore = asyncio.Semaphore(concurrency or settings.REVIEW_CONCURRENCY)
+    errors: list[Exception] = []
+
+    async def run(item: T, cost: int) -> Optional[R]:
+        async with semaphore:
+            try:
+                async with review_scheduler.slot(cost=cost, review_size=review_size):
+                    return await review(item)
+            except Exception as e:
+                log.error(f"리뷰 중 오류 발생: {e}")
+                errors.append(e)
+                return None
+
+    results = await asyncio.gather(*(run(item, cost) for item, cost in zip(items, costs)))
+    if errors:
+        raise Exception(f"리뷰 요청 {len(errors)}/{len(items)}건이 실패했습니다: {errors[0]}") from errors[0]
+    return results
+
+@dataclass
+class ReviewComment:
+    path: str
+    line: int
+    body: str
+
+# 구조화된 리뷰 응답의 JSON schema (OpenAI structured outputs)
+REVIEW_COMMENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "comments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "path": {"type": "string"},
+                    "line": {"type": "integer"},
+                    "body": {"type": "string"},
+                },
+                "required": ["path", "line", "body"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["comments"],
+    "additionalProperties": False,
+}
+
+class StructuredReviewParser:
+    """
+    `{"comments": [...]}` 형식의 리뷰 응답을 스트리밍으로 받으면서 완성된 코멘트를 하나씩 꺼냅니다.
+    코멘트 객체가 닫히는 즉시 검증하므로 응답 전체를 기다리지 않아도 되고,
+    응답이 중간에 끊겨도 그때까지 완성된 코멘트는 사용할 수 있습니다.
+    """
+    def __init__(self):
+        self.depth = 0
+        self.item_depth: Optional[int] = None
+        self.in_string = False
+        self.escape = False
+        self.item: Optional[list[str]] = None
+        self.parsed = 0
+        self.invalid = 0
+
+    def feed(self, text: str) -> list[ReviewComment]:
+        comments = []
+        for char in text:
+            if self.item is not None:
+                self.item.append(char)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if self.item_depth is None:
+                    # 최상위가 배열이면 배열의 원소가, 객체이면 `comments` 배열의 원소가 코멘트입니다.
+                    self.item_depth = 2 if char == "[" else 3
+                self.depth += 1
+                if char == "{" and self.depth == self.item_depth:
+                    self.item = ["{"]
+            elif char in "}]":
+                if char == "}" and self.depth == self.item_depth and self.item is not None:
+                    comment = self._parse("".join(self.item))
+                    self.item = None
+                    if comment is not None:
+                        comments.append(comment)
+                self.depth -= 1
+        return comments
+
+    @property
+    def complete(self) -> bool:
+        return self.item_depth is not None and self.depth == 0 and not self.in_string
+
+    def _parse(self, text: str) -> Optional[ReviewComment]:
+        try:
+            item = json.loads(text)
+            path, line, body = item["path"], item["line"], item["body"]
+            if isinstance(line, bool) or not isinstance(path, str) or not isinstance(body, str):
+                raise ValueError(text)
+            comment = ReviewComment(path=path.strip(), line=int(line), body=body.strip())
+            if not comment.path or comment.line < 1 or not comment.body:
+                raise ValueError(text)
+        except (KeyError, TypeError, ValueError) as e:
+            self.invalid += 1
+            log.warning(f"형식에 맞지 않는 리뷰 코멘트를 건너뜁니다: {e}")
+            return None
+        self.parsed += 1
+        return comment
+
+def parse_structured_review(review: str) -> list[ReviewComment]:
+    """
+    구조화된 리뷰 응답 전체를 파싱합니다. 형식에 맞지 않는 코멘트는 건너뜁니다.
+    """
+    return StructuredReviewParser().feed(review)
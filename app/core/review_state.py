@@ -0,0 +1,32 @@
+import time
+from typing import Optional
+from app.config import settings
+from app.core.storage import SQLiteStore
+
+class ReviewStateStore(SQLiteStore):
+    """
+    PR/MR(리뷰)별로 마지막으로 리뷰한 지점을 저장합니다.
+    GitHub/GitLab은 head 커밋 SHA를, Upsource는 리뷰한 revision 목록(JSON)을 저장하며,
+    다음 이벤트에서는 이 지점 이후에 추가된 변경만 리뷰합니다.
+    """
+    schema = [
+        """
+        CREATE TABLE IF NOT EXISTS review_state (
+            review_key TEXT PRIMARY KEY,
+            head TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """,
+    ]
+
+    async def get(self, review_key: str) -> Optional[str]:
+        row = await self.fetchone("SELECT head FROM review_state WHERE review_key = ?", (review_key,))
+        return row[0] if row else None
+
+    async def set(self, review_key: str, head: str) -> None:
+        await self.execute(
+            "INSERT OR REPLACE INTO review_state (review_key, head, updated_at) VALUES (?, ?, ?)",
+            (review_key, head, time.time()),
+        )
+
+review_state = ReviewStateStore(settings.REVIEW_STATE_PATH)
@@ -0,0 +1,148 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+from app.config import settings
+from app.core import metrics
+from app.logger import get_logger
+
+@dataclass(order=True)
+class Ticket:
+    # 같은 저장소 안에서는 작은 리뷰의 요청부터, 같은 리뷰 안에서는 요청 순서대로 처리합니다.
+    review_size: int
+    seq: int
+    cost: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+@dataclass
+class Flow:
+    weight: float
+    waiting: list[Ticket] = field(default_factory=list)
+    running: int = 0
+    # 마지막으로 배정한 요청의 가상 완료 시각
+    finish: float = 0.0
+
+@dataclass
+class RepoStats:
+    dispatched: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "dispatched": self.dispatched,
+            "wait_avg": round(self.wait_total / self.dispatched, 3) if self.dispatched else None,
+            "wait_max": round(self.wait_max, 3),
+        }
+
+class ReviewScheduler:
+    """
+    여러 리뷰의 모델 호출(리뷰 요청 단위)을 저장소별 가중치 공정 큐(WFQ)로 배분합니다.
+    요청의 비용은 토큰 수이며, 저장소마다 `비용 / 가중치`만큼 가상 시간이 흘러 가상 완료 시각이 가장 이른 저장소부터 배정합니다.
+    전체 동시 호출 수는 `capacity`, 저장소별 동시 호출 수는 `repo_concurrency`로 제한하므로
+    큰 PR이나 이벤트가 많은 저장소가 있어도 다른 저장소의 작은 리뷰가 뒤로 밀리지 않습니다.
+    """
+    log = get_logger("review-bot")
+
+    def __init__(self, capacity: int, repo_concurrency: int, weights: Optional[Dict[str, float]] = None):
+        self.capacity = max(1, capacity)
+        self.repo_concurrency = max(1, repo_concurrency)
+        self.weights = dict(weights or {})
+        self.stats: Dict[str, RepoStats] = {}
+        self._flows: Dict[str, Flow] = {}
+        self._running = 0
+        self._virtual = 0.0
+        self._seq = itertools.count()
+
+    def _weight(self, repo: str) -> float:
+        weight = self.weights.get(repo, 1.0)
+        return weight if weight > 0 else 1.0
+
+    @asynccontextmanager
+    async def slot(self, cost: int, review_size: int, repo: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        모델 호출 슬롯을 배정받을 때까지 기다립니다. `repo`를 생략하면 현재 리뷰의 저장소(`metrics.bind_repo`)를 사용합니다.
+        """
+        repo = repo or metrics.current_repo.get()
+        flow = self._flows.get(repo)
+        if flow is None:
+            flow = self._flows[repo] = Flow(weight=self._weight(repo), finish=self._virtual)
+        ticket = Ticket(review_size=review_size, seq=next(self._seq), cost=max(1, cost),
+                        enqueued_at=time.monotonic(), future=asyncio.get_running_loop().create_future())
+        heapq.heappush(flow.waiting, ticket)
+        self._dispatch()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            # 배정된 직후에 취소되면 슬롯을 돌려주고, 기다리던 중이면 배정할 때 건너뜁니다.
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release(repo)
+            else:
+                self._dispatch()
+            raise
+
+        wait = time.monotonic() - ticket.enqueued_at
+        stats = self.stats.setdefault(repo, RepoStats())
+        stats.dispatched += 1
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        metrics.record_schedule_wait(repo, wait)
+        try:
+            yield
+        finally:
+            self._release(repo)
+
+    def _release(self, repo: str) -> None:
+        self._running -= 1
+        flow = self._flows.get(repo)
+        if flow is not None:
+            flow.running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._running < self.capacity:
+            selected, selected_finish = None, 0.0
+            for repo, flow in list(self._flows.items()):
+                while flow.waiting and flow.waiting[0].future.done():
+                    heapq.heappop(flow.waiting)
+                if not flow.waiting:
+                    if flow.running == 0:
+                        del self._flows[repo]
+                    continue
+                if flow.running >= self.repo_concurrency:
+                    continue
+                finish = max(self._virtual, flow.finish) + flow.waiting[0].cost / flow.weight
+                if selected is None or finish < selected_finish:
+                    selected, selected_finish = flow, finish
+            if selected is None:
+                return
+
+            ticket = heapq.heappop(selected.waiting)
+            self._virtual = max(self._virtual, selected_finish - ticket.cost / selected.weight)
+            selected.finish = selected_finish
+            selected.running += 1
+            self._running += 1
+            ticket.future.set_result(None)
+
+    def status(self) -> Dict[str, Any]:
+        repos = {repo: {"weight": self._weight(repo), "running": 0, "waiting": 0, **stats.as_dict()}
+                 for repo, stats in self.stats.items()}
+        for repo, flow in self._flows.items():
+            entry = repos.setdefault(repo, {"weight": flow.weight, **RepoStats().as_dict()})
+            entry["running"] = flow.running
+            entry["waiting"] = sum(1 for ticket in flow.waiting if not ticket.future.done())
+        return {
+            "capacity": self.capacity,
+            "repo_concurrency": self.repo_concurrency,
+            "running": self._running,
+            "waiting": sum(entry["waiting"] for entry in repos.values()),
+            "repos": repos,
+        }
+
+review_scheduler = ReviewScheduler(capacity=settings.REVIEW_MODEL_CONCURRENCY,
+                                   repo_concurrency=settings.REVIEW_REPO_CONCURRENCY,
+                                   weights=settings.REVIEW_REPO_WEIGHT_MAP)
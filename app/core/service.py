@@ -1,5 +1,5 @@
 import httpx
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from abc import ABC, abstractmethod
 from app.core.model import EventType, WebhookMessage
 from app.logger import get_logger
@@ -11,17 +11,11 @@ class CodeReviewTool(ABC):
                  base_url: str = None,
                  username: str = None,
                  password: str = None,
-                 connect_timeout: float = 10.0,
-                 read_timeout: float = 10.0):
+                 client: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url
         self.username = username
         self.password = password
-        self.timeout = httpx.Timeout(
-            connect=connect_timeout,
-            read=read_timeout,
-            write=10.0,
-            pool=10.0
-        )
+        self.client = client
     
     @abstractmethod
     async def get_review_details(self):
@@ -43,26 +37,86 @@ class CodeReviewTool(ABC):
     async def add_review_comment(self, comments: list[str]):
         pass
 
+    async def create_comment(self, comment: str) -> Any:
+        """
+        코멘트 하나를 등록하고 `update_comment()`에 사용할 식별자를 반환합니다.
+        """
+        raise Exception(f"{type(self).__name__}는 코멘트 수정을 지원하지 않습니다.")
+
+    async def update_comment(self, comment_id: Any, comment: str) -> None:
+        raise Exception(f"{type(self).__name__}는 코멘트 수정을 지원하지 않습니다.")
+
 class Webhook(ABC):
     log = get_logger("notification")
 
     def __init__(self,
                  uri: str,
-                 message_format: WebhookMessage):
+                 message_format: WebhookMessage,
+                 client: Optional[httpx.AsyncClient] = None):
         self.message_format = message_format
         self.uri = uri
+        self.client = client
 
     @abstractmethod
     async def send_message(self):
         pass
 
-    def _get_review_info(self) -> Dict[str, str]:
+    @abstractmethod
+    async def send_digest(self, messages: list[WebhookMessage]):
+        """
+        digest 모드에서 모아 둔 알림 여러 건을 메시지 하나로 발송합니다.
+        """
+        pass
+
+    def split_digest(self, messages: list[WebhookMessage]) -> list[list[WebhookMessage]]:
+        """
+        모아 둔 알림을 `send_digest()` 한 번에 보낼 단위로 나눕니다. 기본은 한 번에 모두 보냅니다.
+        """
+        return [messages]
+
+    def _group_by_review(self, messages: list[WebhookMessage]) -> list[list[WebhookMessage]]:
+        groups: Dict[tuple[str, str], list[WebhookMessage]] = {}
+        for message in messages:
+            groups.setdefault((message.project_name, str(message.review_id)), []).append(message)
+        return list(groups.values())
+
+    def _get_digest_message(self, messages: list[WebhookMessage]) -> Dict[str, Any]:
+        """
+        알림 여러 건을 리뷰별 attachment로 묶습니다. 각 줄은 건별 알림의 문구를 그대로 사용합니다.
+        """
+        groups = self._group_by_review(messages)
+        if len(groups) == 1:
+            latest = groups[0][-1]
+            text = f"*{latest.title}* ({latest.review_id}) 알림 {len(messages)}건"
+        else:
+            text = f"알림 {len(messages)}건 (리뷰 {len(groups)}개)"
+
+        attachments = []
+        for group in groups:
+            rendered = [self._get_message(message) for message in group]
+            latest = group[-1]
+            fields = [
+                {"title": "Project", "value": latest.project_name, "short": True},
+                {"title": "Participant(s)", "value": latest.reviewers, "short": True},
+                {"title": "Event(s)", "value": "\n".join(message["text"] for message in rendered)},
+                {"title": "link", "value": f"<{latest.url}>"}
+            ]
+            attachment = rendered[-1]["attachments"][0]
+            attachments.append({
+                "title": f"{latest.title} ({latest.review_id})",
+                "fallback": f"{latest.title} ({latest.review_id}) 알림 {len(group)}건",
+                "fields": fields,
+                "color": attachment["color"]
+            })
+        return {"text": text, "attachments": attachments}
+
+    def _get_review_info(self, message_format: WebhookMessage) -> Dict[str, str]:
         return {
-            'review_id': self.message_format.review_id,
-            'project_id': self.message_format.project_name,
-            'actor': self.message_format.actor_name,
-            'reviewers': self.message_format.reviewers,
-            'url': self.message_format.url
+            'review_id': message_format.review_id,
+            'project_id': message_format.project_name,
+            'actor': message_format.actor_name,
+            'reviewers': message_format.reviewers,
+            'url': message_format.url
         }
 
     def _build_attachment(self, fields: list[dict], fallback: str, color: str) -> Dict[str, Any]:
@@ -76,9 +130,22 @@ class Webhook(ABC):
             ]
         }
 
-    def _get_message_by_created_review(self, title: str) -> Dict[str, Any]:
-        info = self._get_review_info()
-        text = f"*{info['actor']}*님이 리뷰를 생성하였습니다: *{title}* ({info['review_id']})"
+    def _get_message_by_created_review(self, message_format: WebhookMessage) -> Dict[str, Any]:
+        info = self._get_review_info(message_format)
+        text = f"*{info['actor']}*님이 리뷰를 생성하였습니다: *{message_format.title}* ({info['review_id']})"
+
+        fields = [
+            {"title": "Project", "value": info['project_id'], "short": True},
+            {"title": "Participant(s)", "value": info['reviewers'], "short": True},
+            {"title": "link", "value": f"<{info['url']}>"}
+        ]
+
+        return {"text": text, **self._build_attachment(fields, text, "#F35A00")}
+
+
+    def _get_message_by_updated_review(self, message_format: WebhookMessage) -> Dict[str, Any]:
+        info = self._get_review_info(message_format)
+        text = f"*{info['actor']}*님이 리뷰에 새 커밋을 추가하였습니다: *{message_format.title}* ({info['review_id']})"
 
         fields = [
             {"title": "Project", "value": info['project_id'], "short": True},
@@ -89,15 +156,15 @@ class Webhook(ABC):
         return {"text": text, **self._build_attachment(fields, text, "#F35A00")}
 
 
-    def _get_message_by_changed_review_state(self, title: str) -> Dict[str, Any]:
-        info = self._get_review_info()
-        old_state, new_state = self.message_format.old_state, self.message_format.new_state
+    def _get_message_by_changed_review_state(self, message_format: WebhookMessage) -> Dict[str, Any]:
+        info = self._get_review_info(message_format)
+        old_state, new_state = message_format.old_state, message_format.new_state
         state_map = {0: '`Open`', 1: '`Closed`'}
 
         if state_map[old_state]:
-            text = f"리뷰 상태가 {state_map[old_state]}에서 {state_map[new_state]}로 변경되었습니다: *{title}* ({info['review_id']})"
+            text = f"리뷰 상태가 {state_map[old_state]}에서 {state_map[new_state]}로 변경되었습니다: *{message_format.title}* ({info['review_id']})"
         else:
-            text = f"리뷰 상태가 {state_map[new_state]}로 변경되었습니다: *{title}* ({info['review_id']})"
+            text = f"리뷰 상태가 {state_map[new_state]}로 변경되었습니다: *{message_format.title}* ({info['review_id']})"
 
         fields = [
             {"title": "Project", "value": info['project_id'], "short": True},
@@ -109,15 +176,15 @@ class Webhook(ABC):
         return {"text": text, **self._build_attachment(fields, text, color)}
 
 
-    def _get_message_by_changed_participant_state(self, title: str) -> Dict[str, Any]:
-        info = self._get_review_info()
+    def _get_message_by_changed_participant_state(self, message_format: WebhookMessage) -> Dict[str, Any]:
+        info = self._get_review_info(message_format)
         # participant = review['data']['participant'].get('userName') or review['data']['participant'].get('userId', 'unknown')
-        old_state, new_state = self.message_format.old_state, self.message_format.new_state
+        old_state, new_state = message_format.old_state, message_format.new_state
         state_map = {0: '`Unread`', 1: '`Read`', 2: '`Accepted`', 3: '`Rejected`'}
         if state_map[old_state]:
-            text = f"리뷰 상태가 {state_map[old_state]}에서 {state_map[new_state]}로 변경되었습니다: *{title}* ({info['review_id']})"
+            text = f"리뷰 상태가 {state_map[old_state]}에서 {state_map[new_state]}로 변경되었습니다: *{message_format.title}* ({info['review_id']})"
         else:
-            text = f"리뷰 상태가 {state_map[new_state]}로 변경되었습니다: *{title}* ({info['review_id']})"
+            text = f"리뷰 상태가 {state_map[new_state]}로 변경되었습니다: *{message_format.title}* ({info['review_id']})"
 
         fields = [
             {"title": "Project", "value": info['project_id'], "short": True},
@@ -129,13 +196,13 @@ class Webhook(ABC):
         return {"text": text, **self._build_attachment(fields, text, color)}
 
 
-    def _get_message_by_created_discussion(self) -> Dict[str, Any]:
-        info = self._get_review_info()
+    def _get_message_by_created_discussion(self, message_format: WebhookMessage) -> Dict[str, Any]:
+        info = self._get_review_info(message_format)
         text = f"*{info['actor']}*님이 댓글을 작성했습니다: *{info['project_id']}*"
         fields = [
             {"title": "Project", "value": info['project_id'], "short": True},
             {"title": "Participant(s)", "value": info['reviewers'], "short": True},
-            {"title": "Comment", "value": self.message_format.comment},
+            {"title": "Comment", "value": message_format.comment},
             {"title": "link", "value": f"<{info['url']}>"}
         ]
 
@@ -143,13 +210,15 @@ class Webhook(ABC):
     
 
     def _get_message(self, message_format: WebhookMessage) -> dict:
-        if self.message_format.event_type == EventType.CREATED_REVIEW:
-            return self._get_message_by_created_review(message_format.title)
-        elif self.message_format.event_type == EventType.CHANGED_REVIEW_STATE:
-            return self._get_message_by_changed_review_state(message_format.title)
-        elif self.message_format.event_type == EventType.CHANGED_REVIEWER_STATE:
-            return self._get_message_by_changed_participant_state(message_format.title)
-        elif self.message_format.event_type == EventType.CREATED_COMMENT:
-            return self._get_message_by_created_discussion()
+        if message_format.event_type == EventType.CREATED_REVIEW:
+            return self._get_message_by_created_review(message_format)
+        elif message_format.event_type == EventType.UPDATED_REVIEW:
+            return self._get_message_by_updated_review(message_format)
+        elif message_format.event_type == EventType.CHANGED_REVIEW_STATE:
+            return self._get_message_by_changed_review_state(message_format)
+        elif message_format.event_type == EventType.CHANGED_REVIEWER_STATE:
+            return self._get_message_by_changed_participant_state(message_format)
+        elif message_format.event_type == EventType.CREATED_COMMENT:
+            return self._get_message_by_created_discussion(message_format)
         else:
-            raise Exception(f'{self.message_format.event_type}은 지원되지 않습니다.')
\ No newline at end of file
+            raise Exception(f'{message_format.event_type}은 지원되지 않습니다.')
\ No newline at end of file
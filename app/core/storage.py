@@ -0,0 +1,75 @@
+import asyncio
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+class SQLiteStore:
+    """
+    로컬 SQLite 파일을 사용하는 저장소의 공통 기반 클래스.
+    하위 클래스는 `schema`에 테이블 정의를 두고, 블로킹 I/O는 `asyncio.to_thread`로 실행합니다.
+    """
+    schema: list[str] = []
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    async def open(self) -> None:
+        await asyncio.to_thread(self._open)
+
+    def _open(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.schema:
+                self._conn.execute(statement)
+        self._on_open()
+
+    def _on_open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await asyncio.to_thread(self._conn.close)
+            self._conn = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # 여러 문장을 하나의 쓰기 트랜잭션으로 묶습니다. (블로킹, 스레드에서 호출)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    async def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        return await asyncio.to_thread(self._fetchone, sql, params)
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list[tuple[Any, ...]]:
+        return await asyncio.to_thread(self._fetchall, sql, params)
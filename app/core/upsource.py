@@ -1,17 +1,30 @@
+import asyncio
 import httpx
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.core.cache import SizedLRUCache, TTLCache
+from app.core import metrics
 from app.core.service import CodeReviewTool
 
+def _content_size(content: dict) -> int:
+    return len((content.get("result") or {}).get("text") or "") + 256
+
 class Upsource(CodeReviewTool):
+    backend = "upsource"
+    # 같은 (projectId, revisionId, fileName)의 내용은 바뀌지 않으므로 프로세스 전체에서 공유합니다.
+    content_cache = SizedLRUCache[tuple[str, str, str], dict](max_bytes=settings.UPSOURCE_CONTENT_CACHE_BYTES,
+                                                             sizeof=_content_size)
+    review_details_cache = TTLCache[tuple[str, str], dict](ttl=settings.UPSOURCE_REVIEW_DETAILS_TTL)
+    _pending_contents: dict[tuple[str, str, str], asyncio.Future] = {}
+
     def __init__(self, base_url: str,
                  username: str,
                  password: str,
-                 connect_timeout: float,
-                 read_timeout: float,
+                 client: httpx.AsyncClient,
                  project_id: str,
                  review_id: str,
                  revisions: list[str]):
-        super().__init__(base_url, username, password, connect_timeout, read_timeout)
+        super().__init__(base_url, username, password, client)
         self.project_id = project_id
         self.review_id = review_id
         self.revisions = revisions
@@ -21,28 +34,50 @@ class Upsource(CodeReviewTool):
 
     async def _post(self, path: str, payload: dict) -> dict:
         url = self._build_url(path)
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                url,
-                auth=(self.username, self.password),
-                json=payload,
-            )
-            try:
-                response.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                self.log.error(f"HTTP 오류 발생: {e.response.status_code} - {e.response.text}")
-                raise
-            return response.json()
+        response = await self.client.post(
+            url,
+            auth=(self.username, self.password),
+            json=payload,
+        )
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            self.log.error(f"HTTP 오류 발생: {e.response.status_code} - {e.response.text}")
+            raise
+        return response.json()
 
+    @metrics.instrumented("details")
     async def get_review_details(self) -> dict:
+        key = (self.project_id, self.review_id)
+        details = self.review_details_cache.get(key)
+        if details is not None:
+            return details
+
         self.log.info("Upsource 리뷰 상세 정보를 조회합니다.")
         payload = {
             "projectId": self.project_id,
             "reviewId": self.review_id,
         }
-        return await self._post("~rpc/getReviewDetails", payload)
+        details = await self._post("~rpc/getReviewDetails", payload)
+        self.review_details_cache.set(key, details)
+        return details
+
+    @metrics.instrumented("changes")
+    async def get_review_revisions(self) -> list[str]:
+        self.log.info("리뷰에 포함된 revision 목록을 조회합니다.")
+        payload = {
+            "projectId": self.project_id,
+            "reviewId": self.review_id,
+        }
+        response = await self._post("~rpc/getRevisionsInReview", payload)
+        revisions = response["result"].get("allRevisions", {}).get("revision", [])
+        return [revision["revisionId"] for revision in revisions]
 
-    async def get_file_changes(self) -> dict:
+    @metrics.instrumented("changes")
+    async def get_file_changes(self, revisions: Optional[list[str]] = None) -> dict:
+        """
+        리뷰의 변경 파일을 조회합니다. `revisions`가 주어지면 해당 revision들의 변경만 조회합니다.
+        """
         self.log.info("리뷰의 변경 파일 목록을 조회합니다.")
         payload = {
             "reviewId": {
@@ -50,22 +85,59 @@ class Upsource(CodeReviewTool):
                 "reviewId": self.review_id,
             },
             "revisions": {
-                "revisions": self.revisions,
-                "selectAll": True,
+                "revisions": revisions or self.revisions,
+                "selectAll": not revisions,
             },
         }
         return await self._post("~rpc/getReviewSummaryChanges", payload)
 
     async def get_code(self, file: Dict[str, str]) -> dict:
-        self.log.info(f"파일 '{file['fileName']}'의 코드 내용을 조회합니다.")
+        key = (file["projectId"], file["revisionId"], file["fileName"])
+        code = self.content_cache.get(key)
+        if code is not None:
+            return code
+
+        # 같은 파일을 동시에 요청하면 진행 중인 조회 결과를 함께 기다립니다.
+        pending = self._pending_contents.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch_code(key))
+            self._pending_contents[key] = pending
+            pending.add_done_callback(lambda _: self._pending_contents.pop(key, None))
+        return await asyncio.shield(pending)
+
+    @metrics.instrumented("code")
+    async def _fetch_code(self, key: tuple[str, str, str]) -> dict:
+        project_id, revision_id, file_name = key
+        self.log.info(f"파일 '{file_name}'의 코드 내용을 조회합니다.")
         payload = {
-            "projectId": file["projectId"],
-            "revisionId": file["revisionId"],
-            "fileName": file["fileName"],
+            "projectId": project_id,
+            "revisionId": revision_id,
+            "fileName": file_name,
         }
-        return await self._post("~rpc/getFileContent", payload)
+        code = await self._post("~rpc/getFileContent", payload)
+        self.content_cache.set(key, code)
+        return code
+
+    async def get_codes(self, files: list[Optional[Dict[str, str]]]) -> list[Optional[dict]]:
+        """
+        여러 파일의 내용을 `UPSOURCE_FETCH_CONCURRENCY`개씩 동시에 조회합니다.
+        결과는 입력 순서를 유지하며, None인 항목은 None을 반환합니다.
+        """
+        semaphore = asyncio.Semaphore(settings.UPSOURCE_FETCH_CONCURRENCY)
+
+        async def fetch(file: Optional[Dict[str, str]]) -> Optional[dict]:
+            if not file:
+                return None
+            async with semaphore:
+                return await self.get_code(file)
+
+        return await asyncio.gather(*(fetch(file) for file in files))
 
     async def add_comment(self, comments: list[str]) -> None:
+        await self.create_comment("\n\n".join(comments))
+
+    @metrics.instrumented("comment")
+    async def create_comment(self, comment: str) -> dict:
         self.log.info("AI 리뷰 코멘트를 Upsource에 등록합니다.")
         payload = {
             "anchor": {},
@@ -73,8 +145,23 @@ class Upsource(CodeReviewTool):
                 "projectId": self.project_id,
                 "reviewId": self.review_id,
             },
-            "text": "\n\n".join(comments),
+            "text": comment,
             "projectId": self.project_id,
             "labels": {"name": "ai-review"},
         }
-        await self._post("~rpc/createDiscussion", payload)
+        response = await self._post("~rpc/createDiscussion", payload)
+        first_comment = response["result"]["comments"][0]
+        return {"commentId": first_comment["commentId"], "timestamp": first_comment.get("date")}
+
+    @metrics.instrumented("comment_update")
+    async def update_comment(self, comment_id: dict, comment: str) -> None:
+        payload = {
+            "projectId": self.project_id,
+            "commentId": comment_id["commentId"],
+            "text": comment,
+            "timestamp": comment_id["timestamp"],
+        }
+        await self._post("~rpc/updateComment", payload)
+
+    async def add_review_comment(self, comments: list[str]) -> None:
+        await self.add_comment(comments)
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, Response, Request
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.routing import APIRoute
-from starlette.background import BackgroundTask
-from starlette.types import Message
 
 from app.api.main import api_router
+from app.api.middleware import HttpLoggingMiddleware
 from app.config import settings
+from app.core.cache import review_cache
+from app.core.dispatcher import notification_dispatcher
+from app.core.http import http_clients
+from app.core.job_queue import ReviewWorkerPool, review_queue
+from app.core.pipeline import NOTIFICATIONS, PIPELINES
+from app.core.review_state import review_state
 from app.logger import get_logger
 
 log = get_logger('review-bot')
@@ -12,33 +19,44 @@ log = get_logger('review-bot')
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_clients.start()
+    await review_queue.open()
+    await review_cache.open()
+    await review_state.open()
+    await notification_dispatcher.start()
+    workers = ReviewWorkerPool(queue=review_queue,
+                               handlers=PIPELINES,
+                               size=settings.REVIEW_WORKERS)
+    # 알림 작업은 발송될 때까지 완료되지 않으므로, digest로 모으는 동안 기다리는 작업만큼 워커를 더 둡니다.
+    digest_waiters = settings.NOTIFICATION_DIGEST_MAX_EVENTS if settings.NOTIFICATION_DIGEST_WINDOW > 0 else 0
+    notification_workers = ReviewWorkerPool(queue=review_queue,
+                                            handlers=NOTIFICATIONS,
+                                            size=settings.NOTIFICATION_WORKERS + digest_waiters,
+                                            kind="notification")
+    workers.start()
+    notification_workers.start()
+    yield
+    await workers.stop(timeout=settings.REVIEW_WORKER_SHUTDOWN_TIMEOUT)
+    # 알림 워커는 발송기가 남은 알림(digest 포함)을 보내고 결과를 알려줄 때까지 작업을 완료하지 않습니다.
+    # 보내지 못한 알림 작업은 큐에 남아 재시작 후 다시 발송합니다.
+    stopping = asyncio.create_task(notification_workers.stop(timeout=settings.NOTIFICATION_SHUTDOWN_TIMEOUT))
+    await notification_dispatcher.stop(timeout=settings.NOTIFICATION_SHUTDOWN_TIMEOUT)
+    await stopping
+    await review_queue.close()
+    await review_cache.close()
+    await review_state.close()
+    await http_clients.close()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
 
 app.include_router(api_router)
-
-async def set_body(request: Request, body: bytes):
-    async def receive() -> Message:
-        return {'type': 'http.request', 'body': body}
-    request._receive = receive
-
-def log_http(req_body, res_body):
-    log.debug(f"request body: {req_body.decode('utf-8')}")
-    log.debug(f"response body: {res_body.decode('utf-8')}")
-
-@app.middleware('http')
-async def some_middleware(request: Request, call_next):
-    req_body = await request.body()
-    await set_body(request, req_body)
-    response = await call_next(request)
-    
-    res_body = b''
-    async for chunk in response.body_iterator:
-        res_body += chunk
-    
-    task = BackgroundTask(log_http, req_body, res_body)
-    return Response(content=res_body, status_code=response.status_code, 
-        headers=dict(response.headers), media_type=response.media_type, background=task)
\ No newline at end of file
+app.add_middleware(HttpLoggingMiddleware,
+                   max_body_bytes=settings.HTTP_LOG_MAX_BODY_BYTES,
+                   sample_rate=settings.HTTP_LOG_SAMPLE_RATE)
@@ -0,0 +1,168 @@
+"""
+webhook 이벤트 디코딩 마이크로벤치마크.
+기록해 둔 이벤트(부하 테스트와 같은 JSONL) 또는 합성 이벤트(큰 GitLab MR 이벤트 포함)를
+`json.loads` + dict 접근과 `app.core.events.decode()`로 각각 해석해 이벤트당 시간(µs), 처리량(MB/s),
+디코딩 결과를 큐에 보관할 때의 메모리를 비교합니다. `WebhookMessage`(slots)와 `__dict__` 기반 객체의 크기도 함께 출력합니다.
+
+    python -m benchmarks.decode --repeat 2000
+    python -m benchmarks.decode --events-file recorded.jsonl --output decode.json
+"""
+import argparse
+import dataclasses
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+# app 설정을 읽기 위해 필요한 값 (디코딩 결과에는 영향이 없습니다)
+for name, value in {"CODE_REVIEW_TOOL": "github", "GITHUB_BASE_URL": "http://127.0.0.1:9/github",
+                    "GITHUB_ACCESS_TOKEN": "bench", "OPENAI_API_KEYS": "sk-bench-0001", "OPENAI_MODEL": "gpt-4o-mini",
+                    "REVIEW_FILES_RAW": "py", "WEBHOOK": "slack", "WEBHOOK_URI": "http://127.0.0.1:9/webhook"}.items():
+    os.environ.setdefault(name, value)
+
+from app.core import events
+from app.core.delivery import review_key
+from app.core.model import EventType, WebhookMessage, get_event_type
+from benchmarks.load_test import load_events, synthetic_event
+
+def large_gitlab_event(commits: int, changed_lines: int) -> dict:
+    """
+    `changes`/`commits`처럼 리뷰 봇이 쓰지 않는 큰 필드를 가진 GitLab MR 이벤트를 만듭니다.
+    """
+    payload = synthetic_event("gitlab", 0).payload
+    description = "\n".join(f"- change {line}: " + "x" * 60 for line in range(changed_lines))
+    payload["object_attributes"].update({
+        "description": description,
+        "labels": [{"id": label, "title": f"label-{label}", "color": "#ffffff"} for label in range(20)],
+    })
+    payload["changes"] = {"description": {"previous": description[: len(description) // 2], "current": description}}
+    payload["commits"] = [{
+        "id": f"{commit:040x}",
+        "message": f"commit {commit}\n\n" + "y" * 200,
+        "timestamp": "2025-01-01T00:00:00+00:00",
+        "author": {"name": "bench", "email": "bench@example.invalid"},
+        "added": [f"src/file_{commit}_{index}.py" for index in range(5)],
+        "modified": [f"src/module_{commit}.py"],
+        "removed": [],
+    } for commit in range(commits)]
+    return payload
+
+def dict_access(source: str, payload: dict) -> tuple:
+    """
+    디코딩 전의 dict 기반 처리에서 webhook 라우트가 읽던 필드.
+    """
+    if source == "github":
+        pull_request = payload.get("pull_request", {})
+        return (payload["action"], payload["repository"]["full_name"], payload["sender"]["login"],
+                pull_request.get("number"), pull_request.get("head", {}).get("sha"))
+    if source == "gitlab":
+        attributes = payload["object_attributes"]
+        return (payload["event_type"], payload["project"]["id"], attributes.get("iid"), attributes.get("action"),
+                attributes.get("oldrev"), attributes.get("last_commit", {}).get("id"))
+    data = payload["data"]
+    return payload["projectId"], payload["dataType"], data["base"]["reviewId"], data.get("revisions")
+
+def typed_access(source: str, event: events.Event) -> tuple:
+    event_type = get_event_type(source, event)
+    return event_type, review_key(source, event)
+
+def timeit(function: Callable[[], Any], repeat: int) -> float:
+    """
+    `function`을 `repeat`번 실행하는 시간을 5회 측정해 가장 빠른 값(초)을 돌려줍니다.
+    """
+    timings = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def retained_bytes(build: Callable[[], Any], count: int) -> int:
+    """
+    `build()` 결과 `count`개를 동시에 보관할 때 늘어나는 메모리(bytes).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+def measure(name: str, source: str, payload: dict, repeat: int) -> dict[str, Any]:
+    body = json.dumps(payload).encode()
+    baseline = timeit(lambda: dict_access(source, json.loads(body)), repeat)
+    typed = timeit(lambda: typed_access(source, events.decode(source, body)), repeat)
+    keep = max(1, min(repeat, 200))
+    return {
+        "name": name,
+        "source": source,
+        "bytes": len(body),
+        "json_us": round(baseline / repeat * 1e6, 2),
+        "typed_us": round(typed / repeat * 1e6, 2),
+        "json_mb_per_s": round(len(body) * repeat / baseline / 1e6, 1),
+        "typed_mb_per_s": round(len(body) * repeat / typed / 1e6, 1),
+        "speedup": round(baseline / typed, 2),
+        # 큐에 넣을 때까지 이벤트를 들고 있는 동안의 메모리 (이벤트당)
+        "json_retained_bytes": retained_bytes(lambda: json.loads(body), keep) // keep,
+        "typed_retained_bytes": retained_bytes(lambda: events.decode(source, body), keep) // keep,
+    }
+
+def message_size(count: int) -> dict[str, Any]:
+    """
+    slots를 쓰는 `WebhookMessage`와 같은 필드의 `__dict__` 기반 객체의 메모리를 비교합니다.
+    """
+    fields = [(field.name, field.type, field) for field in dataclasses.fields(WebhookMessage)]
+    legacy = dataclasses.make_dataclass("DictWebhookMessage", fields)
+    values = dict(title="bench/repo", project_name="repo", event_type=EventType.CREATED_REVIEW,
+                  actor_name="bench", reviewers="alice, bob", review_id="1",
+                  url="https://github.invalid/bench/repo/pull/1")
+    return {
+        "slots_bytes": retained_bytes(lambda: WebhookMessage(**values), count) // count,
+        "dict_bytes": retained_bytes(lambda: legacy(**values), count) // count,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events-file", help="기록해 둔 이벤트(JSONL: {\"source\", \"headers\", \"payload\"} 또는 payload)")
+    parser.add_argument("--source", default="github", choices=sorted(events.EVENT_TYPES),
+                        help="--events-file의 줄에 source가 없을 때 사용할 source")
+    parser.add_argument("--repeat", type=int, default=1000, help="이벤트마다 디코딩할 횟수")
+    parser.add_argument("--commits", type=int, default=500, help="합성 GitLab MR 이벤트의 commits 수")
+    parser.add_argument("--changed-lines", type=int, default=2000, help="합성 GitLab MR 이벤트의 changes 크기(줄)")
+    parser.add_argument("--output", help="결과(JSON)를 저장할 경로")
+    args = parser.parse_args()
+
+    if args.events_file:
+        samples = [(f"{event.source}#{index}", event.source, event.payload)
+                   for index, event in enumerate(load_events(args.events_file, args.source))]
+    else:
+        samples = [(source, source, synthetic_event(source, 0).payload) for source in sorted(events.EVENT_TYPES)]
+        samples.append(("gitlab-large", "gitlab", large_gitlab_event(args.commits, args.changed_lines)))
+
+    results = [measure(name, source, payload, args.repeat) for name, source, payload in samples]
+    for result in results:
+        print(f"{result['name']:>14} {result['bytes']:>9}B  json {result['json_us']:>9.2f}µs "
+              f"({result['json_mb_per_s']:>6.1f}MB/s)  typed {result['typed_us']:>9.2f}µs "
+              f"({result['typed_mb_per_s']:>6.1f}MB/s)  x{result['speedup']:<5}  "
+              f"retained {result['json_retained_bytes']}B -> {result['typed_retained_bytes']}B", file=sys.stderr)
+    summary = {
+        "events": results,
+        "typed_us_median": statistics.median(result["typed_us"] for result in results),
+        "json_us_median": statistics.median(result["json_us"] for result in results),
+        "webhook_message": message_size(max(1, args.repeat)),
+    }
+    print(f"WebhookMessage {summary['webhook_message']['dict_bytes']}B (__dict__) -> "
+          f"{summary['webhook_message']['slots_bytes']}B (slots)", file=sys.stderr)
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+리뷰 봇 부하/재생 테스트.
+로컬 백엔드 대역(`benchmarks.mock_backends`)을 별도 프로세스로 띄우고 같은 프로세스에서 앱을 실행한 뒤,
+합성하거나 기록해 둔 webhook 이벤트를 지정한 속도로 보내 지연 시간과 처리량을 측정합니다.
+저장소 루트에서 실행합니다.
+
+    python -m benchmarks.load_test --source github --events 200 --rate 20 --latency openai=1.5
+    python -m benchmarks.load_test --events-file recorded.jsonl --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Optional
+import httpx
+from benchmarks import mock_backends
+
+WEBHOOK_METHODS = {"github": "POST", "gitlab": "GET", "upsource": "GET"}
+
+# 기준 결과와 비교할 지표 (경로, 클수록 좋은지)
+COMPARED_METRICS = [
+    (("webhook_latency", "p50"), False),
+    (("webhook_latency", "p99"), False),
+    (("review_latency", "p50"), False),
+    (("review_latency", "p95"), False),
+    (("review_latency", "p99"), False),
+    (("reviews", "per_second"), True),
+    (("event_loop_lag", "p99"), False),
+    (("event_loop_lag", "max"), False),
+    (("peak_rss_mb",), False),
+]
+
+@dataclass
+class Event:
+    source: str
+    payload: dict
+    headers: dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class Sent:
+    status_code: int
+    latency: float
+    job_id: Optional[int] = None
+    duplicate: bool = False
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentiles(values: list[float], scale: float = 1.0) -> dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(p: float) -> float:
+        return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * scale, 3)
+
+    return {"count": len(ordered), "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": round(ordered[-1] * scale, 3)}
+
+def synthetic_event(source: str, index: int) -> Event:
+    """
+    `index`마다 서로 다른 PR/MR/리뷰를 여는 이벤트를 만듭니다.
+    """
+    number = index + 1
+    if source == "github":
+        return Event(source, headers={"X-GitHub-Delivery": str(uuid.uuid4())}, payload={
+            "action": "opened",
+            "number": number,
+            "repository": {"full_name": "bench/repo", "name": "repo", "html_url": "https://github.invalid/bench/repo"},
+            "sender": {"login": "bench"},
+            "organization": {"login": "bench"},
+            "pull_request": {
+                "id": number,
+                "number": number,
+                "html_url": f"https://github.invalid/bench/repo/pull/{number}",
+                "head": {"sha": f"{number:040x}"},
+                "requested_reviewers": [],
+            },
+        })
+    if source == "gitlab":
+        return Event(source, headers={"X-Gitlab-Event-UUID": str(uuid.uuid4())}, payload={
+            "event_type": "merge_request",
+            "object_kind": "merge_request",
+            "project": {"id": 1, "name": "repo", "path_with_namespace": "bench/repo"},
+            "user": {"name": "bench"},
+            "reviewers": [],
+            "object_attributes": {
+                "iid": number,
+                "action": "open",
+                "source_branch": f"feature-{number}",
+                "target_branch": "main",
+                "url": f"https://gitlab.invalid/bench/repo/-/merge_requests/{number}",
+                "last_commit": {"id": f"{number:040x}"},
+            },
+        })
+    if source == "upsource":
+        return Event(source, payload={
+            "projectId": "bench",
+            "dataType": "ReviewCreatedFeedEventBean",
+            "data": {
+                "base": {
+                    "reviewId": f"BENCH-{number}",
+                    "actor": {"userName": "bench"},
+                    "userIds": [],
+                    "feedEventId": f"bench-{number}",
+                },
+                "revisions": [f"BENCH-{number}-r1"],
+            },
+        })
+    raise Exception(f"{source}는 지원되지 않습니다.")
+
+def load_events(path: str, default_source: str) -> list[Event]:
+    """
+    기록해 둔 이벤트(JSONL)를 읽습니다. 각 줄은 `{"source", "headers", "payload"}` 이거나 webhook payload 자체입니다.
+    """
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "payload" in record:
+                events.append(Event(record.get("source", default_source), record["payload"], record.get("headers", {})))
+            else:
+                events.append(Event(default_source, record))
+    return events
+
+def configure_environment(args: argparse.Namespace, mock_url: str, data_dir: str) -> None:
+    """
+    앱 설정을 import 하기 전에 모든 backend를 로컬 대역으로 향하게 합니다. `--env`로 준 값이 우선합니다.
+    """
+    sources = {args.source} | {event.source for event in args.replay}
+    if len(sources) > 1:
+        raise SystemExit(f"한 번에 하나의 source만 실행할 수 있습니다: {', '.join(sorted(sources))}")
+
+    environment = {
+        "CODE_REVIEW_TOOL": sources.pop(),
+        "GITHUB_BASE_URL": f"{mock_url}/github",
+        "GITHUB_API_URL": f"{mock_url}/github",
+        "GITHUB_ACCESS_TOKEN": "bench",
+        "GITLAB_BASE_URL": f"{mock_url}/gitlab",
+        "GITLAB_ACCESS_TOKEN": "bench",
+        "UPSOURCE_BASE_URL": f"{mock_url}/upsource",
+        "UPSOURCE_USERNAME": "bench",
+        "UPSOURCE_PASSWORD": "bench",
+        "OPENAI_BASE_URL": f"{mock_url}/openai/v1",
+        "OPENAI_API_KEYS": ",".join(f"sk-bench-{index:04d}" for index in range(args.keys)),
+        "OPENAI_MODEL": "gpt-4o-mini",
+        "REVIEW_FILES_RAW": "py,java",
+        "WEBHOOK": args.webhook,
+        "WEBHOOK_URI": f"{mock_url}/webhook/{args.webhook}",
+        "REVIEW_QUEUE_PATH": os.path.join(data_dir, "review-queue.db"),
+        "REVIEW_STATE_PATH": os.path.join(data_dir, "review-state.db"),
+        "REVIEW_CACHE_PATH": os.path.join(data_dir, "review-cache.db"),
+        "REVIEW_CACHE_ENABLED": "false",
+        "REVIEW_DEBOUNCE_SECONDS": "0",
+        "REVIEW_QUEUE_POLL_INTERVAL": "0.1",
+        "HTTP_WARMUP": "false",
+    }
+    for value in args.env or []:
+        name, _, setting = value.partition("=")
+        environment[name] = setting
+    os.environ.update(environment)
+
+def start_mock_backends(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.mock_backends", "--port", str(port),
+               "--files", str(args.files), "--patch-lines", str(args.patch_lines),
+               "--completion-tokens", str(args.completion_tokens), "--token-interval", str(args.token_interval)]
+    for value in args.latency or []:
+        command += ["--latency", value]
+    for value in args.error_rate or []:
+        command += ["--error-rate", value]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    return subprocess.Popen(command)
+
+async def wait_until_ready(url: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                (await client.get(url)).raise_for_status()
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+async def monitor_event_loop(samples: list[float], interval: float) -> None:
+    """
+    `interval`초 sleep이 실제로 얼마나 늦게 깨어나는지(event loop가 막힌 시간)를 기록합니다.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+async def replay(client: httpx.AsyncClient, app_url: str, events: list[Event], rate: float) -> list[Sent]:
+    """
+    이벤트를 `rate`개/초 간격으로 보냅니다. 응답을 기다리지 않고 일정한 간격으로 보내므로(open loop)
+    앱이 느려져도 보내는 속도는 줄지 않습니다.
+    """
+    async def send(event: Event) -> Sent:
+        started = time.perf_counter()
+        try:
+            response = await client.request(WEBHOOK_METHODS[event.source], f"{app_url}/webhooks/{event.source}",
+                                            headers=event.headers, json=event.payload)
+        except httpx.HTTPError:
+            return Sent(status_code=0, latency=time.perf_counter() - started)
+        latency = time.perf_counter() - started
+        body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+        return Sent(status_code=response.status_code, latency=latency,
+                    job_id=body.get("job_id"), duplicate=body.get("status") == "duplicate")
+
+    started = time.monotonic()
+    tasks = []
+    for index, event in enumerate(events):
+        await asyncio.sleep(max(0.0, started + index / rate - time.monotonic()))
+        tasks.append(asyncio.create_task(send(event)))
+    return await asyncio.gather(*tasks)
+
+async def wait_for_drain(client: httpx.AsyncClient, app_url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = (await client.get(f"{app_url}/status/queue")).json()
+        if stats["depth"] == 0:
+            return True
+        await asyncio.sleep(0.2)
+    return False
+
+def job_timings(path: str, job_ids: set[int]) -> list[tuple[str, float, Optional[float], Optional[float]]]:
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute("SELECT id, status, created_at, started_at, finished_at FROM jobs").fetchall()
+    return [(status, created_at, started_at, finished_at)
+            for job_id, status, created_at, started_at, finished_at in rows if job_id in job_ids]
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    mock_port, app_port = free_port(), free_port()
+    mock_url, app_url = f"http://127.0.0.1:{mock_port}", f"http://127.0.0.1:{app_port}"
+    data_dir = tempfile.mkdtemp(prefix="review-bot-bench-")
+    configure_environment(args, mock_url, data_dir)
+    os.makedirs("logs", exist_ok=True)
+
+    mock = start_mock_backends(args, mock_port)
+    try:
+        await wait_until_ready(f"{mock_url}/_stats")
+
+        # 설정이 환경 변수를 읽은 뒤에 앱을 import 합니다.
+        import logging
+        import uvicorn
+        from app.main import app
+
+        for name in ("root", "review-bot", "notification", "code-review-tool", "openai"):
+            logging.getLogger(None if name == "root" else name).setLevel(args.log_level)
+
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=app_port,
+                                               log_level="warning", access_log=False))
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            if server_task.done():
+                server_task.result()
+                raise SystemExit("앱을 시작하지 못했습니다.")
+            await asyncio.sleep(0.05)
+
+        events = args.replay[:args.events] if args.replay else \
+            [synthetic_event(args.source, index) for index in range(args.events)]
+        lag_samples: list[float] = []
+        monitor = asyncio.create_task(monitor_event_loop(lag_samples, args.lag_interval))
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            started = time.time()
+            sent = await replay(client, app_url, events, args.rate)
+            drained = await wait_for_drain(client, app_url, args.timeout)
+            elapsed = time.time() - started
+            backend_stats = (await client.get(f"{mock_url}/_stats")).json()
+        monitor.cancel()
+
+        server.should_exit = True
+        await server_task
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    job_ids = {result.job_id for result in sent if result.job_id is not None and not result.duplicate}
+    jobs = job_timings(os.environ["REVIEW_QUEUE_PATH"], job_ids)
+    done = [job for job in jobs if job[0] == "done"]
+    finished = [finished_at for _, _, _, finished_at in done]
+    span = max(finished) - min(created_at for _, created_at, _, _ in done) if done else 0.0
+
+    return {
+        "config": {
+            "source": os.environ["CODE_REVIEW_TOOL"],
+            "events": len(events),
+            "rate": args.rate,
+            "keys": args.keys,
+            "webhook": args.webhook,
+            "latency": mock_backends.parse_pairs(args.latency),
+            "error_rate": mock_backends.parse_pairs(args.error_rate),
+            "env": args.env or [],
+        },
+        "duration": round(elapsed, 3),
+        "drained": drained,
+        "events": {
+            "sent": len(sent),
+            "accepted": sum(1 for result in sent if result.status_code == 202 and not result.duplicate),
+            "duplicate": sum(1 for result in sent if result.duplicate),
+            # backlog 한도를 넘어 거절된 이벤트 (429/503 + Retry-After)
+            "rejected": sum(1 for result in sent if result.status_code in (429, 503)),
+            "errors": sum(1 for result in sent if result.status_code not in (202, 429, 503)),
+        },
+        # 초 단위
+        "webhook_latency": percentiles([result.latency for result in sent]),
+        "queue_wait": percentiles([started_at - created_at for _, created_at, started_at, _ in jobs if started_at]),
+        "review_latency": percentiles([finished_at - created_at for _, created_at, _, finished_at in done]),
+        "reviews": {
+            "done": len(done),
+            "failed": sum(1 for job in jobs if job[0] == "failed"),
+            "superseded": sum(1 for job in jobs if job[0] == "superseded"),
+            "unfinished": sum(1 for job in jobs if job[0] in ("pending", "running")),
+            "per_second": round(len(done) / span, 3) if span else None,
+        },
+        # 밀리초 단위
+        "event_loop_lag": percentiles(lag_samples, scale=1000),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "backends": backend_stats,
+    }
+
+def compare(report: dict[str, Any], baseline: dict[str, Any]) -> list[dict[str, Any]]:
+    rows = []
+    for path, higher_is_better in COMPARED_METRICS:
+        current, before = report, baseline
+        for key in path:
+            current = current.get(key) if isinstance(current, dict) else None
+            before = before.get(key) if isinstance(before, dict) else None
+        if current is None or before is None:
+            continue
+        change = (current - before) / before if before else 0.0
+        rows.append({
+            "metric": ".".join(path),
+            "baseline": before,
+            "current": current,
+            "change": round(change, 3),
+            "regression": round(-change if higher_is_better else change, 3),
+        })
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=sorted(WEBHOOK_METHODS), default="github",
+                        help="합성 이벤트의 source (기록된 이벤트에 source가 없을 때도 사용)")
+    parser.add_argument("--events", type=int, default=100, help="보낼 이벤트 수")
+    parser.add_argument("--rate", type=float, default=10.0, help="초당 보낼 이벤트 수")
+    parser.add_argument("--events-file", help="재생할 이벤트(JSONL). 주지 않으면 합성 이벤트를 사용합니다.")
+    parser.add_argument("--keys", type=int, default=2, help="OpenAI API 키 수")
+    parser.add_argument("--webhook", choices=["slack", "discord", "google-chat"], default="slack")
+    parser.add_argument("--env", action="append", metavar="NAME=VALUE", help="앱 설정 덮어쓰기 (예: REVIEW_WORKERS=8)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="큐가 비워지기를 기다리는 최대 시간(초)")
+    parser.add_argument("--lag-interval", type=float, default=0.05, help="event loop 지연 측정 간격(초)")
+    parser.add_argument("--log-level", default="WARNING", help="앱 로그 레벨")
+    parser.add_argument("--output", help="결과(JSON)를 저장할 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과(JSON)")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="기준 결과보다 이 비율 이상 나빠진 지표가 있으면 실패(exit 1)로 끝냅니다. (예: 0.1)")
+    mock_backends.add_arguments(parser)
+    args = parser.parse_args()
+    args.replay = load_events(args.events_file, args.source) if args.events_file else []
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    regressions = [row for row in report.get("comparison", [])
+                   if args.max_regression is not None and row["regression"] > args.max_regression]
+    for row in regressions:
+        print(f"성능 저하: {row['metric']} {row['baseline']} -> {row['current']} ({row['change']:+.1%})", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+부하 테스트용 로컬 백엔드 대역.
+GitHub/GitLab/Upsource API, OpenAI chat completions, Slack/Discord/Google Chat webhook을
+하나의 서버에서 `/<backend>/...` 경로로 흉내 내며, backend별 지연 시간과 오류율을 지정할 수 있습니다.
+
+    python -m benchmarks.mock_backends --port 9100 --latency openai=1.5 --error-rate openai=0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import AsyncIterator, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+BACKENDS = ("github", "gitlab", "upsource", "openai", "webhook")
+
+# 오류를 주입할 때 backend별로 돌려주는 상태 코드
+ERROR_STATUS = {"openai": 429, "webhook": 429}
+
+FILE_PATH_PATTERN = re.compile(r"[\w./-]+\.(?:py|java|kt|js|ts|go)\b")
+
+def synthetic_patch(index: int, lines: int) -> str:
+    added = [f"+    value_{index}_{line} = compute({line})  # changed" for line in range(lines)]
+    context = [f"     context_{line}()" for line in range(3)]
+    return "\n".join([f"@@ -1,3 +1,{3 + lines} @@", *context, *added])
+
+def synthetic_source(index: int, lines: int) -> str:
+    body = "\n".join(f"        int value{line} = compute({line});" for line in range(lines))
+    return f"class Module{index} {{\n    void run() {{\n{body}\n    }}\n}}\n"
+
+def parse_pairs(values: Optional[list[str]], type_=float) -> dict:
+    """
+    `backend=value` 형식의 인자 목록을 dict로 바꿉니다. backend를 생략하면(`value`) 모든 backend에 적용합니다.
+    """
+    pairs = {}
+    for value in values or []:
+        name, _, number = value.rpartition("=")
+        for backend in ([name] if name else BACKENDS):
+            if backend not in BACKENDS:
+                raise ValueError(f"{backend}는 지원되지 않습니다. ({', '.join(BACKENDS)})")
+            pairs[backend] = type_(number)
+    return pairs
+
+def create_app(latency: Optional[dict[str, float]] = None,
+               error_rate: Optional[dict[str, float]] = None,
+               files: int = 4,
+               patch_lines: int = 40,
+               completion_tokens: int = 200,
+               token_interval: float = 0.0,
+               seed: Optional[int] = None) -> FastAPI:
+    """
+    `latency`는 backend별 평균 응답 지연(초, ±50% 무작위), `error_rate`는 backend별 오류 응답 비율입니다.
+    `completion_tokens`는 OpenAI 응답의 토큰(단어) 수이며, 스트리밍 응답은 토큰마다 `token_interval`초씩 나눠 보냅니다.
+    """
+    latency = latency or {}
+    error_rate = error_rate or {}
+    rng = random.Random(seed)
+    requests = Counter()
+    errors = Counter()
+    app = FastAPI(title="code-review-bot mock backends")
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        backend = request.url.path.strip("/").split("/", 1)[0]
+        if backend not in BACKENDS:
+            return await call_next(request)
+
+        requests[backend] += 1
+        delay = latency.get(backend, 0.0)
+        if delay:
+            await asyncio.sleep(delay * rng.uniform(0.5, 1.5))
+        if rng.random() < error_rate.get(backend, 0.0):
+            errors[backend] += 1
+            return JSONResponse(status_code=ERROR_STATUS.get(backend, 503),
+                                content={"message": "injected error"},
+                                headers={"Retry-After": "1"})
+        return await call_next(request)
+
+    @app.get("/_stats")
+    async def stats():
+        return {"requests": dict(requests), "errors": dict(errors)}
+
+    # GitHub (PyGithub가 응답의 url을 그대로 따라가므로 같은 host/prefix의 절대 경로를 돌려줍니다)
+    def github_url(request: Request, path: str) -> str:
+        return f"{str(request.base_url).rstrip('/')}/github/{path}"
+
+    def github_repo(request: Request, owner: str, repo: str) -> dict:
+        return {
+            "id": abs(hash(f"{owner}/{repo}")) % 10 ** 8,
+            "name": repo,
+            "full_name": f"{owner}/{repo}",
+            "owner": {"login": owner},
+            "url": github_url(request, f"repos/{owner}/{repo}"),
+            "html_url": f"https://github.invalid/{owner}/{repo}",
+        }
+
+    def github_files(number: int) -> list[dict]:
+        return [
+            {
+                "sha": f"{number:08x}{index:032x}",
+                "filename": f"src/module_{number}_{index}.py",
+                "status": "modified",
+                "additions": patch_lines,
+                "deletions": 0,
+                "changes": patch_lines,
+                "patch": synthetic_patch(index, patch_lines),
+            }
+            for index in range(files)
+        ]
+
+    @app.get("/github/repos/{owner}/{repo}")
+    async def github_get_repo(request: Request, owner: str, repo: str):
+        return github_repo(request, owner, repo)
+
+    @app.get("/github/repos/{owner}/{repo}/pulls/{number}")
+    async def github_get_pull(request: Request, owner: str, repo: str, number: int):
+        return {
+            "id": number,
+            "number": number,
+            "state": "open",
+            "url": github_url(request, f"repos/{owner}/{repo}/pulls/{number}"),
+            "issue_url": github_url(request, f"repos/{owner}/{repo}/issues/{number}"),
+            "html_url": f"https://github.invalid/{owner}/{repo}/pull/{number}",
+            "head": {"sha": f"{number:040x}", "ref": f"feature-{number}"},
+            "base": {"sha": "0" * 40, "ref": "main"},
+        }
+
+    @app.get("/github/repos/{owner}/{repo}/pulls/{number}/files")
+    async def github_get_files(number: int):
+        return github_files(number)
+
+    @app.get("/github/repos/{owner}/{repo}/compare/{spec}")
+    async def github_compare(spec: str):
+        head = spec.split("...")[-1]
+        number = int(head, 16) if re.fullmatch(r"[0-9a-f]+", head) else 0
+        return {"status": "ahead", "files": github_files(number)}
+
+    @app.get("/github/repos/{owner}/{repo}/commits/{sha}")
+    async def github_get_commit(request: Request, owner: str, repo: str, sha: str):
+        return {"sha": sha, "url": github_url(request, f"repos/{owner}/{repo}/commits/{sha}")}
+
+    @app.post("/github/repos/{owner}/{repo}/pulls/{number}/reviews")
+    async def github_create_review(number: int):
+        return {"id": number, "state": "COMMENTED"}
+
+    @app.post("/github/repos/{owner}/{repo}/issues/{number}/comments")
+    async def github_create_comment(number: int):
+        return {"id": number, "body": ""}
+
+    @app.get("/github/orgs/{org}/members")
+    async def github_members():
+        return []
+
+    # GitLab
+    def gitlab_changes(iid: int) -> list[dict]:
+        return [
+            {
+                "old_path": f"src/module_{iid}_{index}.py",
+                "new_path": f"src/module_{iid}_{index}.py",
+                "diff": synthetic_patch(index, patch_lines),
+            }
+            for index in range(files)
+        ]
+
+    @app.get("/gitlab/api/v4/projects/{project_id}/merge_requests/{iid}")
+    async def gitlab_get_merge_request(iid: int):
+        return {"iid": iid, "title": f"bench MR {iid}", "state": "opened"}
+
+    @app.get("/gitlab/api/v4/projects/{project_id}/merge_requests/{iid}/changes")
+    async def gitlab_get_changes(iid: int):
+        return {"iid": iid, "changes": gitlab_changes(iid)}
+
+    @app.get("/gitlab/api/v4/projects/{project_id}/repository/merge_base")
+    async def gitlab_merge_base(request: Request):
+        # 합성 이벤트의 커밋은 한 줄로 이어진 이력이라고 가정합니다.
+        return {"id": request.query_params.getlist("refs[]")[0]}
+
+    @app.get("/gitlab/api/v4/projects/{project_id}/repository/compare")
+    async def gitlab_compare(to: str = ""):
+        iid = int(to, 16) if re.fullmatch(r"[0-9a-f]+", to) else 0
+        return {"diffs": gitlab_changes(iid)}
+
+    @app.post("/gitlab/api/v4/projects/{project_id}/merge_requests/{iid}/notes")
+    async def gitlab_create_note():
+        return {"id": rng.randrange(1, 10 ** 9)}
+
+    @app.put("/gitlab/api/v4/projects/{project_id}/merge_requests/{iid}/notes/{note_id}")
+    async def gitlab_update_note(note_id: int):
+        return {"id": note_id}
+
+    # Upsource
+    @app.post("/upsource/~rpc/{method}")
+    async def upsource_rpc(request: Request, method: str):
+        payload = await request.json()
+        if method == "getReviewDetails":
+            return {"result": {"title": f"bench review {payload.get('reviewId')}"}}
+        if method == "getRevisionsInReview":
+            return {"result": {"allRevisions": {"revision": [{"revisionId": f"{payload.get('reviewId')}-r1"}]}}}
+        if method == "getReviewSummaryChanges":
+            project_id = payload["reviewId"]["projectId"]
+            review_id = payload["reviewId"]["reviewId"]
+            diff = [
+                {
+                    "oldFile": {"projectId": project_id, "revisionId": f"{review_id}-r0",
+                                "fileName": f"src/Module{index}.java"},
+                    "newFile": {"projectId": project_id, "revisionId": f"{review_id}-r1",
+                                "fileName": f"src/Module{index}.java"},
+                }
+                for index in range(files)
+            ]
+            return {"result": {"diff": {"diff": diff}}}
+        if method == "getFileContent":
+            index = int(re.sub(r"\D", "", payload.get("fileName", "")) or 0)
+            revision_lines = patch_lines + (1 if str(payload.get("revisionId", "")).endswith("-r1") else 0)
+            return {"result": {"text": synthetic_source(index, revision_lines)}}
+        if method == "createDiscussion":
+            return {"result": {"discussionId": f"d{rng.randrange(10 ** 9)}",
+                               "comments": [{"commentId": f"c{rng.randrange(10 ** 9)}", "date": int(time.time() * 1000)}]}}
+        if method == "updateComment":
+            return {"result": {}}
+        return JSONResponse(status_code=404, content={"error": {"message": f"{method}는 지원되지 않습니다."}})
+
+    # OpenAI
+    def review_content(body: dict) -> str:
+        if not body.get("response_format"):
+            words = " ".join(f"리뷰{index}" for index in range(completion_tokens))
+            return f"### 리뷰\n{words}"
+
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        paths = list(dict.fromkeys(FILE_PATH_PATTERN.findall(prompt))) or ["unknown.py"]
+        per_comment = max(1, completion_tokens // len(paths))
+        comments = [
+            {"path": path, "line": 4, "body": " ".join(f"리뷰{index}" for index in range(per_comment))}
+            for path in paths
+        ]
+        return json.dumps({"comments": comments}, ensure_ascii=False)
+
+    def rate_limit_headers() -> dict[str, str]:
+        return {
+            "x-ratelimit-limit-requests": "10000",
+            "x-ratelimit-limit-tokens": "10000000",
+            "x-ratelimit-remaining-requests": "9999",
+            "x-ratelimit-remaining-tokens": "9990000",
+            "x-ratelimit-reset-requests": "6ms",
+            "x-ratelimit-reset-tokens": "6ms",
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def openai_chat_completions(request: Request):
+        body = await request.json()
+        content = review_content(body)
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens,
+                 "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion = {"id": f"chatcmpl-{rng.randrange(10 ** 9)}", "created": int(time.time()), "model": body.get("model")}
+
+        if not body.get("stream"):
+            if token_interval:
+                await asyncio.sleep(token_interval * completion_tokens)
+            return JSONResponse(headers=rate_limit_headers(), content={
+                **completion,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            })
+
+        async def stream() -> AsyncIterator[str]:
+            pieces = re.findall(r"\S+\s*", content) or [content]
+            step = max(1, len(pieces) // max(1, completion_tokens))
+            for start in range(0, len(pieces), step):
+                chunk = {**completion, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": "".join(pieces[start:start + step])},
+                                      "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if token_interval:
+                    await asyncio.sleep(token_interval)
+            done = {**completion, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(done)}\n\n"
+            yield f"data: {json.dumps({**completion, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers=rate_limit_headers())
+
+    # Slack / Discord / Google Chat
+    @app.post("/webhook/{kind}")
+    async def webhook(kind: str):
+        return {"ok": True, "kind": kind}
+
+    return app
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", action="append", metavar="BACKEND=SECONDS",
+                        help=f"backend별 평균 응답 지연. backend: {', '.join(BACKENDS)}")
+    parser.add_argument("--error-rate", action="append", metavar="BACKEND=RATIO",
+                        help="backend별 오류 응답 비율(0~1). OpenAI/webhook은 429, 나머지는 503을 돌려줍니다.")
+    parser.add_argument("--files", type=int, default=4, help="PR/MR/리뷰당 변경 파일 수")
+    parser.add_argument("--patch-lines", type=int, default=40, help="파일당 추가된 라인 수")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="OpenAI 응답의 토큰 수")
+    parser.add_argument("--token-interval", type=float, default=0.0, help="OpenAI 스트리밍 토큰 간격(초)")
+    parser.add_argument("--seed", type=int, default=None)
+
+def app_from_args(args: argparse.Namespace) -> FastAPI:
+    return create_app(latency=parse_pairs(args.latency),
+                      error_rate=parse_pairs(args.error_rate),
+                      files=args.files,
+                      patch_lines=args.patch_lines,
+                      completion_tokens=args.completion_tokens,
+                      token_interval=args.token_interval,
+                      seed=args.seed)
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(app_from_args(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+앱 시작 비용 측정.
+설정 조합(CODE_REVIEW_TOOL x WEBHOOK)마다 새 인터프리터에서 `app.main`을 import 해
+import 시간, 불러온 모듈 수, 최대 RSS와 첫 요청에서 backend를 불러오는 시간을 측정합니다.
+`uvicorn --workers N`에서는 worker마다 이 비용이 듭니다.
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+TOOLS = ("github", "gitlab", "upsource")
+WEBHOOKS = ("slack", "google-chat", "discord")
+# 설정에 따라 불러오지 않아야 하는 무거운 의존성
+WATCHED_MODULES = ("github", "openai", "tiktoken", "app.core.github", "app.core.gitlab", "app.core.upsource")
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+loaded = {name: name in sys.modules for name in WATCHED_MODULES}
+modules = len(sys.modules)
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+from app.config import settings
+from app.core import adapter
+started = time.perf_counter()
+adapter.code_review_tools.get(settings.CODE_REVIEW_TOOL)
+adapter.notifiers.get(settings.WEBHOOK)
+resolved = time.perf_counter() - started
+
+print(json.dumps({"import_seconds": imported, "resolve_seconds": resolved, "modules": modules,
+                  "rss_mb": rss, "first_request_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "loaded": loaded}))
+"""
+
+def environment(tool: str, webhook: str) -> dict[str, str]:
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("GITHUB_", "GITLAB_", "UPSOURCE_"))}
+    env.update({
+        "PYTHONPATH": str(ROOT),
+        "CODE_REVIEW_TOOL": tool,
+        "GITHUB_BASE_URL": "http://127.0.0.1:9/github",
+        "GITHUB_ACCESS_TOKEN": "bench",
+        "GITLAB_BASE_URL": "http://127.0.0.1:9/gitlab",
+        "GITLAB_ACCESS_TOKEN": "bench",
+        "UPSOURCE_BASE_URL": "http://127.0.0.1:9/upsource",
+        "UPSOURCE_USERNAME": "bench",
+        "UPSOURCE_PASSWORD": "bench",
+        "OPENAI_API_KEYS": "sk-bench-0001",
+        "OPENAI_MODEL": "gpt-4o-mini",
+        "REVIEW_FILES_RAW": "py,java",
+        "WEBHOOK": webhook,
+        "WEBHOOK_URI": f"http://127.0.0.1:9/webhook/{webhook}",
+    })
+    return env
+
+def probe(tool: str, webhook: str, workdir: str) -> dict[str, Any]:
+    code = f"WATCHED_MODULES = {WATCHED_MODULES!r}\n{PROBE}"
+    result = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=environment(tool, webhook),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure(tool: str, webhook: str, repeat: int, workdir: str) -> dict[str, Any]:
+    runs = [probe(tool, webhook, workdir) for _ in range(repeat)]
+    return {
+        "tool": tool,
+        "webhook": webhook,
+        "import_ms": round(statistics.median(run["import_seconds"] for run in runs) * 1000, 1),
+        "resolve_ms": round(statistics.median(run["resolve_seconds"] for run in runs) * 1000, 1),
+        "modules": runs[-1]["modules"],
+        "rss_mb": round(statistics.median(run["rss_mb"] for run in runs), 1),
+        "first_request_rss_mb": round(statistics.median(run["first_request_rss_mb"] for run in runs), 1),
+        "loaded_at_startup": [name for name, loaded in runs[-1]["loaded"].items() if loaded],
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tool", action="append", choices=TOOLS, help="측정할 CODE_REVIEW_TOOL (기본: 전부)")
+    parser.add_argument("--webhook", action="append", choices=WEBHOOKS, help="측정할 WEBHOOK (기본: slack)")
+    parser.add_argument("--repeat", type=int, default=3, help="조합마다 반복할 횟수 (중앙값을 사용)")
+    parser.add_argument("--output", help="결과(JSON)를 저장할 경로")
+    args = parser.parse_args()
+
+    # logging.conf가 상대 경로(./logs)에 기록하므로 임시 디렉터리에서 실행합니다.
+    workdir = tempfile.mkdtemp(prefix="review-bot-startup-")
+    shutil.copy(ROOT / "logging.conf", workdir)
+    os.makedirs(os.path.join(workdir, "logs"), exist_ok=True)
+    try:
+        results = [measure(tool, webhook, args.repeat, workdir)
+                   for tool in args.tool or TOOLS
+                   for webhook in args.webhook or ["slack"]]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for result in results:
+        print(f"{result['tool']:>8} + {result['webhook']:<11} import {result['import_ms']:>7.1f}ms  "
+              f"resolve {result['resolve_ms']:>6.1f}ms  modules {result['modules']:>5}  "
+              f"rss {result['rss_mb']:>6.1f}MB -> {result['first_request_rss_mb']:>6.1f}MB  "
+              f"loaded: {', '.join(result['loaded_at_startup']) or '-'}", file=sys.stderr)
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
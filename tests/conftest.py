@@ -0,0 +1,10 @@
+import os
+
+# app 설정을 읽기 위해 필요한 값 (테스트 결과에는 영향이 없습니다)
+for name, value in {"CODE_REVIEW_TOOL": "github", "GITHUB_BASE_URL": "http://127.0.0.1:9/github",
+                    "GITHUB_ACCESS_TOKEN": "test", "OPENAI_API_KEYS": "sk-test-0001", "OPENAI_MODEL": "gpt-4o-mini",
+                    "REVIEW_FILES_RAW": "py", "WEBHOOK": "slack", "WEBHOOK_URI": "http://127.0.0.1:9/webhook"}.items():
+    os.environ.setdefault(name, value)
+
+# logging.conf가 상대 경로(./logs)에 기록합니다.
+os.makedirs("logs", exist_ok=True)
@@ -0,0 +1,25 @@
+from app.core.diff_filter import is_generated_diff, is_whitespace_only
+
+def test_spacing_inside_line_is_whitespace_only():
+    diff = "@@ -1,2 +1,3 @@\n-x=f(a,b)\n+x = f(a, b)\n+\n y = 2"
+    assert is_whitespace_only(diff)
+
+def test_moved_line_is_reviewed():
+    diff = "@@ -1,2 +1,2 @@\n-a = 1\n b = 2\n+a = 1"
+    assert not is_whitespace_only(diff)
+
+def test_python_indentation_change_is_reviewed():
+    diff = "@@ -1,3 +1,3 @@\n if ready:\n     start()\n-    stop()\n+stop()"
+    assert not is_whitespace_only(diff)
+
+def test_generated_marker_in_file_header():
+    diff = "@@ -1,2 +1,2 @@\n // Code generated by protoc. DO NOT EDIT.\n-var a = 1\n+var a = 2"
+    assert is_generated_diff(diff)
+
+def test_generated_marker_below_file_header_is_reviewed():
+    diff = "@@ -120,2 +120,3 @@\n x = 1\n+# do not edit this value by hand\n+LIMIT = 10"
+    assert not is_generated_diff(diff)
+
+def test_long_context_line_is_reviewed():
+    diff = "@@ -3,2 +3,2 @@\n DATA = '" + "x" * 2000 + "'\n-a = 1\n+a = 2"
+    assert not is_generated_diff(diff)